@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark hors ligne de la chaîne de recherche (get_romaji_lyrics) contre le
+serveur local de standin_server.py : aucune requête ne sort de la machine.
+
+Mesure la latence de bout en bout (percentiles) en mode piste par piste, puis
+le débit en mode lot. Avec --baseline, compare aux résultats enregistrés
+(--save) et échoue si un percentile régresse au-delà de la tolérance.
+
+    python benchmarks/bench_lookup.py --tracks 50 --latency-ms 60 --jitter-ms 30 --save baseline.json
+    python benchmarks/bench_lookup.py --tracks 50 --latency-ms 60 --jitter-ms 30 --baseline baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import standin_server  # noqa: E402
+
+# Le cache local est redirigé vers un répertoire temporaire avant tout import du paquet.
+os.environ["AUTOLYRICS_CACHE_DIR"] = tempfile.mkdtemp(prefix="autolyrics-bench-")
+
+from lyrics_fetcher import fetch, search, traffic  # noqa: E402
+from lyrics_fetcher.fallback import find_romaji_lyrics  # noqa: E402
+from lyrics_fetcher.providers import REGISTRY, get_providers  # noqa: E402
+from lyrics_fetcher.utils import LookupIncomplete  # noqa: E402
+
+# Nautiljon passe par Selenium/Chrome : exclu par défaut.
+DEFAULT_PROVIDERS = [name for name in REGISTRY if name != "nautiljon"]
+PERCENTILES = (50, 90, 95, 99)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    return {
+        "count": len(latencies),
+        "mean_ms": statistics.mean(latencies) * 1000 if latencies else 0.0,
+        **{f"p{p}_ms": percentile(latencies, p) * 1000 for p in PERCENTILES},
+        "throughput": len(latencies) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def lookup(index, providers, deadline):
+    title, artist = f"Song {index}", "Artist"
+    start = time.perf_counter()
+    try:
+        match = find_romaji_lyrics(title, artist, deadline=deadline, providers=providers)
+        outcome = match.provider if match else "not_found"
+    except LookupIncomplete:
+        outcome = "incomplete"
+    return time.perf_counter() - start, outcome
+
+
+def run_mode(tracks, jobs, providers, deadline, verbose):
+    outcomes = {}
+    start = time.perf_counter()
+    # Les messages des fournisseurs sont masqués pour toute la durée de la mesure.
+    with contextlib.redirect_stdout(sys.stdout if verbose else io.StringIO()):
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = list(pool.map(lambda i: lookup(i, providers, deadline), range(tracks)))
+    elapsed = time.perf_counter() - start
+    for _, outcome in results:
+        outcomes[outcome] = outcomes.get(outcome, 0) + 1
+    summary = summarize([latency for latency, _ in results], elapsed)
+    summary["outcomes"] = outcomes
+    return summary
+
+
+def print_summary(label, summary):
+    cells = "  ".join(f"p{p}={summary[f'p{p}_ms']:.0f}ms" for p in PERCENTILES)
+    print(f"{label:<8} n={summary['count']:<4} moyenne={summary['mean_ms']:.0f}ms  {cells}  "
+          f"débit={summary['throughput']:.2f} pistes/s  {summary['outcomes']}")
+
+
+def compare(results, baseline, tolerance):
+    regressions = []
+    for mode in ("single", "batch"):
+        for p in PERCENTILES:
+            key = f"p{p}_ms"
+            old, new = baseline.get(mode, {}).get(key), results[mode][key]
+            if old and new > old * (1 + tolerance):
+                regressions.append(f"{mode} {key}: {old:.0f}ms → {new:.0f}ms")
+        old, new = baseline.get(mode, {}).get("throughput"), results[mode]["throughput"]
+        if old and new < old / (1 + tolerance):
+            regressions.append(f"{mode} débit: {old:.2f} → {new:.2f} pistes/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de get_romaji_lyrics.")
+    parser.add_argument("--tracks", type=int, default=30, help="Nombre de pistes par mode.")
+    parser.add_argument("--jobs", type=int, default=8, help="Recherches simultanées en mode lot.")
+    parser.add_argument("--deadline", type=float, default=30.0, help="Délai global par recherche (s).")
+    parser.add_argument("--providers", default=",".join(DEFAULT_PROVIDERS),
+                        help="Fournisseurs interrogés, par ordre de priorité (séparés par des virgules).")
+    parser.add_argument("--save", help="Enregistre les résultats (JSON) pour servir de référence.")
+    parser.add_argument("--baseline", help="Résultats de référence (JSON) à comparer.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Régression tolérée (0.2 = +20%%).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Affiche les messages des fournisseurs.")
+    standin_server.add_arguments(parser)
+    args = parser.parse_args()
+
+    providers = get_providers(order=args.providers)
+
+    server = standin_server.start_server(standin_server.config_from_args(args))
+    base_url = "http://%s:%d" % server.server_address
+
+    def standin_search(query, num_results=5):
+        page = fetch.fetch(f"{base_url}/search", params={"q": query, "num": num_results})
+        return json.loads(page.content) if page.ok else []
+
+    search.configure(backend=standin_search, use_cache=False, direct_resolution=False)
+    fetch.configure(revalidate=False, backoff_factor=0.01, pool_maxsize=max(4, args.jobs * len(providers)))
+    # Pauses courtes après un 429/5xx injecté ; tous les faux sites partagent l'hôte 127.0.0.1.
+    traffic.configure(backoff_base=0.01, max_backoff=0.1)
+
+    results = {
+        "single": run_mode(args.tracks, 1, providers, args.deadline, args.verbose),
+        "batch": run_mode(args.tracks, args.jobs, providers, args.deadline, args.verbose),
+    }
+    print_summary("single", results["single"])
+    print_summary("batch", results["batch"])
+    server.shutdown()
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Résultats enregistrés dans {args.save}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("❌ Régressions de performance :")
+            for line in regressions:
+                print(f"  - {line}")
+            sys.exit(1)
+        print("✅ Pas de régression par rapport à la référence.")
+
+
+if __name__ == "__main__":
+    main()
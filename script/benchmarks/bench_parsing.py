@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Compare le temps de parsing et le pic mémoire par fournisseur, sur les pages
+enregistrées dans benchmarks/fixtures/ : arbre complet (ancienne méthode) ou
+restreint au conteneur des paroles, avec html.parser ou lxml.
+
+    python benchmarks/bench_parsing.py --repeat 50 --pad-kb 300
+
+Le pic mémoire est mesuré avec tracemalloc, qui ne voit que les allocations
+Python : la mémoire interne de lxml (en C) n'y apparaît pas.
+"""
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lyrics_fetcher.parsing import EXTRACTORS, make_soup  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def available_parsers():
+    parsers = ["html.parser"]
+    try:
+        import lxml  # noqa: F401
+        parsers.append("lxml")
+    except ImportError:
+        print("⚠️ lxml non installé : seul html.parser est mesuré.")
+    return parsers
+
+
+def load_fixture(provider: str, pad_kb: int) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, f"{provider}.html"), "rb") as f:
+        content = f.read()
+    if pad_kb:
+        # Simule une page plus lourde (scripts, menus...) après le conteneur des paroles.
+        filler = b"<div class=\"filler\"><a href=\"/x\">lien</a><span>texte</span></div>\n"
+        padding = filler * (pad_kb * 1024 // len(filler))
+        content = content.replace(b"</body>", padding + b"</body>")
+    return content
+
+
+def run(extractor, content, parser, restricted):
+    soup = make_soup(content, extractor.strainer if restricted else None, parser)
+    return extractor.extract(soup)
+
+
+def measure(extractor, content, parser, restricted, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = run(extractor, content, parser, restricted)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    run(extractor, content, parser, restricted)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du parsing HTML par fournisseur.")
+    parser.add_argument("--repeat", type=int, default=20, help="Nombre de répétitions (on garde le meilleur temps).")
+    parser.add_argument("--pad-kb", type=int, default=0, help="Ko de balisage ajoutés à chaque page.")
+    parser.add_argument("providers", nargs="*", default=sorted(EXTRACTORS), help="Fournisseurs à mesurer.")
+    args = parser.parse_args()
+
+    parsers = available_parsers()
+    print(f"{'fournisseur':<18}{'mode':<28}{'temps (ms)':>12}{'pic mémoire (Ko)':>18}")
+    for provider in args.providers:
+        content = load_fixture(provider, args.pad_kb)
+        extractor = EXTRACTORS[provider]
+        reference = None
+        for restricted in (False, True):
+            for name in parsers:
+                best, peak, result = measure(extractor, content, name, restricted, args.repeat)
+                mode = f"{'conteneur' if restricted else 'page complète'} / {name}"
+                print(f"{provider:<18}{mode:<28}{best * 1000:>12.2f}{peak / 1024:>18.0f}")
+                if reference is None:
+                    reference = result
+                elif result != reference:
+                    print(f"  ⚠️ Résultat différent de l'extraction sur la page complète ({mode})")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Serveur HTTP local qui remplace Google et les sites de paroles pendant les benchmarks.
+
+- /search?q=<requête>&num=<n> : faux moteur de recherche, renvoie en JSON des URL
+  pointant vers ce serveur pour le site visé par `site:` dans la requête.
+- /<hôte>/<chemin> : page enregistrée (benchmarks/fixtures/<fournisseur>.html) du site.
+
+Latence, erreurs 500 et réponses 429 peuvent être injectées aléatoirement.
+
+    python benchmarks/standin_server.py --port 8765 --latency-ms 80 --throttle-rate 0.05
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Hôte → (fixture, chemin d'une page de paroles acceptée par le fournisseur correspondant).
+# {slug} est le slug du titre (dernier terme entre guillemets de la requête) : les URL
+# ressemblent ainsi au morceau cherché, comme les vrais résultats (voir query.score_url).
+SITES = {
+    "animelyrics.com": ("animelyrics", "anime/example/{slug}-{n}.htm"),
+    "lyrical-nonsense.com": ("lyrical_nonsense", "global/lyrics/artist/{slug}-{n}/"),
+    "genius.com": ("genius", "Genius-romanizations-artist-{slug}-{n}-romanized-lyrics"),
+    "j-lyric.net": ("j_lyric", "artist/a000001/l00000{n}.html"),
+    "mojim.com": ("mojim", "jpy100000x{n}x1.htm"),
+    "nautiljon.com": ("nautiljon", "paroles/artist/{slug}-{n}.html"),
+}
+
+
+class StandinConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, throttle_rate=0.0, miss_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.miss_rate = miss_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+
+    def draw(self):
+        """Tire (délai en secondes, statut injecté ou None, recherche sans résultat)."""
+        with self.lock:
+            self.requests += 1
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self.random.random()
+            miss = self.random.random() < self.miss_rate
+        if roll < self.throttle_rate:
+            return delay, 429, miss
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 500, miss
+        return delay, None, miss
+
+
+def _load_fixtures():
+    fixtures = {}
+    for host, (name, _) in SITES.items():
+        with open(os.path.join(FIXTURES_DIR, f"{name}.html"), "rb") as f:
+            fixtures[host] = f.read()
+    return fixtures
+
+
+def make_handler(config: StandinConfig):
+    fixtures = _load_fixtures()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, body: bytes, content_type="text/html; charset=utf-8", headers=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            delay, injected, miss = config.draw()
+            time.sleep(delay)
+            if injected == 429:
+                return self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": "0"})
+            if injected == 500:
+                return self._send(500, b"Internal Server Error", "text/plain")
+
+            parts = urlsplit(self.path)
+            if parts.path == "/search":
+                return self._search(parse_qs(parts.query), miss)
+
+            host = parts.path.lstrip("/").split("/", 1)[0]
+            for site, content in fixtures.items():
+                if host.endswith(site):
+                    return self._send(200, content)
+            return self._send(404, b"<html><body>Not found</body></html>")
+
+        def _search(self, params, miss):
+            query = params.get("q", [""])[0]
+            num = int(params.get("num", ["5"])[0])
+            urls = []
+            match = re.search(r"site:(?:https?://)?(?:www\.)?([^/\s]+)", query)
+            quoted = re.findall(r'"([^"]*)"', query)
+            slug = re.sub(r"[^a-z0-9]+", "-", quoted[-1].lower()).strip("-") if quoted else "song"
+            if match and not miss:
+                for site, (_, path) in SITES.items():
+                    if match.group(1).endswith(site):
+                        base = f"http://{self.headers['Host']}/{site}/"
+                        urls = [base + path.format(n=n, slug=slug) for n in range(1, min(num, 2) + 1)]
+            self._send(200, json.dumps(urls).encode("utf-8"), "application/json")
+
+    return Handler
+
+
+def start_server(config: StandinConfig, host="127.0.0.1", port=0) -> ThreadingHTTPServer:
+    """Démarre le serveur dans un thread démon ; l'adresse réelle est dans server.server_address."""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="standin-server", daemon=True).start()
+    return server
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Latence injectée par requête (ms).")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Variation aléatoire de la latence (± ms).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Proportion de réponses 500.")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Proportion de réponses 429.")
+    parser.add_argument("--miss-rate", type=float, default=0.0, help="Proportion de recherches sans résultat.")
+    parser.add_argument("--seed", type=int, default=None, help="Graine du tirage aléatoire (reproductibilité).")
+
+
+def config_from_args(args) -> StandinConfig:
+    return StandinConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, args.miss_rate, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur local imitant Google et les sites de paroles.")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(config_from_args(args)))
+    print(f"🛰️ Serveur de test sur http://127.0.0.1:{args.port} (recherche : /search?q=...)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
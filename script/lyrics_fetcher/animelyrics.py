@@ -1,38 +1,27 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+from .fetch import fetch
+from .parsing import extract_lyrics
+from .search import planned_candidates
+from .utils import is_cancelled, set_source_url
 
 def find_lyrics_animelyrics(title: str, artist: str) -> str:
-    query = f'site:animelyrics.com "romaji lyrics" "{artist}" "{title}"'
-    print(f"🔍 Recherche animelyrics : {query}")
-
-    for url in search(query, num_results=5):
-        if "animelyrics.com" in url:
-            print(f"✅ URL trouvée (animelyrics): {url}")
-            lyrics = scrape_animelyrics(url)
-            if lyrics:
-                return lyrics
+    urls = planned_candidates(
+        "animelyrics", title, artist, ['site:animelyrics.com "romaji lyrics" "{artist}" "{title}"'],
+        accept=lambda url: "animelyrics.com" in url,
+    )
+    for url in urls:
+        if is_cancelled():
+            return None
+        print(f"✅ URL trouvée (animelyrics): {url}")
+        set_source_url(url)
+        lyrics = scrape_animelyrics(url)
+        if lyrics:
+            return lyrics
     return None
 
 def scrape_animelyrics(url: str) -> str:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (lyrics-scraper)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-        
-        blocks = soup.find_all("div", class_="romaji")
-        if len(blocks) == 0:
-            blocks = soup.find_all("td", class_="romaji")
-        if not blocks:
-            return None
-
-        lyrics = []
-        for block in blocks:
-            dt = block.find("dt")
-            if dt and "Lyrics from" in dt.text:
-                dt.decompose()
-            lyrics.append(block.get_text("\n", strip=True))
-        return "\n".join(lyrics).strip()
+        resp = fetch(url)
+        return extract_lyrics("animelyrics", resp.content)
 
     except Exception as e:
         print(f"❌ Erreur scraping animelyrics : {e}")
@@ -0,0 +1,253 @@
+"""
+Synchronisation automatique des paroles sur l'audio (CPU uniquement).
+
+1. Décodage du MP3 en tableau NumPy mono (ffmpeg s'il est installé, sinon pygame).
+2. Caractéristiques vectorisées par trames de 20 ms : énergie dans la bande
+   vocale, part de cette énergie dans le spectre, planéité spectrale (faible
+   pour une voix chantée, forte pour les percussions) et flux spectral (attaques).
+3. Segments d'activité vocale (seuil d'Otsu sur le score lissé) et frontières
+   candidates : débuts de segments, et creux à l'intérieur des segments longs.
+4. Programmation dynamique : chaque ligne commence sur une frontière, en
+   minimisant l'écart entre sa durée chantée et celle attendue d'après sa
+   longueur, et en évitant qu'une ligne enjambe un long silence.
+
+Le résultat est un premier jet, à retoucher au besoin (lyrics_fetcher_cli.py lrc shift, etc.).
+"""
+
+import math
+import os
+import shutil
+import subprocess
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+WINDOW_MS = 40
+VOICE_BAND_HZ = (250, 4000)
+SMOOTH_MS = 200
+
+# Segmentation.
+MIN_GAP_MS = 250        # silences plus courts fusionnés
+MIN_SEGMENT_MS = 200    # segments plus courts ignorés
+LONG_SEGMENT_MS = 2500  # au-delà, on cherche des creux internes
+MIN_VALLEY_SPACING_MS = 1000
+SNAP_MS = 120           # recalage du début de ligne sur l'attaque la plus forte
+
+# Alignement.
+MAX_SPAN = 8            # nombre maximal de frontières enjambées par une ligne
+W_DURATION = 1.0        # écart (log) entre durée chantée et durée attendue
+W_WEAK = 0.6            # début de ligne sur un creux plutôt qu'après un silence
+W_GAP_BONUS = 0.4       # bonus par seconde de silence avant une ligne (plafonné à 2 s)
+W_INNER_GAP = 1.5       # pénalité par seconde de silence à l'intérieur d'une ligne
+W_UNUSED = 0.3          # pénalité par seconde de voix avant la 1re / après la dernière ligne
+
+_EPS = 1e-10
+
+
+def decode_audio(mp3_path: str, sample_rate: int = SAMPLE_RATE) -> Tuple[np.ndarray, int]:
+    """Échantillons mono float32 dans [-1, 1] et fréquence d'échantillonnage."""
+    if shutil.which("ffmpeg"):
+        raw = subprocess.run(
+            ["ffmpeg", "-v", "error", "-i", mp3_path, "-ac", "1", "-ar", str(sample_rate), "-f", "f32le", "-"],
+            capture_output=True, check=True,
+        ).stdout
+        return np.frombuffer(raw, dtype=np.float32), sample_rate
+
+    # Sans ffmpeg : décodage par pygame (SDL_mixer), sans sortie audio.
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    if not pygame.mixer.get_init():
+        pygame.mixer.init()
+    frequency, size, _ = pygame.mixer.get_init()
+    samples = pygame.sndarray.array(pygame.mixer.Sound(mp3_path)).astype(np.float32)
+    if samples.ndim == 2:
+        samples = samples.mean(axis=1)
+    samples /= float(1 << (abs(size) - 1))
+    # Sous-échantillonnage grossier par moyenne de blocs : seule l'enveloppe spectrale nous intéresse.
+    factor = max(1, frequency // sample_rate)
+    if factor > 1:
+        samples = samples[:len(samples) // factor * factor].reshape(-1, factor).mean(axis=1)
+    return samples, frequency // factor
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    return (values - values.mean()) / (values.std() + _EPS)
+
+
+def _smooth(values: np.ndarray, frames: int) -> np.ndarray:
+    if frames <= 1:
+        return values
+    return np.convolve(values, np.ones(frames) / frames, mode="same")
+
+
+def _otsu_threshold(values: np.ndarray, bins: int = 128) -> float:
+    histogram, edges = np.histogram(values, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    weight = np.cumsum(histogram)
+    weight_high = weight[-1] - weight
+    cumulative = np.cumsum(histogram * centers)
+    mean_low = cumulative / np.maximum(weight, 1)
+    mean_high = (cumulative[-1] - cumulative) / np.maximum(weight_high, 1)
+    between = weight * weight_high * (mean_low - mean_high) ** 2
+    return float(centers[np.argmax(between)])
+
+
+def vocal_features(samples: np.ndarray, sample_rate: int):
+    """Score d'activité vocale lissé, masque des trames chantées et flux spectral, par trame de FRAME_MS."""
+    hop = sample_rate * FRAME_MS // 1000
+    window = sample_rate * WINDOW_MS // 1000
+    if len(samples) < window:
+        samples = np.pad(samples, (0, window - len(samples)))
+    frames = sliding_window_view(samples, window)[::hop] * np.hanning(window).astype(np.float32)
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+    freqs = np.fft.rfftfreq(window, 1 / sample_rate)
+    band = (freqs >= VOICE_BAND_HZ[0]) & (freqs <= VOICE_BAND_HZ[1])
+    band_power = power[:, band]
+
+    band_energy = band_power.sum(axis=1)
+    log_band = np.log10(band_energy + _EPS)
+    ratio = band_energy / (power.sum(axis=1) + _EPS)
+    flatness = np.exp(np.log(band_power + _EPS).mean(axis=1)) / (band_power.mean(axis=1) + _EPS)
+    log_magnitude = np.log1p(band_power / (band_power.max() + _EPS) * 1e4)
+    flux = np.maximum(np.diff(log_magnitude, axis=0, prepend=log_magnitude[:1]), 0).sum(axis=1)
+
+    score = _smooth(_zscore(log_band) + _zscore(ratio) - _zscore(flatness), SMOOTH_MS // FRAME_MS)
+    # Trames nettement au-dessus du bruit de fond et du côté "voix" du seuil d'Otsu.
+    noise_floor = np.percentile(log_band, 10) + 0.5
+    active = (score > _otsu_threshold(score)) & (_smooth(log_band, SMOOTH_MS // FRAME_MS) > noise_floor)
+    return score, active, flux
+
+
+def vocal_segments(active: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Débuts et fins (trames) des segments chantés, silences courts fusionnés et segments courts ignorés."""
+    edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if len(starts) == 0:
+        return starts, ends
+    keep_gap = starts[1:] - ends[:-1] >= MIN_GAP_MS // FRAME_MS
+    starts = np.concatenate((starts[:1], starts[1:][keep_gap]))
+    ends = np.concatenate((ends[:-1][keep_gap], ends[-1:]))
+    long_enough = ends - starts >= MIN_SEGMENT_MS // FRAME_MS
+    return starts[long_enough], ends[long_enough]
+
+
+def candidate_boundaries(score: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    """Frontières (trame, creux ?, silence précédent en trames) triées par trame."""
+    boundaries = []
+    previous_end = 0
+    spacing = MIN_VALLEY_SPACING_MS // FRAME_MS
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        boundaries.append((start, False, start - previous_end))
+        previous_end = end
+        if (end - start) * FRAME_MS < LONG_SEGMENT_MS:
+            continue
+        inner = score[start + spacing:end - spacing]
+        if len(inner) < 3:
+            continue
+        # Minima locaux nettement sous la moyenne du segment, du plus profond au moins profond.
+        is_min = (inner[1:-1] < inner[:-2]) & (inner[1:-1] <= inner[2:])
+        candidates = np.flatnonzero(is_min) + 1
+        segment = score[start:end]
+        candidates = candidates[inner[candidates] < segment.mean() - 0.5 * segment.std()]
+        chosen = []
+        for index in candidates[np.argsort(inner[candidates])].tolist():
+            if all(abs(index - other) >= spacing for other in chosen):
+                chosen.append(index)
+        boundaries.extend((start + spacing + index, True, 0) for index in chosen)
+    boundaries.sort()
+    return boundaries
+
+
+def _proportional_starts(lengths: Sequence[int], active: np.ndarray) -> List[int]:
+    # Repli : les lignes se partagent le temps chanté au prorata de leur longueur.
+    voiced = np.concatenate(([0], np.cumsum(active)))
+    before = np.concatenate(([0], np.cumsum(lengths)[:-1])) / max(1, sum(lengths))
+    return np.searchsorted(voiced, before * voiced[-1], side="right").tolist()
+
+
+def align_lines(lengths: Sequence[int], score: np.ndarray, active: np.ndarray) -> List[int]:
+    """Trame de début de chaque ligne, `lengths` étant la longueur (en caractères) de chaque ligne."""
+    n = len(lengths)
+    starts, ends = vocal_segments(active)
+    boundaries = candidate_boundaries(score, starts, ends)
+    if n == 0:
+        return []
+    if len(boundaries) < n:
+        return _proportional_starts(lengths, active)
+
+    frames = [b[0] for b in boundaries] + [int(ends[-1])]  # sentinelle : fin de la voix
+    m = len(boundaries)
+    voiced = np.concatenate(([0], np.cumsum(active))).tolist()
+    seconds = FRAME_MS / 1000
+    total_voiced = voiced[frames[-1]] - voiced[frames[0]]
+    expected = [max(1.0, total_voiced * length / max(1, sum(lengths))) for length in lengths]
+    # Silences (en s) précédant chaque frontière forte, et leur somme cumulée pour les silences internes.
+    gaps = [0.0 if weak else gap * seconds for _, weak, gap in boundaries]
+    gap_prefix = np.concatenate(([0.0], np.cumsum(gaps))).tolist()
+    entry_cost = [W_WEAK if weak else -W_GAP_BONUS * min(gap, 2.0) for (_, weak, _), gap in zip(boundaries, gaps)]
+
+    def line_cost(i: int, j: int, k: int) -> float:
+        sung = voiced[frames[k]] - voiced[frames[j]]
+        duration = W_DURATION * math.log((sung + 1) / (expected[i] + 1)) ** 2
+        inner_gaps = W_INNER_GAP * (gap_prefix[k] - gap_prefix[j + 1])
+        return duration + inner_gaps
+
+    inf = float("inf")
+    cost = [[inf] * m for _ in range(n)]
+    back = [[-1] * m for _ in range(n)]
+    for j in range(m):
+        cost[0][j] = entry_cost[j] + W_UNUSED * seconds * (voiced[frames[j]] - voiced[frames[0]])
+    for i in range(n - 1):
+        row, next_row, next_back = cost[i], cost[i + 1], back[i + 1]
+        for j in range(i, m):
+            if row[j] == inf:
+                continue
+            for k in range(j + 1, min(j + MAX_SPAN, m - 1) + 1):
+                candidate = row[j] + line_cost(i, j, k) + entry_cost[k]
+                if candidate < next_row[k]:
+                    next_row[k], next_back[k] = candidate, j
+
+    # Dernière ligne : jusqu'à une frontière suivante ou la fin de la voix, le reste étant inutilisé.
+    best, best_j = inf, -1
+    for j in range(n - 1, m):
+        if cost[n - 1][j] == inf:
+            continue
+        for k in range(j + 1, min(j + MAX_SPAN, m) + 1):
+            unused = W_UNUSED * seconds * (voiced[frames[m]] - voiced[frames[k]])
+            candidate = cost[n - 1][j] + line_cost(n - 1, j, k) + unused
+            if candidate < best:
+                best, best_j = candidate, j
+    if best_j < 0:
+        return _proportional_starts(lengths, active)
+
+    path = [best_j]
+    for i in range(n - 1, 0, -1):
+        path.append(back[i][path[-1]])
+    return [frames[j] for j in reversed(path)]
+
+
+def _snap_to_onset(frame: int, flux: np.ndarray) -> int:
+    radius = SNAP_MS // FRAME_MS
+    low, high = max(0, frame - radius), min(len(flux), frame + radius + 1)
+    return low + int(np.argmax(flux[low:high])) if high > low else frame
+
+
+def frame_to_ms(frame: int) -> int:
+    # Milieu de la trame : la trame k couvre [k * FRAME_MS, k * FRAME_MS + WINDOW_MS).
+    return frame * FRAME_MS + WINDOW_MS // 2
+
+
+def align_lyrics(samples: np.ndarray, sample_rate: int, lines: Sequence[str]) -> List[int]:
+    """Début (ms) de chaque ligne de paroles dans l'audio."""
+    score, active, flux = vocal_features(samples, sample_rate)
+    lengths = [max(1, len(line.replace(" ", ""))) for line in lines]
+    starts = align_lines(lengths, score, active)
+    return [frame_to_ms(_snap_to_onset(frame, flux)) for frame in starts]
+
+
+def auto_sync(mp3_path: str, lines: Sequence[str]) -> List[int]:
+    samples, sample_rate = decode_audio(mp3_path)
+    return align_lyrics(samples, sample_rate, lines)
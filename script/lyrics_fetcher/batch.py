@@ -0,0 +1,239 @@
+"""
+Traitement par lots de bibliothèques musicales entières (sous-commande `batch`).
+
+Les tags ID3 viennent de l'index de la bibliothèque (lyrics_fetcher/library.py,
+seuls les fichiers nouveaux ou modifiés sont relus, dans un pool de processus),
+puis les paroles sont recherchées avec une concurrence bornée. Chaque piste traitée est consignée
+dans un manifeste (JSON Lines) : une exécution interrompue reprend là où elle
+s'était arrêtée.
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from .cache import LyricsCache
+from .library import get_library
+from .pipeline import LyricsPipeline, TrackJob
+from .utils import DEFAULT_DEADLINE
+
+MANIFEST_NAME = ".autolyrics_manifest.jsonl"
+
+STATUS_DONE = "done"
+STATUS_NOT_FOUND = "not_found"
+STATUS_ERROR = "error"
+
+DEFAULT_JOBS = 4
+DEFAULT_HOST_INTERVAL = 1.0
+
+
+def iter_mp3_files(paths):
+    """Fichiers .mp3 désignés par `paths` (fichiers ou répertoires parcourus récursivement), triés."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in files if name.lower().endswith(".mp3"))
+        elif path.lower().endswith(".mp3"):
+            found.append(path)
+    return sorted(os.path.abspath(p) for p in found)
+
+
+class Manifest:
+    """Journal des pistes traitées : une ligne JSON par piste, la dernière ligne d'un chemin fait foi."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # ligne tronquée par une interruption
+                    self.entries[entry["path"]] = entry
+        self._file = open(path, "a", encoding="utf-8")
+
+    def status(self, path: str):
+        entry = self.entries.get(path)
+        return entry["status"] if entry else None
+
+    def record(self, path: str, status: str, **details) -> None:
+        entry = {"path": path, "status": status, "time": time.time(), **details}
+        with self._lock:
+            self.entries[path] = entry
+            self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class _Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.done = 0
+        self.start = time.monotonic()
+        self._lock = threading.Lock()
+
+    def step(self, label: str) -> None:
+        with self._lock:
+            self.done += 1
+            elapsed = time.monotonic() - self.start
+            rate = self.done / elapsed if elapsed > 0 else 0.0
+            remaining = (self.total - self.done) / rate if rate > 0 else 0.0
+            minutes, seconds = divmod(int(remaining), 60)
+            print(f"📊 [{self.done}/{self.total}] {rate:.2f} pistes/s, ETA {minutes:02d}:{seconds:02d} — {label}")
+
+
+def _process_track(pipeline, mp3_path, title, artist, manifest, progress):
+    try:
+        job = TrackJob(mp3_path)
+        job.title, job.artist = title, artist
+        pipeline.lookup(job)
+        if job.found:
+            pipeline.write(job)
+            manifest.record(mp3_path, STATUS_DONE, provider=job.entry.provider, url=job.entry.url)
+            progress.step(f"✅ {title} - {artist}")
+        else:
+            manifest.record(mp3_path, STATUS_NOT_FOUND)
+            progress.step(f"❌ {title} - {artist}")
+    except Exception as e:
+        manifest.record(mp3_path, STATUS_ERROR, error=str(e))
+        progress.step(f"⚠️ {title} - {artist} : {e}")
+
+
+def run_batch(paths, jobs=DEFAULT_JOBS, tag_workers=None, manifest_path=None, retry_not_found=False,
+              overwrite=False, deadline=DEFAULT_DEADLINE, use_cache=True, refresh=False, **lookup_options) -> dict:
+    """
+    Traite toutes les pistes désignées par `paths` et renvoie le nombre de pistes par statut.
+    Les options restantes (max_parallel, adaptive, cross_check...) sont transmises à la recherche de chaque piste.
+    """
+    mp3_files = iter_mp3_files(paths)
+    library = get_library()
+    library.scan(paths, workers=tag_workers)
+    if manifest_path is None:
+        root = paths[0] if len(paths) == 1 and os.path.isdir(paths[0]) else os.getcwd()
+        manifest_path = os.path.join(root, MANIFEST_NAME)
+    manifest = Manifest(manifest_path)
+
+    skip = {STATUS_DONE} if retry_not_found else {STATUS_DONE, STATUS_NOT_FOUND}
+    todo = []
+    for mp3_path in mp3_files:
+        if manifest.status(mp3_path) in skip:
+            continue
+        track = library.get(mp3_path)
+        if not overwrite and track is not None and track.has_txt:
+            manifest.record(mp3_path, STATUS_DONE, existing=True)
+            continue
+        todo.append(mp3_path)
+
+    print(f"🎵 {len(mp3_files)} piste(s) trouvée(s), {len(todo)} à traiter (manifeste : {manifest_path})")
+    progress = _Progress(len(todo))
+    # Une seule connexion au cache pour tout le lot (comme le démon).
+    cache = LyricsCache() if use_cache else None
+    pipeline = LyricsPipeline(
+        deadline=deadline, use_cache=use_cache, refresh=refresh, cache=cache, verbose=False, **lookup_options
+    )
+
+    try:
+        with ThreadPoolExecutor(max_workers=jobs) as lookups:
+            futures = []
+            for mp3_path in todo:
+                track = library.get(mp3_path)
+                error = track.error if track else "absent de l'index"
+                if error or not track.title or not track.artist:
+                    manifest.record(mp3_path, STATUS_ERROR, error=error or "titre ou artiste absent des tags")
+                    progress.step(f"⚠️ {os.path.basename(mp3_path)} : tags illisibles")
+                    continue
+                futures.append(lookups.submit(
+                    _process_track, pipeline, mp3_path, track.title, track.artist, manifest, progress
+                ))
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                # Ctrl-C : abandonner les recherches en attente, seules celles en cours se terminent ;
+                # le manifeste permet de reprendre à la prochaine exécution.
+                lookups.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        manifest.close()
+        if cache is not None:
+            cache.close()
+
+    counts = {}
+    for mp3_path in mp3_files:
+        status = manifest.status(mp3_path)
+        counts[status] = counts.get(status, 0) + 1
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py batch",
+        description="📚 Recherche des paroles pour tous les .mp3 d'un ou plusieurs répertoires (reprise possible)."
+    )
+    parser.add_argument("paths", nargs="+", help="Répertoires (parcourus récursivement) ou fichiers .mp3")
+    parser.add_argument("-j", "--jobs", type=int, default=DEFAULT_JOBS,
+                        help=f"Nombre de recherches de paroles simultanées (défaut: {DEFAULT_JOBS}).")
+    parser.add_argument("--tag-workers", type=int, default=None,
+                        help="Nombre de processus pour la lecture des tags ID3 (défaut: nombre de CPU).")
+    parser.add_argument("--host-interval", type=float, default=DEFAULT_HOST_INTERVAL,
+                        help=f"Intervalle minimal en secondes entre deux requêtes vers un même site (défaut: {DEFAULT_HOST_INTERVAL:g}).")
+    parser.add_argument("--manifest", help=f"Chemin du manifeste de reprise (défaut: <répertoire>/{MANIFEST_NAME}).")
+    parser.add_argument("--retry-not-found", action="store_true",
+                        help="Relancer aussi les pistes précédemment marquées comme non trouvées.")
+    parser.add_argument("--overwrite", action="store_true",
+                        help="Traiter aussi les pistes qui ont déjà un fichier .txt.")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help=f"Délai global (en secondes) par piste (défaut: {DEFAULT_DEADLINE:g}).")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorer le cache local des paroles.")
+    parser.add_argument("--refresh", action="store_true", help="Ignorer les entrées en cache et les remplacer.")
+    parser.add_argument("--providers",
+                        help="Sources à interroger, dans l'ordre, séparées par des virgules (défaut: $AUTOLYRICS_PROVIDERS ou ordre documenté).")
+    parser.add_argument("--parallel", type=int, default=None,
+                        help="Nombre maximal de sources interrogées simultanément par piste (défaut: toutes).")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Ordonner les sources selon leurs taux de succès passés (par artiste si possible).")
+    parser.add_argument("--cross-check", action="store_true",
+                        help="Attendre une seconde source pour vérifier les paroles trouvées.")
+    parser.add_argument("--profile", metavar="FICHIER",
+                        help="Écrire les mesures : JSON, ou cProfile si le fichier se termine par .prof.")
+    args = parser.parse_args(argv)
+
+    if args.providers:
+        from . import providers
+        try:
+            providers.configure(order=args.providers)
+        except ValueError as e:
+            parser.error(str(e))
+
+    from . import instrumentation, traffic
+    traffic.configure(min_host_interval=args.host_interval)
+    if args.profile and args.profile.endswith(".prof"):
+        instrumentation.enable_profiling()
+
+    counts = run_batch(
+        args.paths,
+        jobs=args.jobs,
+        tag_workers=args.tag_workers,
+        manifest_path=args.manifest,
+        retry_not_found=args.retry_not_found,
+        overwrite=args.overwrite,
+        deadline=args.deadline,
+        use_cache=not args.no_cache,
+        refresh=args.refresh,
+        max_parallel=args.parallel,
+        adaptive=args.adaptive,
+        cross_check=args.cross_check,
+    )
+    if args.profile:
+        instrumentation.write_profile(args.profile)
+    print(f"\n✅ Terminé : {counts.get(STATUS_DONE, 0)} avec paroles, "
+          f"{counts.get(STATUS_NOT_FOUND, 0)} non trouvées, {counts.get(STATUS_ERROR, 0)} en erreur.")
@@ -0,0 +1,219 @@
+"""
+Pool de navigateurs Chrome headless pour les scrapers Selenium (Nautiljon).
+
+Démarrer Chrome coûte plusieurs secondes : les navigateurs sont donc gardés
+ouverts et réutilisés d'une page à l'autre, dans la limite d'un nombre fixe
+d'instances, puis recyclés après un certain nombre de pages. Tous les
+navigateurs sont fermés à la sortie du programme.
+"""
+
+import atexit
+import os
+import threading
+from contextlib import contextmanager
+
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+from .cache import cache_dir
+
+# Nombre maximal de navigateurs ouverts simultanément.
+POOL_SIZE = 2
+# Un navigateur est fermé et remplacé après ce nombre de pages (limite les fuites mémoire de Chrome).
+MAX_PAGES_PER_BROWSER = 50
+PAGE_LOAD_TIMEOUT = 20
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/137.0.0.0 Safari/537.36"
+
+# ✅ On modifie les propriétés JavaScript connues pour trahir Selenium
+STEALTH_SCRIPT = """
+    Object.defineProperty(navigator, 'webdriver', {get: () => undefined});
+    Object.defineProperty(navigator, 'languages', {get: () => ['en-US', 'en']});
+    Object.defineProperty(navigator, 'plugins', {get: () => [1, 2, 3]});
+"""
+
+_driver_path_lock = threading.Lock()
+_driver_path = None
+_driver_path_memoized = False  # chemin relu depuis le fichier mémo (peut dater d'une version de Chrome antérieure)
+
+
+def _memo_file() -> str:
+    return os.path.join(cache_dir(), "chromedriver_path")
+
+
+def chromedriver_path() -> str:
+    """
+    Chemin du binaire chromedriver, résolu une seule fois.
+
+    Ordre : $AUTOLYRICS_CHROMEDRIVER, chemin mémorisé lors d'une exécution
+    précédente, puis ChromeDriverManager (qui interroge le réseau et garde son
+    propre cache, par version de Chrome).
+    """
+    global _driver_path, _driver_path_memoized
+    with _driver_path_lock:
+        if _driver_path:
+            return _driver_path
+
+        path = os.environ.get("AUTOLYRICS_CHROMEDRIVER")
+        memo_file = _memo_file()
+        _driver_path_memoized = False
+        if not path and os.path.exists(memo_file):
+            with open(memo_file, encoding="utf-8") as f:
+                path = f.read().strip()
+            if not os.access(path, os.X_OK):
+                path = None
+            _driver_path_memoized = bool(path)
+        if not path:
+            path = ChromeDriverManager().install()
+            os.makedirs(cache_dir(), exist_ok=True)
+            with open(memo_file, "w", encoding="utf-8") as f:
+                f.write(path)
+
+        _driver_path = path
+        return path
+
+
+def _forget_memoized_driver(path: str) -> bool:
+    """
+    Oublie `path` s'il a été relu depuis le fichier mémo (supprimé) ; renvoie
+    False s'il ne venait pas de là (rien à réessayer).
+    """
+    global _driver_path, _driver_path_memoized
+    with _driver_path_lock:
+        if path != _driver_path:
+            return True  # déjà oublié par un autre thread : nouvel essai avec le chemin résolu depuis
+        if not _driver_path_memoized:
+            return False
+        try:
+            os.remove(_memo_file())
+        except FileNotFoundError:
+            pass
+        _driver_path = None
+        _driver_path_memoized = False
+        return True
+
+
+def _create_driver():
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")  # 🆕 mode furtif
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+
+    path = chromedriver_path()
+    try:
+        driver = webdriver.Chrome(service=Service(path), options=chrome_options)
+    except WebDriverException as e:
+        # Chrome mis à jour depuis la mémorisation du chemin : versions incompatibles.
+        if not _forget_memoized_driver(path):
+            raise
+        print(f"⚠️ chromedriver mémorisé inutilisable, nouvelle résolution : {e.msg or e}")
+        driver = webdriver.Chrome(service=Service(chromedriver_path()), options=chrome_options)
+    try:
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+        # Le script s'applique à tous les documents chargés ensuite dans cet onglet.
+        driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": STEALTH_SCRIPT})
+    except Exception:
+        driver.quit()
+        raise
+    return driver
+
+
+class _Browser:
+    def __init__(self):
+        self.driver = _create_driver()
+        self.pages = 0
+
+    def quit(self) -> None:
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"⚠️ Fermeture du navigateur impossible : {e}")
+
+
+class BrowserPool:
+    def __init__(self, size: int = POOL_SIZE, max_pages: int = MAX_PAGES_PER_BROWSER):
+        self.max_pages = max_pages
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._idle = []
+        self._browsers = set()  # tous les navigateurs ouverts, inactifs ou prêtés
+        self._closed = False
+
+    @contextmanager
+    def driver(self):
+        """
+        Prête un navigateur pour la durée du bloc `with`.
+
+        Si le bloc lève une exception, le navigateur est considéré comme dans un
+        état inconnu : il est fermé plutôt que remis dans le pool.
+        """
+        self._slots.acquire()
+        try:
+            with self._lock:
+                if self._closed:
+                    raise RuntimeError("Pool de navigateurs fermé")
+                browser = self._idle.pop() if self._idle else None
+            if browser is None:
+                browser = _Browser()
+                with self._lock:
+                    self._browsers.add(browser)
+
+            try:
+                yield browser.driver
+            except BaseException:
+                self._discard(browser)
+                raise
+
+            browser.pages += 1
+            self._release(browser)
+        finally:
+            self._slots.release()
+
+    def _release(self, browser: _Browser) -> None:
+        if browser.pages >= self.max_pages:
+            self._discard(browser)
+            return
+        try:
+            # Libère la page précédente (scripts, mémoire) avant réutilisation.
+            browser.driver.get("about:blank")
+        except Exception:
+            self._discard(browser)
+            return
+        with self._lock:
+            if not self._closed:
+                self._idle.append(browser)
+                return
+        self._discard(browser)
+
+    def _discard(self, browser: _Browser) -> None:
+        with self._lock:
+            self._browsers.discard(browser)
+        browser.quit()
+
+    def close(self) -> None:
+        """Ferme tous les navigateurs, y compris ceux encore prêtés (threads abandonnés en fin de programme)."""
+        with self._lock:
+            self._closed = True
+            browsers, self._browsers = self._browsers, set()
+            self._idle = []
+        for browser in browsers:
+            browser.quit()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = BrowserPool()
+            atexit.register(_pool.close)
+        return _pool
@@ -0,0 +1,393 @@
+"""
+Cache local des paroles (SQLite), pour éviter de relancer toute la chaîne
+Google + scraping à chaque lecture d'un même morceau.
+
+Ce module n'importe volontairement aucun module réseau : une recherche déjà en
+cache ne charge ni requests, ni BeautifulSoup, ni Selenium.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import List, NamedTuple, Optional
+
+from .providers import covers_registry
+from .utils import DEFAULT_DEADLINE, LookupIncomplete, format_lyrics_text
+
+# Durée de validité d'un résultat trouvé / d'un résultat "non trouvé" (en secondes).
+POSITIVE_TTL = 180 * 24 * 3600
+NEGATIVE_TTL = 3 * 24 * 3600
+
+# Durée de validité des résultats de recherche Google mémorisés (liste d'URL, éventuellement vide).
+SEARCH_TTL = 7 * 24 * 3600
+SEARCH_EMPTY_TTL = 24 * 3600
+
+# Nombre maximal de pages conservées pour la revalidation HTTP (ETag / Last-Modified).
+HTTP_MAX_ENTRIES = 5000
+
+# Au-delà de ces limites, les entrées les moins récemment utilisées sont supprimées.
+MAX_ENTRIES = 20000
+MAX_BYTES = 200 * 1024 * 1024
+
+
+def cache_dir() -> str:
+    """Répertoire du cache : $AUTOLYRICS_CACHE_DIR, sinon $XDG_CACHE_HOME/autolyrics."""
+    path = os.environ.get("AUTOLYRICS_CACHE_DIR")
+    if not path:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        path = os.path.join(base, "autolyrics")
+    return path
+
+
+def default_db_path() -> str:
+    os.makedirs(cache_dir(), exist_ok=True)
+    return os.path.join(cache_dir(), "lyrics_cache.sqlite")
+
+
+def normalize_key(title: str, artist: str) -> str:
+    """Clé de cache insensible à la casse, à la largeur des caractères et aux espaces superflus."""
+    parts = []
+    for value in (title, artist):
+        value = unicodedata.normalize("NFKC", value or "").casefold()
+        parts.append(re.sub(r"\s+", " ", value).strip())
+    return "\x1f".join(parts)
+
+
+class CachedLyrics(NamedTuple):
+    lyrics: Optional[str]
+    provider: Optional[str]
+    url: Optional[str]
+    fetched_at: float
+
+    @property
+    def found(self) -> bool:
+        return self.lyrics is not None
+
+
+class LyricsCache:
+    """
+    Cache persistant des paroles, indexé par (titre, artiste) normalisés.
+
+    Les résultats "non trouvé" sont aussi mémorisés, avec une durée de vie plus
+    courte, pour ne pas réinterroger Google à chaque lecture d'un morceau inconnu.
+    """
+
+    def __init__(self, path=None, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL,
+                 max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.path = path or default_db_path()
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS lyrics (
+                   key TEXT PRIMARY KEY,
+                   title TEXT,
+                   artist TEXT,
+                   lyrics TEXT,
+                   provider TEXT,
+                   url TEXT,
+                   fetched_at REAL NOT NULL,
+                   last_access REAL NOT NULL,
+                   size INTEGER NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS lyrics_last_access ON lyrics(last_access)")
+        self._conn.commit()
+
+    def get(self, title: str, artist: str) -> Optional[CachedLyrics]:
+        """Renvoie l'entrée en cache (trouvée ou "non trouvé"), ou None si absente ou expirée."""
+        key = normalize_key(title, artist)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT lyrics, provider, url, fetched_at FROM lyrics WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            entry = CachedLyrics(*row)
+            ttl = self.positive_ttl if entry.found else self.negative_ttl
+            if now - entry.fetched_at > ttl:
+                self._conn.execute("DELETE FROM lyrics WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE lyrics SET last_access = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return entry
+
+    def put(self, title: str, artist: str, lyrics: Optional[str], provider=None, url=None) -> None:
+        """Enregistre un résultat ; lyrics=None mémorise un "non trouvé"."""
+        now = time.time()
+        size = len(lyrics.encode("utf-8")) if lyrics else 0
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO lyrics VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (normalize_key(title, artist), title, artist, lyrics, provider, url, now, now, size),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def put_miss(self, title: str, artist: str) -> None:
+        self.put(title, artist, None)
+
+    def delete(self, title: str, artist: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM lyrics WHERE key = ?", (normalize_key(title, artist),))
+            self._conn.commit()
+
+    def evict(self) -> None:
+        with self._lock:
+            self._evict(time.time())
+            self._conn.commit()
+
+    def _evict(self, now: float) -> None:
+        # Expiration par âge, puis LRU tant que les limites de taille sont dépassées.
+        self._conn.execute(
+            "DELETE FROM lyrics WHERE (lyrics IS NOT NULL AND fetched_at < ?) OR (lyrics IS NULL AND fetched_at < ?)",
+            (now - self.positive_ttl, now - self.negative_ttl),
+        )
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM lyrics").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        for key, size in self._conn.execute("SELECT key, size FROM lyrics ORDER BY last_access").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM lyrics WHERE key = ?", (key,))
+            count -= 1
+            total -= size
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class SearchCache:
+    """Cache requête → liste d'URL, pour ne pas relancer une recherche Google déjà faite."""
+
+    def __init__(self, path=None, ttl=SEARCH_TTL, empty_ttl=SEARCH_EMPTY_TTL):
+        self.path = path or default_db_path()
+        self.ttl = ttl
+        self.empty_ttl = empty_ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS search_results (
+                   query TEXT NOT NULL,
+                   num_results INTEGER NOT NULL,
+                   urls TEXT NOT NULL,
+                   fetched_at REAL NOT NULL,
+                   PRIMARY KEY (query, num_results)
+               )"""
+        )
+        self._conn.commit()
+
+    def get(self, query: str, num_results: int) -> Optional[List[str]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT urls, fetched_at FROM search_results WHERE query = ? AND num_results = ?",
+                (query, num_results),
+            ).fetchone()
+        if row is None:
+            return None
+        urls = json.loads(row[0])
+        if time.time() - row[1] > (self.ttl if urls else self.empty_ttl):
+            return None
+        return urls
+
+    def put(self, query: str, num_results: int, urls: List[str]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO search_results VALUES (?, ?, ?, ?)",
+                (query, num_results, json.dumps(urls), time.time()),
+            )
+            self._conn.execute(
+                "DELETE FROM search_results WHERE fetched_at < ?", (time.time() - max(self.ttl, self.empty_ttl),)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class HttpCache:
+    """
+    Dernière version connue des pages téléchargées, avec leurs validateurs HTTP
+    (ETag / Last-Modified), pour les requêtes conditionnelles de fetch.py.
+    """
+
+    def __init__(self, path=None, max_entries=HTTP_MAX_ENTRIES):
+        self.path = path or default_db_path()
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS http_cache (
+                   url TEXT PRIMARY KEY,
+                   etag TEXT,
+                   last_modified TEXT,
+                   content BLOB NOT NULL,
+                   fetched_at REAL NOT NULL
+               )"""
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS http_cache_fetched_at ON http_cache(fetched_at)")
+        self._conn.commit()
+
+    def get(self, url: str):
+        """Renvoie (etag, last_modified, content) ou None."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT etag, last_modified, content FROM http_cache WHERE url = ?", (url,)
+            ).fetchone()
+
+    def put(self, url: str, etag, last_modified, content: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO http_cache VALUES (?, ?, ?, ?, ?)",
+                (url, etag, last_modified, content, time.time()),
+            )
+            self._conn.execute(
+                """DELETE FROM http_cache WHERE url IN (
+                       SELECT url FROM http_cache ORDER BY fetched_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def touch(self, url: str) -> None:
+        with self._lock:
+            self._conn.execute("UPDATE http_cache SET fetched_at = ? WHERE url = ?", (time.time(), url))
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ProviderStats:
+    """Succès / échecs / erreurs de chaque source, par artiste (voir instrumentation.order_providers)."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS provider_stats (
+                   provider TEXT NOT NULL,
+                   artist_key TEXT NOT NULL,
+                   hits INTEGER NOT NULL DEFAULT 0,
+                   misses INTEGER NOT NULL DEFAULT 0,
+                   errors INTEGER NOT NULL DEFAULT 0,
+                   total_ms REAL NOT NULL DEFAULT 0,
+                   PRIMARY KEY (provider, artist_key)
+               )"""
+        )
+        self._conn.commit()
+
+    def add(self, artist: str, outcomes: dict) -> None:
+        """outcomes : {fournisseur: (résultat "hit" / "miss" / "error", durée en secondes)}."""
+        artist_key = normalize_key("", artist)
+        with self._lock:
+            for provider, (outcome, elapsed) in outcomes.items():
+                self._conn.execute(
+                    """INSERT INTO provider_stats (provider, artist_key, hits, misses, errors, total_ms)
+                       VALUES (?, ?, ?, ?, ?, ?)
+                       ON CONFLICT(provider, artist_key) DO UPDATE SET
+                           hits = hits + excluded.hits,
+                           misses = misses + excluded.misses,
+                           errors = errors + excluded.errors,
+                           total_ms = total_ms + excluded.total_ms""",
+                    (provider, artist_key, int(outcome == "hit"), int(outcome == "miss"),
+                     int(outcome == "error"), elapsed * 1000),
+                )
+            self._conn.commit()
+
+    def load(self, artist: str):
+        """Renvoie ({fournisseur: (succès, essais)} pour l'artiste, idem toutes recherches confondues)."""
+        artist_key = normalize_key("", artist)
+        by_artist, overall = {}, {}
+        with self._lock:
+            rows = self._conn.execute(
+                """SELECT provider, artist_key = ?, SUM(hits), SUM(hits + misses + errors)
+                   FROM provider_stats GROUP BY provider, artist_key = ?""",
+                (artist_key, artist_key),
+            ).fetchall()
+        for provider, is_artist, hits, attempts in rows:
+            if is_artist:
+                by_artist[provider] = (hits, attempts)
+            previous = overall.get(provider, (0, 0))
+            overall[provider] = (previous[0] + hits, previous[1] + attempts)
+        return by_artist, overall
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def find_romaji_lyrics_cached(title: str, artist: str, deadline: float = DEFAULT_DEADLINE,
+                              use_cache: bool = True, refresh: bool = False, cache=None,
+                              **lookup_options) -> CachedLyrics:
+    """
+    Comme fallback.find_romaji_lyrics, en consultant d'abord le cache local.
+
+    Renvoie toujours une entrée (found=False si aucune source n'a de paroles) ;
+    lève LookupIncomplete si la recherche n'a pas pu conclure, ce qui n'est pas
+    mémorisé comme "non trouvé". Ne sont pas mis en cache non plus : des paroles
+    en kana/kanji rendues en dernier recours (LyricsMatch.romaji=False), et un
+    "non trouvé" obtenu avec une partie des sources seulement (--providers,
+    providers.configure(language=...)).
+
+    use_cache=False ignore complètement le cache (ni lecture, ni écriture) ;
+    refresh=True ignore l'entrée existante et la remplace par un nouveau résultat.
+    Les autres options (max_parallel, adaptive, cross_check...) sont transmises à find_romaji_lyrics.
+    """
+    if use_cache:
+        cache = cache or LyricsCache()
+        if not refresh:
+            entry = cache.get(title, artist)
+            if entry is not None:
+                source = (entry.provider or "source inconnue") if entry.found else "non trouvé"
+                print(f"💾 Résultat en cache ({source})")
+                return entry
+
+    # Import tardif : la pile réseau n'est chargée qu'en cas d'absence du cache.
+    from .fallback import find_romaji_lyrics
+
+    match = find_romaji_lyrics(title, artist, deadline=deadline, **lookup_options)
+    if match:
+        entry = CachedLyrics(match.lyrics, match.provider, match.url, time.time())
+    else:
+        entry = CachedLyrics(None, None, None, time.time())
+    if not use_cache:
+        return entry
+    if match is None and not covers_registry(lookup_options.get("providers")):
+        # Les sources écartées auraient pu trouver : une recherche complète ne doit pas être court-circuitée.
+        print("ℹ️ Sources restreintes : \"non trouvé\" non mis en cache")
+    elif match is None or match.romaji:
+        # Des paroles en kana/kanji (dernier recours) ne passent pas pour un résultat en romaji.
+        cache.put(title, artist, entry.lyrics, entry.provider, entry.url)
+    return entry
+
+
+def get_romaji_lyrics_cached(title: str, artist: str, deadline: float = DEFAULT_DEADLINE,
+                             use_cache: bool = True, refresh: bool = False, cache=None,
+                             **lookup_options) -> str:
+    """Comme fallback.get_romaji_lyrics, en consultant d'abord le cache local (voir find_romaji_lyrics_cached)."""
+    try:
+        entry = find_romaji_lyrics_cached(
+            title, artist, deadline, use_cache=use_cache, refresh=refresh, cache=cache, **lookup_options
+        )
+    except LookupIncomplete as e:
+        print(f"⚠️ Recherche incomplète, résultat non mis en cache : {e}")
+        return format_lyrics_text(title, artist, None)
+    return format_lyrics_text(title, artist, entry.lyrics)
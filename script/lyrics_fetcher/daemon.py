@@ -0,0 +1,237 @@
+"""
+Démon résident (sous-commande `daemon`) : suit le morceau joué par mplayer et
+affiche ses paroles dès le changement de piste.
+
+Contrairement à lyrics_fetcher_cli_current_song.sh, qui relance un processus
+Python (et réimporte requests, BeautifulSoup, Selenium, mutagen) à chaque
+appel, le démon garde en mémoire la pile réseau, la session HTTP, le cache et
+éventuellement un navigateur Chrome : la recherche démarre à la ligne
+"Playing ..." de mplayer, bien avant le premier couplet.
+"""
+
+import argparse
+import contextlib
+import os
+import shlex
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import LyricsCache, cache_dir
+from .now_playing import LsofPoller, MplayerFifo, MplayerSlave
+from .pipeline import LyricsPipeline, PipelineError, TrackJob
+from .prefetch import DEFAULT_DEPTH, PrefetchScheduler, directory_queue, read_playlist
+from .utils import DEFAULT_DEADLINE, LookupIncomplete
+
+# Recherches simultanées : un changement de piste rapide ne doit pas attendre la recherche précédente.
+LOOKUP_WORKERS = 2
+
+
+class NowPlayingDaemon:
+    def __init__(self, deadline=DEFAULT_DEADLINE, use_cache=True, refresh=False, overwrite=False,
+                 queue_for=None, prefetch_depth=0, **lookup_options):
+        """
+        queue_for(morceau_courant) renvoie la file de lecture ; avec prefetch_depth > 0,
+        les paroles des morceaux suivants sont préchargées dans le cache.
+        """
+        self.deadline = deadline
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.overwrite = overwrite
+        self.lookup_options = lookup_options
+        self.current = None
+        self._cache = LyricsCache() if use_cache else None
+        self.pipeline = LyricsPipeline(
+            deadline=deadline, use_cache=use_cache, refresh=refresh, cache=self._cache, verbose=False, **lookup_options
+        )
+        self._lookups = ThreadPoolExecutor(max_workers=LOOKUP_WORKERS, thread_name_prefix="lookup")
+        self._print_lock = threading.Lock()
+        self.queue_for = queue_for or directory_queue
+        self.prefetcher = None
+        if prefetch_depth > 0 and use_cache:
+            self.prefetcher = PrefetchScheduler(
+                prefetch_depth, deadline, cache=self._cache, adaptive=lookup_options.get("adaptive", False)
+            )
+
+    def warm_up(self, browser: bool = False) -> None:
+        """Charge à l'avance la pile réseau (et un navigateur Chrome si demandé)."""
+        start = time.perf_counter()
+        from . import fallback  # noqa: F401
+        from .fetch import get_session
+        from .providers import get_providers
+        for _, finder in get_providers():
+            finder.load()  # importe requests, BeautifulSoup et les modules des sources (Selenium compris)
+        get_session()
+        if browser:
+            from .browser_pool import get_browser_pool
+            with get_browser_pool().driver():
+                pass
+        print(f"🔥 Démon prêt en {time.perf_counter() - start:.1f}s")
+
+    def on_track(self, mp3_path: str) -> None:
+        """Appelée par la source à chaque nouveau morceau : la recherche part immédiatement en arrière-plan."""
+        if mp3_path == self.current:
+            return
+        self.current = mp3_path
+        self._lookups.submit(self._handle_safely, mp3_path)
+        if self.prefetcher:
+            try:
+                self.prefetcher.update(self.queue_for(mp3_path), mp3_path)
+            except OSError as e:
+                print(f"⚠️ File de lecture illisible : {e}")
+
+    def on_stop(self) -> None:
+        """Appelée quand mplayer s'arrête : le même morceau, relancé dans un nouveau mplayer, sera de nouveau traité."""
+        self.current = None
+
+    def _handle_safely(self, mp3_path: str) -> None:
+        """_handle dans un thread du pool : toute erreur est affichée plutôt que perdue avec le Future."""
+        try:
+            self._handle(mp3_path)
+        except Exception as e:
+            self._show(mp3_path, f"❌ Erreur inattendue pour {mp3_path} : {type(e).__name__}: {e}")
+
+    def _handle(self, mp3_path: str) -> None:
+        start = time.perf_counter()
+        job = TrackJob(mp3_path)
+        try:
+            self.pipeline.metadata(job)
+        except PipelineError as e:
+            self._show(mp3_path, f"⚠️ {e}")
+            return
+        if job.tag_error:
+            self._show(mp3_path, f"⚠️ Tags illisibles pour {mp3_path} : {job.tag_error}")
+            return
+        if not job.title or not job.artist:
+            self._show(mp3_path, f"❌ Titre ou artiste absent des tags : {mp3_path}")
+            return
+
+        if job.track.has_txt and not (self.overwrite or self.refresh):
+            self.pipeline.load_text(job)
+            self._show(mp3_path, job.lyrics_text, start)
+            return
+
+        try:
+            with self.prefetcher.foreground() if self.prefetcher else contextlib.nullcontext():
+                self.pipeline.lookup(job)
+        except LookupIncomplete as e:
+            self._show(mp3_path, f"⚠️ Recherche incomplète pour {job.title} - {job.artist} : {e}", start)
+            return
+
+        try:
+            self.pipeline.write(job)
+        except PipelineError as e:
+            print(f"❌ {e}")
+        self._show(mp3_path, job.lyrics_text, start)
+
+    def _show(self, mp3_path: str, text: str, start=None) -> None:
+        if mp3_path != self.current:
+            return  # la piste a changé entre-temps : le résultat reste en cache
+        with self._print_lock:
+            print("\n========================\n")
+            print(text)
+            print("\n========================")
+            if start is not None:
+                print(f"⏱️ Paroles prêtes en {time.perf_counter() - start:.2f}s")
+
+    def close(self) -> None:
+        if self.prefetcher:
+            self.prefetcher.stop()
+        self._lookups.shutdown(wait=False, cancel_futures=True)
+
+
+def _forward_commands(source) -> None:
+    """Transmet les lignes tapées sur l'entrée standard à mplayer (pause, seek 10, pt_step 1, quit...)."""
+    for line in sys.stdin:
+        command = line.strip()
+        if command and not source.send(command):
+            print("⚠️ mplayer n'écoute pas les commandes.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py daemon",
+        description="🎧 Suit le morceau joué par mplayer et affiche ses paroles dès le changement de piste.",
+        epilog="Sans fichier ni --fifo, le démon se rabat sur l'interrogation périodique de lsof (docs/03)."
+    )
+    parser.add_argument("files", nargs="*",
+                        help="Fichiers à lire : le démon lance lui-même mplayer en mode esclave.")
+    parser.add_argument("--fifo", nargs="?", const=cache_dir(), metavar="RÉPERTOIRE",
+                        help=f"Suivre un mplayer lancé avec : mplayer -input file=RÉPERTOIRE/mplayer.in ... "
+                             f"> RÉPERTOIRE/mplayer.out (défaut: {cache_dir()}).")
+    parser.add_argument("--lsof-interval", type=float, default=2.0,
+                        help="Période d'interrogation de lsof en secondes, en mode repli (défaut: 2).")
+    parser.add_argument("--mplayer", default="mplayer", help="Exécutable mplayer (défaut: mplayer).")
+    parser.add_argument("--mplayer-args", default="", help="Options supplémentaires pour mplayer (ex: \"-shuffle\").")
+    parser.add_argument("--playlist",
+                        help="Playlist mplayer ou M3U donnant la file de lecture (défaut: fichiers en argument, "
+                             "sinon ordre du répertoire du morceau courant).")
+    parser.add_argument("--prefetch", type=int, default=DEFAULT_DEPTH, metavar="N",
+                        help=f"Précharger les paroles des N morceaux suivants (défaut: {DEFAULT_DEPTH}, 0 pour désactiver).")
+    parser.add_argument("--warm-browser", action="store_true",
+                        help="Démarrer Chrome dès le lancement (Nautiljon) plutôt qu'à la première recherche.")
+    parser.add_argument("--overwrite", action="store_true", help="Rechercher même si <nom_mp3>.txt existe déjà.")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help=f"Délai global (en secondes) par piste (défaut: {DEFAULT_DEADLINE:g}).")
+    parser.add_argument("--no-cache", action="store_true", help="Ignorer le cache local des paroles.")
+    parser.add_argument("--refresh", action="store_true", help="Ignorer les entrées en cache et les remplacer.")
+    parser.add_argument("--providers",
+                        help="Sources à interroger, dans l'ordre, séparées par des virgules (défaut: $AUTOLYRICS_PROVIDERS ou ordre documenté).")
+    parser.add_argument("--parallel", type=int, default=None,
+                        help="Nombre maximal de sources interrogées simultanément (défaut: toutes).")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Ordonner les sources selon leurs taux de succès passés (par artiste si possible).")
+    args = parser.parse_args(argv)
+
+    if args.providers:
+        from . import providers
+        try:
+            providers.configure(order=args.providers)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.playlist:
+        # Relue à chaque changement de morceau : une playlist modifiée change la file préchargée.
+        queue_for = lambda current: read_playlist(args.playlist)  # noqa: E731
+    elif args.files:
+        files = [os.path.abspath(f) for f in args.files]
+        queue_for = lambda current: files  # noqa: E731
+    else:
+        queue_for = directory_queue
+
+    daemon = NowPlayingDaemon(
+        deadline=args.deadline, use_cache=not args.no_cache, refresh=args.refresh, overwrite=args.overwrite,
+        queue_for=queue_for, prefetch_depth=args.prefetch, max_parallel=args.parallel, adaptive=args.adaptive,
+    )
+    daemon.warm_up(browser=args.warm_browser)
+
+    if args.files:
+        source = MplayerSlave(
+            args.files, daemon.on_track, args.mplayer, shlex.split(args.mplayer_args), on_stop=daemon.on_stop
+        )
+        print("▶️ Lecture avec mplayer en mode esclave (commandes : pause, seek 10, pt_step 1, quit...)")
+    elif args.fifo:
+        source = MplayerFifo(args.fifo, daemon.on_track, on_stop=daemon.on_stop)
+        print(f"📡 En attente de mplayer : mplayer -input file={source.input_path} ... > {source.output_path}")
+    else:
+        source = LsofPoller(daemon.on_track, args.lsof_interval, on_stop=daemon.on_stop)
+        print(f"🔁 Repli : interrogation de lsof toutes les {args.lsof_interval:g}s")
+
+    try:
+        source.start()
+    except (OSError, RuntimeError, ValueError) as e:
+        print(f"❌ Impossible de suivre mplayer : {e}")
+        daemon.close()
+        return 1
+
+    if args.files:
+        threading.Thread(target=_forward_commands, args=(source,), name="commands", daemon=True).start()
+    try:
+        source.wait()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du démon.")
+    finally:
+        source.stop()
+        daemon.close()
+    return 0
@@ -0,0 +1,337 @@
+"""
+Affichage en temps réel des paroles synchronisées (.lrc) dans le terminal.
+
+La position de lecture vient de pygame (lecture par ce module) ou de mplayer
+en mode esclave (lancé par ce module, ou suivi via les FIFO du démon). La
+ligne active est trouvée par recherche dichotomique dans le tableau des
+horodatages, et la boucle dort jusqu'au prochain événement (ligne ou mot
+suivant, touche, changement de morceau) au lieu d'interroger en continu.
+
+Les horodatages mot à mot (Enhanced LRC, <mm:ss.xx>) sont mis en évidence
+au fil du chant s'ils sont présents.
+"""
+
+import argparse
+import curses
+import locale
+import os
+import select
+import sys
+import threading
+import time
+from typing import Optional
+
+from .cache import cache_dir
+from .lrc import Lyrics, read_lrc
+from .tags import default_lrc_path
+
+# Intervalle maximal entre deux resynchronisations sur la position réelle de mplayer (s).
+RESYNC_INTERVAL = 1.0
+# Délai avant de resynchroniser après une commande (pause, seek) envoyée à mplayer (s).
+COMMAND_SETTLE = 0.05
+SEEK_STEP = 5.0
+
+
+def load_timeline(lrc_path: str) -> Lyrics:
+    """Paroles d'un fichier LRC prêtes pour l'affichage : décalage [offset:] appliqué, horodatages triés."""
+    return read_lrc(lrc_path).apply_offset()
+
+
+class PygameClock:
+    """Lecture du MP3 par pygame ; la position est celle du mixer, corrigée des seeks."""
+
+    def __init__(self, mp3_path: str):
+        import pygame
+        self._music = pygame.mixer.music
+        try:
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
+        except pygame.error:
+            pygame.mixer.init()
+        self._music.load(mp3_path)
+        self._music.play()
+        self._start = 0.0
+        self.paused = False
+        self._pygame = pygame
+
+    def position(self) -> Optional[float]:
+        elapsed = self._music.get_pos()
+        if elapsed < 0:
+            return None
+        # get_pos() compte depuis le dernier play(), pauses exclues.
+        return self._start + elapsed / 1000
+
+    def finished(self) -> bool:
+        return not self.paused and not self._music.get_busy()
+
+    def max_sleep(self) -> float:
+        return RESYNC_INTERVAL
+
+    def toggle_pause(self) -> None:
+        if self.paused:
+            self._music.unpause()
+        else:
+            self._music.pause()
+        self.paused = not self.paused
+
+    def seek(self, delta: float) -> None:
+        target = max(0.0, (self.position() or 0.0) + delta)
+        self._music.play(start=target)
+        self._start = target
+        if self.paused:
+            self._music.pause()
+
+    def next_track(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        self._music.stop()
+        self._pygame.mixer.quit()
+
+
+class MplayerClock:
+    """
+    Position de mplayer (mode esclave ou FIFO), extrapolée entre deux requêtes.
+
+    mplayer est interrogé au plus une fois par RESYNC_INTERVAL (et juste après
+    chaque commande), ce qui suffit à suivre les seeks et pauses externes.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.paused = False
+        self._anchor = None  # (instant monotone, position en s)
+        self._next_sync = 0.0
+
+    def _sync(self) -> None:
+        before = time.monotonic()
+        position = self.source.time_pos()
+        after = time.monotonic()
+        if position is None:
+            self._anchor = None
+        else:
+            # La réponse correspond à peu près au milieu de l'aller-retour.
+            self._anchor = ((before + after) / 2, position)
+            self.paused = self.source.query("pause") == "yes"
+        self._next_sync = after + RESYNC_INTERVAL
+
+    def resync_soon(self, delay: float = COMMAND_SETTLE) -> None:
+        self._next_sync = min(self._next_sync, time.monotonic() + delay)
+
+    def position(self) -> Optional[float]:
+        if time.monotonic() >= self._next_sync:
+            self._sync()
+        if self._anchor is None:
+            return None
+        instant, position = self._anchor
+        return position if self.paused else position + time.monotonic() - instant
+
+    def finished(self) -> bool:
+        # mplayer lancé par ce module : terminé avec sa playlist. Via FIFO : on suit le mplayer suivant.
+        process = getattr(self.source, "process", None)
+        return process is not None and process.poll() is not None
+
+    def max_sleep(self) -> float:
+        return max(0.0, self._next_sync - time.monotonic())
+
+    def _command(self, command: str) -> None:
+        self.source.send(command)
+        self.resync_soon()
+
+    def toggle_pause(self) -> None:
+        self._command("pause")
+
+    def seek(self, delta: float) -> None:
+        self._command(f"seek {delta:+g} 0")
+
+    def next_track(self) -> None:
+        self._command("pt_step 1")
+
+    def stop(self) -> None:
+        self.source.stop()
+
+
+class CursesRenderer:
+    def __init__(self, screen):
+        self.screen = screen
+        curses.curs_set(0)
+        screen.nodelay(True)
+        self.sung = curses.A_BOLD
+        self.current = curses.A_BOLD
+        self.context = curses.A_DIM
+        if curses.has_colors():
+            curses.use_default_colors()
+            curses.init_pair(1, curses.COLOR_CYAN, -1)
+            self.sung = curses.color_pair(1) | curses.A_BOLD
+
+    def read_key(self):
+        key = self.screen.getch()
+        return None if key == -1 else key
+
+    def render(self, title: str, timeline: Optional[Lyrics], position: Optional[float], paused: bool) -> None:
+        screen = self.screen
+        screen.erase()
+        height, width = screen.getmaxyx()
+        clock = "--:--" if position is None else "%02d:%02d" % divmod(int(position), 60)
+        status = f" {'⏸' if paused else '▶'} {clock}  {title}"
+        screen.addnstr(0, 0, status, width - 1, curses.A_REVERSE)
+
+        if not timeline:
+            screen.addnstr(2, 0, "Pas de paroles synchronisées (.lrc) pour ce morceau.", width - 1)
+            screen.refresh()
+            return
+
+        position_ms = int((position or 0.0) * 1000)
+        index = timeline.index_at(position_ms)
+        middle = 1 + (height - 1) // 2
+        for row in range(1, height):
+            line_index = index + row - middle
+            if not 0 <= line_index < len(timeline):
+                continue
+            line = timeline.line(line_index)
+            if line_index != index:
+                screen.addnstr(row, 0, line.text, width - 1, self.context)
+            elif line.words:
+                screen.addnstr(row, 0, line.lead, width - 1, self.sung)
+                column = len(line.lead)
+                for word, start in zip(line.words, line.word_times):
+                    if column >= width - 1:
+                        break
+                    style = self.sung if start <= position_ms else self.current
+                    screen.addnstr(row, column, word, width - 1 - column, style)
+                    column += len(word)
+            else:
+                screen.addnstr(row, 0, line.text, width - 1, self.sung)
+        screen.refresh()
+
+
+class PlainRenderer:
+    """Repli hors terminal interactif : chaque ligne est imprimée quand elle devient active."""
+
+    def __init__(self):
+        self._last = None
+
+    def read_key(self):
+        return None
+
+    def render(self, title, timeline, position, paused) -> None:
+        if not timeline or position is None:
+            return
+        index = timeline.index_at(int(position * 1000))
+        if index >= 0 and (title, index) != self._last:
+            self._last = (title, index)
+            print(timeline.line(index).text, flush=True)
+
+
+class LyricsDisplay:
+    def __init__(self, clock, renderer):
+        self.clock = clock
+        self.renderer = renderer
+        self.title = ""
+        self.timeline = None
+        self._wake_r, self._wake_w = os.pipe()
+        self._lock = threading.Lock()
+
+    def load(self, mp3_path: str, lrc_path: Optional[str] = None) -> None:
+        """Charge les paroles d'un morceau ; appelable depuis un autre thread (changement de piste)."""
+        lrc_path = lrc_path or default_lrc_path(mp3_path)
+        timeline = load_timeline(lrc_path) if os.path.exists(lrc_path) else None
+        title = os.path.basename(mp3_path)
+        if timeline and timeline.tags.get("ti"):
+            title = f"{timeline.tags['ti']} - {timeline.tags.get('ar', '')}".rstrip(" -")
+        with self._lock:
+            self.timeline, self.title = timeline, title
+        if isinstance(self.clock, MplayerClock):
+            self.clock.resync_soon(0)
+        os.write(self._wake_w, b"x")
+
+    def _handle_key(self, key) -> bool:
+        if key in (ord("q"), 27):
+            return False
+        if key == ord(" "):
+            self.clock.toggle_pause()
+        elif key == curses.KEY_LEFT:
+            self.clock.seek(-SEEK_STEP)
+        elif key == curses.KEY_RIGHT:
+            self.clock.seek(SEEK_STEP)
+        elif key == ord("n"):
+            self.clock.next_track()
+        return True
+
+    def run(self) -> None:
+        watched = [self._wake_r]
+        if isinstance(self.renderer, CursesRenderer):
+            watched.append(sys.stdin)
+        while not self.clock.finished():
+            with self._lock:
+                timeline, title = self.timeline, self.title
+            position = self.clock.position()
+            self.renderer.render(title, timeline, position, self.clock.paused)
+
+            # Sommeil jusqu'au prochain mot ou ligne, borné par la resynchronisation et le compteur mm:ss.
+            timeout = self.clock.max_sleep()
+            if position is not None and not self.clock.paused:
+                timeout = min(timeout, 1.0 - position % 1.0)
+                next_event = timeline.next_event(int(position * 1000)) if timeline else None
+                if next_event is not None:
+                    timeout = min(timeout, max(0.0, next_event / 1000 - position))
+            ready, _, _ = select.select(watched, [], [], timeout)
+            if self._wake_r in ready:
+                os.read(self._wake_r, 64)
+            key = self.renderer.read_key()
+            while key is not None:
+                if not self._handle_key(key):
+                    return
+                key = self.renderer.read_key()
+
+
+def _run(screen, args) -> None:
+    renderer = CursesRenderer(screen) if screen is not None else PlainRenderer()
+    source = None
+    if args.player == "pygame":
+        clock = PygameClock(args.mp3_path)
+        display = LyricsDisplay(clock, renderer)
+        display.load(args.mp3_path, args.lrc)
+    else:
+        from .now_playing import MplayerFifo, MplayerSlave
+        display = LyricsDisplay(None, renderer)
+        on_track = lambda path: display.load(path)  # noqa: E731
+        if args.player == "fifo":
+            source = MplayerFifo(args.fifo_dir, on_track)
+        else:
+            source = MplayerSlave([args.mp3_path, *args.more], on_track, args.mplayer)
+        display.clock = clock = MplayerClock(source)
+        source.start()
+    try:
+        display.run()
+    finally:
+        if source is None or args.player == "mplayer":
+            clock.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py display",
+        description="🎤 Affiche en temps réel les paroles synchronisées (.lrc) du morceau en cours.",
+        epilog="Touches : espace = pause, ←/→ = ±5 s, n = morceau suivant (mplayer), q = quitter."
+    )
+    parser.add_argument("mp3_path", nargs="?", help="Fichier .mp3 à lire (inutile avec --player fifo).")
+    parser.add_argument("more", nargs="*", help="Morceaux suivants (--player mplayer).")
+    parser.add_argument("--lrc", help="Fichier .lrc (défaut: <nom_mp3>.lrc).")
+    parser.add_argument("--player", choices=["pygame", "mplayer", "fifo"], default="pygame",
+                        help="pygame : lecture par ce programme ; mplayer : mplayer en mode esclave ; "
+                             "fifo : suivre un mplayer relié par FIFO (voir la sous-commande daemon).")
+    parser.add_argument("--mplayer", default="mplayer", help="Exécutable mplayer (défaut: mplayer).")
+    parser.add_argument("--fifo-dir", default=cache_dir(), help=f"Répertoire des FIFO (défaut: {cache_dir()}).")
+    parser.add_argument("--plain", action="store_true", help="Affichage ligne par ligne, sans curses.")
+    args = parser.parse_args(argv)
+    if args.player != "fifo" and not args.mp3_path:
+        parser.error("fichier .mp3 requis")
+
+    try:
+        if args.plain or not sys.stdout.isatty():
+            _run(None, args)
+        else:
+            locale.setlocale(locale.LC_ALL, "")
+            curses.wrapper(_run, args)
+    except KeyboardInterrupt:
+        pass
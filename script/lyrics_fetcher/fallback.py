@@ -1,18 +1,256 @@
-from .animelyrics import find_lyrics_animelyrics
-from .nautiljon import find_lyrics_nautiljon
-from .genius import find_lyrics_genius
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, TimeoutError as FutureTimeoutError, wait
+from typing import NamedTuple, Optional, Tuple
 
-def get_romaji_lyrics(title: str, artist: str) -> str:
-    lyrics = find_lyrics_animelyrics(title, artist)
-    if lyrics:
-        return f"{title} - {artist}\n\n{lyrics}"
+from . import instrumentation, traffic
+from .providers import get_providers
+from .query import lyrics_agree
+from .romaji import is_romaji, to_romaji
+from .utils import (
+    DEFAULT_DEADLINE, LookupIncomplete, format_lyrics_text, get_source_url, get_transport_errors,
+    reset_transport_errors, set_cancel_event, set_current_provider, set_source_url,
+)
+
+class LyricsMatch(NamedTuple):
+    provider: str
+    lyrics: str
+    url: Optional[str] = None
+    # Sources dont les paroles concordent avec celles-ci (vérification croisée).
+    confirmed_by: Tuple[str, ...] = ()
+    # False : paroles en kana/kanji, rendues faute de mieux (jamais mises en cache).
+    romaji: bool = True
 
-    lyrics = find_lyrics_nautiljon(title, artist)
-    if lyrics:
-        return f"{title} - {artist}\n\n{lyrics}"
 
-    lyrics = find_lyrics_genius(title, artist)
+def _run_provider(future: Future, name: str, func, title: str, artist: str, cancel_event: threading.Event) -> None:
+    if not future.set_running_or_notify_cancel():
+        return
+    if cancel_event.is_set():
+        # Recherche abandonnée avant le démarrage de cette source.
+        future.outcome = (instrumentation.CANCELLED, 0.0)
+        future.set_result((None, None))
+        return
+    try:
+        # Source suspendue par son disjoncteur (voir traffic.py) : ni attente, ni requête.
+        traffic.check_provider(name)
+    except traffic.Unavailable as e:
+        instrumentation.record_outcome(name, instrumentation.SKIPPED)
+        future.outcome = (instrumentation.SKIPPED, 0.0)
+        future.set_exception(e)
+        return
+    set_cancel_event(cancel_event)
+    set_current_provider(name)
+    set_source_url(None)
+    reset_transport_errors()
+    start = time.perf_counter()
+    try:
+        with instrumentation.timed("total"):
+            lyrics = instrumentation.profiled(func, title, artist)
+        if not lyrics and get_transport_errors() and not cancel_event.is_set():
+            # Pages inaccessibles (erreurs réseau, 429/5xx) : "non trouvé" serait faux.
+            raise traffic.Unavailable(f"{get_transport_errors()} requête(s) en échec")
+    except BaseException as e:
+        instrumentation.record_outcome(name, instrumentation.ERROR)
+        future.outcome = (instrumentation.ERROR, time.perf_counter() - start)
+        if not cancel_event.is_set():
+            traffic.provider_failed(name)
+        future.set_exception(e)
+        return
+    if lyrics and not is_romaji(lyrics):
+        # Paroles en kana/kanji (J-Lyric, Mojim...) : converties sur place si possible,
+        # pour que ce résultat suffise sans attendre une source en romaji. Sinon, elles
+        # ne servent qu'en dernier recours (voir find_romaji_lyrics).
+        with instrumentation.timed("romaji"):
+            romanized = to_romaji(lyrics)
+        if romanized:
+            print(f"🔤 Paroles de {name} converties en romaji")
+            lyrics = romanized
+        else:
+            print(f"🈯 Paroles de {name} non converties en romaji, gardées en dernier recours")
     if lyrics:
-        return f"{title} - {artist}\n\n{lyrics}"
+        outcome = instrumentation.HIT
+    elif cancel_event.is_set():
+        outcome = instrumentation.CANCELLED
+    else:
+        outcome = instrumentation.MISS
+    if outcome != instrumentation.CANCELLED:
+        traffic.provider_succeeded(name)
+    instrumentation.record_outcome(name, outcome)
+    future.outcome = (outcome, time.perf_counter() - start)
+    future.set_result((lyrics, get_source_url()))
+
+
+class _Launcher:
+    """Démarre les sources dans l'ordre, en gardant au plus `max_parallel` sources actives."""
+
+    def __init__(self, jobs, max_parallel: int):
+        self._pending = list(jobs)
+        self._slots = max_parallel
+        self._lock = threading.Lock()
+        self._stopped = False
+
+    def start(self) -> None:
+        to_start = []
+        with self._lock:
+            while self._slots > 0 and self._pending and not self._stopped:
+                self._slots -= 1
+                to_start.append(self._pending.pop(0))
+        for future, args in to_start:
+            future.add_done_callback(self._on_done)
+            # Threads démons : une source lente ne bloque pas la fin du programme.
+            threading.Thread(target=_run_provider, args=(future,) + args, name=f"lyrics-{args[0]}", daemon=True).start()
+
+    def _on_done(self, _future) -> None:
+        with self._lock:
+            self._slots += 1
+        self.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+
+
+def _hits(futures):
+    """Résultats (nom, paroles, URL) des sources déjà terminées avec des paroles."""
+    hits = []
+    for name, future in futures:
+        if future.done() and not future.cancelled() and future.exception() is None:
+            lyrics, url = future.result()
+            if lyrics:
+                hits.append((name, lyrics, url))
+    return hits
+
+
+def _cross_check(match: LyricsMatch, others, end_time: float, wait_for_other: bool) -> LyricsMatch:
+    """
+    Compare les paroles retenues à celles des sources moins prioritaires déjà
+    terminées (sans requête supplémentaire), dans la même écriture (romaji ou
+    kana/kanji). Avec wait_for_other, attend au besoin qu'une autre source
+    comparable réponde, dans la limite du délai global.
+
+    Si les paroles retenues ne concordent avec aucune autre alors que deux autres
+    sources concordent entre elles, le résultat de ces dernières l'emporte.
+    """
+    def comparable_hits():
+        return [hit for hit in _hits(others) if lyrics_agree(match.lyrics, hit[1]) is not None]
+
+    hits = comparable_hits()
+    pending = [future for _, future in others if not future.done()]
+    while wait_for_other and not hits and pending:
+        done, pending = wait(pending, timeout=max(0.0, end_time - time.monotonic()), return_when=FIRST_COMPLETED)
+        if not done:
+            break
+        hits = comparable_hits()
+    if not hits:
+        return match
+
+    confirmed = tuple(name for name, lyrics, _ in hits if lyrics_agree(match.lyrics, lyrics))
+    if confirmed:
+        print(f"🔁 Paroles de {match.provider} confirmées par : {', '.join(confirmed)}")
+        return match._replace(confirmed_by=confirmed)
+    for i, (name, lyrics, url) in enumerate(hits):
+        if not is_romaji(lyrics):
+            continue
+        agreeing = tuple(other for other, other_lyrics, _ in hits[i + 1:] if lyrics_agree(lyrics, other_lyrics))
+        if agreeing:
+            print(f"⚠️ Paroles de {match.provider} contredites par {name} et {', '.join(agreeing)} : "
+                  f"résultat de {name} retenu.")
+            return LyricsMatch(name, lyrics, url, agreeing)
+    print(f"⚠️ Paroles de {match.provider} différentes de celles de : {', '.join(name for name, _, _ in hits)}")
+    return match
+
+
+def find_romaji_lyrics(title: str, artist: str, deadline: float = DEFAULT_DEADLINE,
+                       providers=None, max_parallel: Optional[int] = None,
+                       adaptive: bool = False, cross_check: bool = False,
+                       cancel_event: Optional[threading.Event] = None) -> Optional[LyricsMatch]:
+    """
+    Interroge les sources en parallèle et renvoie le résultat de la source la
+    plus prioritaire qui a trouvé des paroles.
+
+    Le résultat d'une source n'est retenu qu'une fois toutes les sources plus
+    prioritaires en échec, et seulement s'il est en romaji. Au délai global, les
+    sources encore en cours comptent comme en échec : le meilleur résultat déjà
+    reçu est renvoyé. Des paroles en kana/kanji (J-Lyric, Mojim...) ne sont
+    renvoyées qu'en dernier recours, quand aucune source n'a de paroles en romaji
+    (LyricsMatch.romaji=False). Dès que la réponse est décidée (ou le délai
+    dépassé), les sources encore en cours sont annulées.
+
+    providers : paires (nom, fonction) à interroger, par défaut celles du
+    registre (providers.get_providers). max_parallel limite le nombre de
+    sources actives simultanément (les suivantes ne démarrent qu'à l'échec
+    d'une précédente) ; adaptive=True ordonne les sources selon leurs
+    résultats passés (instrumentation.order_providers). cancel_event permet
+    à l'appelant d'abandonner la recherche depuis un autre thread.
+
+    Les paroles retenues sont comparées à celles des autres sources déjà
+    terminées (LyricsMatch.confirmed_by) ; cross_check=True attend au besoin
+    la réponse d'une seconde source pour cette vérification.
+
+    Renvoie None si toutes les sources ont répondu sans paroles ; lève
+    LookupIncomplete si l'échec est dû à des erreurs ou au délai global, sauf si
+    des paroles en kana/kanji peuvent servir de dernier recours.
+    """
+    providers = get_providers() if providers is None else providers
+    if adaptive:
+        providers = instrumentation.order_providers(providers, artist)
+    cancel_event = cancel_event or threading.Event()
+    futures = [(name, Future()) for name, _ in providers]
+    launcher = _Launcher(
+        [(future, (name, func, title, artist, cancel_event)) for (name, future), (_, func) in zip(futures, providers)],
+        max_parallel or len(providers),
+    )
+    launcher.start()
+
+    end_time = time.monotonic() + deadline
+    failures = []
+    fallback = None  # paroles en kana/kanji de la source la plus prioritaire, en dernier recours
+    try:
+        for index, (name, future) in enumerate(futures):
+            try:
+                lyrics, url = future.result(timeout=max(0.0, end_time - time.monotonic()))
+            except FutureTimeoutError:
+                print(f"⏱️ Délai global de {deadline:g}s dépassé (en attente de {name}).")
+                # Sources encore en cours considérées en échec : meilleur résultat déjà reçu.
+                late = _hits(futures[index + 1:])
+                for hit_name, lyrics, url in late:
+                    if is_romaji(lyrics):
+                        others = [(other, f) for other, f in futures[index + 1:] if other != hit_name]
+                        return _cross_check(LyricsMatch(hit_name, lyrics, url), others, end_time, False)
+                if fallback is None and late:
+                    fallback = LyricsMatch(*late[0], romaji=False)
+                if fallback is None:
+                    raise LookupIncomplete(f"délai de {deadline:g}s dépassé")
+                break
+            except Exception as e:
+                print(f"❌ Erreur {name} : {e}")
+                failures.append(name)
+                continue
+            if lyrics and is_romaji(lyrics):
+                return _cross_check(LyricsMatch(name, lyrics, url), futures[index + 1:], end_time, cross_check)
+            if lyrics:
+                fallback = fallback or LyricsMatch(name, lyrics, url, romaji=False)
+            elif cancel_event.is_set():
+                raise LookupIncomplete("recherche annulée")
+        if fallback:
+            print(f"⚠️ Aucune source en romaji : paroles de {fallback.provider} en kana/kanji, non mises en cache.")
+            return fallback
+        if failures:
+            raise LookupIncomplete(f"sources en erreur : {', '.join(failures)}")
+        return None
+    finally:
+        launcher.stop()
+        cancel_event.set()
+        for _, future in futures:
+            future.cancel()
+        instrumentation.persist_outcomes(
+            artist, {name: future.outcome for name, future in futures if hasattr(future, "outcome")}
+        )
+
 
-    return f"{title} - {artist}\n\n❌ Paroles non trouvées automatiquement.\nEssaye manuellement sur Google."
+def get_romaji_lyrics(title: str, artist: str, deadline: float = DEFAULT_DEADLINE) -> str:
+    try:
+        match = find_romaji_lyrics(title, artist, deadline=deadline)
+    except LookupIncomplete:
+        match = None
+    return format_lyrics_text(title, artist, match.lyrics if match else None)
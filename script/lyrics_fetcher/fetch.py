@@ -0,0 +1,229 @@
+"""
+Couche HTTP commune à tous les scrapers.
+
+Une seule session requests est partagée par le paquet : connexions gardées
+ouvertes (keep-alive) et mutualisées par hôte, compression gzip/brotli,
+nouvelles tentatives avec backoff, et revalidation des pages déjà téléchargées
+(ETag / Last-Modified) à partir du cache local.
+
+Le débit par hôte, les pauses après une réponse 429/5xx et les disjoncteurs
+sont gérés par traffic.py, commun à tous les threads et processus.
+
+Le corps des réponses est lu par morceaux, dans la limite d'une taille et
+d'une durée maximales ; fetch(stop=...) arrête la lecture (et ferme la
+connexion) dès que la suite de la page est inutile, typiquement une fois le
+conteneur des paroles refermé (voir parsing.lyrics_watcher). Une page ainsi
+arrêtée contient tout ce que son observateur attend : elle est mise en cache
+et revalidée comme une page complète. Une page tronquée par les limites ne
+l'est jamais.
+"""
+
+import threading
+import time
+from typing import NamedTuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from . import traffic
+from .cache import HttpCache
+from .instrumentation import timed
+from .utils import record_transport_error
+
+USER_AGENT = "Mozilla/5.0 (lyrics-scraper)"
+DEFAULT_TIMEOUT = 10
+
+# Nombre d'hôtes dont les connexions sont conservées, et connexions simultanées par hôte.
+POOL_CONNECTIONS = 16
+POOL_MAXSIZE = 4
+
+# Nouvelles tentatives sur erreur réseau (délai : backoff_factor * 2^n secondes) ou sur
+# réponse 429/5xx (après la pause décidée par traffic.record_failure).
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# Lecture du corps : taille des morceaux, taille maximale, durée maximale d'une requête (en secondes).
+CHUNK_SIZE = 16 * 1024
+MAX_BODY_BYTES = 5 * 1024 * 1024
+TIME_BUDGET = 20.0
+
+
+def _accept_encoding() -> str:
+    # urllib3 ne décode le brotli que si l'un de ces modules est installé.
+    for module in ("brotli", "brotlicffi"):
+        try:
+            __import__(module)
+            return "gzip, deflate, br"
+        except ImportError:
+            continue
+    return "gzip, deflate"
+
+
+class Page(NamedTuple):
+    url: str
+    status_code: int
+    content: bytes
+    from_cache: bool = False
+    # Corps coupé par la taille ou la durée maximale (pas par stop, dont l'arrêt est voulu).
+    truncated: bool = False
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+
+_config = {
+    "retries": RETRIES,
+    "backoff_factor": BACKOFF_FACTOR,
+    "pool_connections": POOL_CONNECTIONS,
+    "pool_maxsize": POOL_MAXSIZE,
+    "revalidate": True,
+    "max_body_bytes": MAX_BODY_BYTES,
+    "time_budget": TIME_BUDGET,
+}
+_lock = threading.Lock()
+_session = None
+_http_cache = None
+
+
+def configure(**options) -> None:
+    """Modifie la configuration (retries, backoff_factor, pool_connections, pool_maxsize, revalidate, max_body_bytes, time_budget)."""
+    global _session
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    with _lock:
+        _config.update(options)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def get_session() -> requests.Session:
+    global _session
+    with _lock:
+        if _session is None:
+            # Erreurs réseau seulement : les réponses 429/5xx sont retentées par fetch().
+            retry = Retry(
+                total=_config["retries"],
+                backoff_factor=_config["backoff_factor"],
+                status_forcelist=(),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(
+                pool_connections=_config["pool_connections"],
+                pool_maxsize=_config["pool_maxsize"],
+                pool_block=True,
+                max_retries=retry,
+            )
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Encoding": _accept_encoding()})
+            _session = session
+        return _session
+
+
+def _get_http_cache() -> HttpCache:
+    global _http_cache
+    with _lock:
+        if _http_cache is None:
+            _http_cache = HttpCache()
+        return _http_cache
+
+
+def _read_body(resp: requests.Response, stop, deadline: float):
+    """(corps, tronqué) : lecture par morceaux jusqu'à la fin, à la demande de stop (non tronqué), ou aux limites."""
+    chunks = []
+    size = 0
+    for chunk in resp.iter_content(CHUNK_SIZE):
+        chunks.append(chunk)
+        size += len(chunk)
+        if stop is not None and stop.feed_chunk(chunk):
+            truncated = False
+        elif size >= _config["max_body_bytes"]:
+            truncated = True
+            print(f"⚠️ Page tronquée, taille maximale ({_config['max_body_bytes'] // 1024} Ko) atteinte : {resp.url}")
+        elif time.monotonic() >= deadline:
+            truncated = True
+            print(f"⚠️ Page tronquée, durée maximale ({_config['time_budget']:g}s) dépassée : {resp.url}")
+        else:
+            continue
+        # Reste du corps abandonné : la connexion est fermée plutôt que rendue au pool.
+        resp.close()
+        return b"".join(chunks), truncated
+    return b"".join(chunks), False
+
+
+def fetch(url: str, params: Optional[dict] = None, timeout: float = DEFAULT_TIMEOUT, stop=None) -> Page:
+    """
+    Télécharge une page via la session partagée.
+
+    Si une version de la page est déjà connue, la requête est conditionnelle :
+    sur un 304, le contenu est relu depuis le cache local sans être retéléchargé.
+
+    Chaque tentative attend son tour auprès de traffic.acquire ; lève
+    traffic.Unavailable sans rien envoyer si le disjoncteur de l'hôte est ouvert.
+
+    stop : objet dont feed_chunk(morceau) reçoit le corps au fil de la lecture et
+    renvoie True quand la suite est inutile (voir parsing.lyrics_watcher) ; la page
+    lue jusque-là est mise en cache comme une page complète. Le corps est tronqué
+    (Page.truncated, jamais mis en cache) au-delà de max_body_bytes ou de
+    time_budget secondes.
+    """
+    session = get_session()
+    full_url = requests.Request("GET", url, params=params).prepare().url
+
+    headers = {}
+    cached = None
+    if _config["revalidate"]:
+        cached = _get_http_cache().get(full_url)
+        if cached is not None:
+            etag, last_modified, _ = cached
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+
+    host = urlsplit(full_url).hostname
+    for attempt in range(_config["retries"] + 1):
+        try:
+            traffic.acquire(host)
+            with timed("fetch"):
+                deadline = time.monotonic() + _config["time_budget"]
+                resp = session.get(full_url, headers=headers, timeout=timeout, stream=True)
+                if resp.status_code in RETRY_STATUSES:
+                    resp.close()
+                else:
+                    content, truncated = _read_body(resp, stop, deadline)
+        except traffic.Unavailable:
+            record_transport_error()
+            raise
+        except requests.RequestException:
+            traffic.record_failure(host)
+            record_transport_error()
+            raise
+        if resp.status_code not in RETRY_STATUSES:
+            traffic.record_success(host)
+            break
+        delay = traffic.record_failure(host, resp.headers.get("Retry-After"))
+        if attempt == _config["retries"]:
+            record_transport_error()
+        else:
+            print(f"⏳ {host} : réponse {resp.status_code}, nouvelle tentative dans {delay:.1f}s")
+
+    if resp.status_code == 304 and cached is not None:
+        _get_http_cache().touch(full_url)
+        return Page(full_url, 200, cached[2], from_cache=True)
+
+    etag = resp.headers.get("ETag")
+    last_modified = resp.headers.get("Last-Modified")
+    if resp.status_code in RETRY_STATUSES:
+        return Page(full_url, resp.status_code, b"")
+    if _config["revalidate"] and resp.status_code == 200 and (etag or last_modified) and not truncated:
+        _get_http_cache().put(full_url, etag, last_modified, content)
+    return Page(full_url, resp.status_code, content, truncated=truncated)
@@ -1,39 +1,49 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+import json
+from .fetch import fetch
+from .parsing import extract_lyrics, lyrics_watcher
+from .query import rank_urls
+from .search import planned_candidates, slugify
+from .utils import is_cancelled, set_source_url
+
+def resolve_genius_urls(title: str, artist: str):
+    """Pages romanisées trouvées via l'API de recherche de Genius (les plus proches d'abord), puis URL construite à partir des slugs."""
+    resp = fetch(
+        "https://genius.com/api/search/song",
+        params={"q": f"{artist} {title} romanized"},
+        timeout=5,
+    )
+    if resp.ok:
+        hits = [
+            hit.get("result", {}).get("url", "")
+            for section in json.loads(resp.content).get("response", {}).get("sections", [])
+            for hit in section.get("hits", [])
+        ]
+        yield from rank_urls([url for url in hits if "romanized" in url.lower()], title, artist)
+
+    artist_slug, title_slug = slugify(artist), slugify(title)
+    if artist_slug and title_slug:
+        yield f"https://genius.com/Genius-romanizations-{artist_slug}-{title_slug}-romanized-lyrics"
 
 def find_lyrics_genius(title: str, artist: str) -> str:
-    query = f'site:genius.com "romanized" "{artist}" "{title}"'
-    print(f"🔍 [Fallback] Recherche Genius : {query}")
-
-    for url in search(query, num_results=5):
-        if "genius.com" in url:
-            print(f"✅ URL trouvée (Genius): {url}")
-            lyrics = scrape_genius_lyrics(url)
-            if lyrics:
-                return lyrics
+    urls = planned_candidates(
+        "Genius", title, artist, ['site:genius.com "romanized" "{artist}" "{title}"'],
+        accept=lambda url: "genius.com" in url, resolve=resolve_genius_urls,
+    )
+    for url in urls:
+        if is_cancelled():
+            return None
+        print(f"✅ URL trouvée (Genius): {url}")
+        set_source_url(url)
+        lyrics = scrape_genius_lyrics(url)
+        if lyrics:
+            return lyrics
     return None
 
 def scrape_genius_lyrics(url: str) -> str:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (lyrics-scraper)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-
-        containers = soup.find_all("div", {"data-lyrics-container": "true"})
-        if not containers:
-            return None
-
-        lines = [div.get_text(separator="\n", strip=True) for div in containers]
-        full_lyrics = "\n".join(lines).strip()
-
-        if "to be transcribed" in full_lyrics.lower():
-            return None
-
-        return full_lyrics
+        resp = fetch(url, stop=lyrics_watcher("genius"))
+        return extract_lyrics("genius", resp.content)
 
     except Exception as e:
         print(f"❌ Erreur scraping Genius : {e}")
         return None
-
-
@@ -0,0 +1,162 @@
+"""
+Instrumentation de la chaîne de recherche.
+
+Temps passé par étape (recherche, téléchargement, parsing, Selenium) et par
+fournisseur, compteurs de succès / échecs / erreurs, état des limiteurs de
+débit et des disjoncteurs (traffic.py), et profil optionnel
+(JSON ou cProfile) pour l'option --profile. Les compteurs sont aussi
+enregistrés dans le cache local pour ordonner les sources selon leurs
+résultats passés (voir order_providers).
+"""
+
+import cProfile
+import json
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+from .utils import get_current_provider
+
+# Résultats d'une source pour une recherche.
+HIT = "hit"
+MISS = "miss"
+ERROR = "error"
+CANCELLED = "cancelled"
+# Source non interrogée : disjoncteur ouvert (voir traffic.py).
+SKIPPED = "skipped"
+
+# Nombre minimal de recherches pour un artiste avant de préférer ses statistiques aux statistiques globales.
+MIN_ARTIST_SAMPLES = 2
+
+_lock = threading.Lock()
+_timings = {}   # (fournisseur, étape) -> [nombre, total (s), max (s)]
+_outcomes = {}  # fournisseur -> {résultat: nombre}
+_profiles = []
+_profiling = False
+_provider_stats = None
+
+
+def reset() -> None:
+    global _profiles
+    with _lock:
+        _timings.clear()
+        _outcomes.clear()
+        _profiles = []
+
+
+@contextmanager
+def timed(stage: str, provider=None):
+    """Mesure la durée du bloc pour l'étape donnée (fournisseur courant du thread par défaut)."""
+    provider = provider or get_current_provider() or "-"
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        with _lock:
+            entry = _timings.setdefault((provider, stage), [0, 0.0, 0.0])
+            entry[0] += 1
+            entry[1] += elapsed
+            entry[2] = max(entry[2], elapsed)
+
+
+def record_outcome(provider: str, outcome: str) -> None:
+    with _lock:
+        counters = _outcomes.setdefault(provider, {})
+        counters[outcome] = counters.get(outcome, 0) + 1
+
+
+def snapshot() -> dict:
+    """État courant des mesures, sérialisable en JSON."""
+    with _lock:
+        providers = {}
+        for (provider, stage), (count, total, maximum) in sorted(_timings.items()):
+            stages = providers.setdefault(provider, {"stages": {}, "outcomes": {}})["stages"]
+            stages[stage] = {
+                "count": count,
+                "total_ms": round(total * 1000, 1),
+                "mean_ms": round(total * 1000 / count, 1),
+                "max_ms": round(maximum * 1000, 1),
+            }
+        for provider, counters in sorted(_outcomes.items()):
+            providers.setdefault(provider, {"stages": {}, "outcomes": {}})["outcomes"] = dict(counters)
+    from .traffic import snapshot as traffic_snapshot
+    return {"providers": providers, "traffic": traffic_snapshot()}
+
+
+def enable_profiling() -> None:
+    """Active cProfile dans chaque thread de fournisseur (voir profiled)."""
+    global _profiling
+    _profiling = True
+
+
+def profiled(func, *args):
+    """Exécute func(*args), sous cProfile si le profilage est activé."""
+    if not _profiling:
+        return func(*args)
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args)
+    finally:
+        with _lock:
+            _profiles.append(profile)
+
+
+def write_profile(path: str) -> None:
+    """Écrit les mesures : cProfile (fichier .prof, lisible avec pstats/snakeviz) ou JSON."""
+    if path.endswith(".prof"):
+        with _lock:
+            profiles = list(_profiles)
+        if not profiles:
+            print("⚠️ Aucun profil cProfile collecté.")
+            return
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(snapshot(), f, indent=2, ensure_ascii=False)
+    print(f"📈 Profil écrit dans : {path}")
+
+
+def _get_provider_stats():
+    global _provider_stats
+    with _lock:
+        if _provider_stats is None:
+            from .cache import ProviderStats
+            _provider_stats = ProviderStats()
+        return _provider_stats
+
+
+def persist_outcomes(artist: str, outcomes: dict) -> None:
+    """Ajoute les résultats d'une recherche ({fournisseur: (résultat, durée en s)}) aux statistiques persistantes."""
+    outcomes = {name: value for name, value in outcomes.items() if value[0] not in (CANCELLED, SKIPPED)}
+    if outcomes:
+        try:
+            _get_provider_stats().add(artist, outcomes)
+        except Exception as e:
+            print(f"⚠️ Statistiques des sources non enregistrées : {e}")
+
+
+def order_providers(providers, artist: str):
+    """
+    Trie les fournisseurs par taux de succès estimé (pour l'artiste s'il est
+    assez connu, sinon toutes recherches confondues). À taux égal, l'ordre de
+    priorité documenté est conservé.
+    """
+    try:
+        by_artist, overall = _get_provider_stats().load(artist)
+    except Exception as e:
+        print(f"⚠️ Statistiques des sources indisponibles : {e}")
+        return list(providers)
+
+    def hit_rate(name):
+        hits, attempts = by_artist.get(name, (0, 0))
+        if attempts < MIN_ARTIST_SAMPLES:
+            hits, attempts = overall.get(name, (0, 0))
+        # Estimateur de Laplace : une source jamais essayée vaut 0,5.
+        return (hits + 1) / (attempts + 2)
+
+    return sorted(providers, key=lambda provider: -hit_rate(provider[0]))
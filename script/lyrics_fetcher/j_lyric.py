@@ -1,28 +1,46 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+import re
+from urllib.parse import urljoin
+from bs4 import SoupStrainer
+from .fetch import fetch
+from .parsing import extract_lyrics, lyrics_watcher, make_soup
+from .query import rank_scored, text_score
+from .search import planned_candidates
+from .utils import is_cancelled, set_source_url
 
-def find_lyrics_j_lyric(title: str, artist: str) -> str:
-    query = f'site:j-lyric.net "{artist}" "{title}"'
-    print(f"🔍 Recherche J-Lyric : {query}")
+def resolve_j_lyric_urls(title: str, artist: str):
+    """Pages trouvées via le moteur de recherche de J-Lyric (titre et artiste), les titres les plus proches d'abord."""
+    resp = fetch(
+        "https://search.j-lyric.net/index.php",
+        params={"kt": title, "ct": 2, "ka": artist, "ca": 2, "kl": "", "cl": 2},
+        timeout=5,
+    )
+    soup = make_soup(resp.content, SoupStrainer("a", href=True))
+    scored = []
+    for link in soup.find_all("a", href=True):
+        url = urljoin("https://j-lyric.net/", link["href"])
+        if re.search(r"j-lyric\.net/artist/\w+/\w+\.html", url):
+            scored.append((text_score(link.get_text(), title), url))
+    yield from rank_scored(scored)
 
-    for url in search(query, num_results=5):
-        if "j-lyric.net" in url and "/artist/" in url:
-            print(f"✅ URL trouvée (J-Lyric): {url}")
-            return scrape_j_lyric(url)
+def find_lyrics_j_lyric(title: str, artist: str) -> str:
+    urls = planned_candidates(
+        "J-Lyric", title, artist, ['site:j-lyric.net "{artist}" "{title}"'],
+        accept=lambda url: "j-lyric.net" in url and "/artist/" in url, resolve=resolve_j_lyric_urls,
+    )
+    for url in urls:
+        if is_cancelled():
+            return None
+        print(f"✅ URL trouvée (J-Lyric): {url}")
+        set_source_url(url)
+        lyrics = scrape_j_lyric(url)
+        if lyrics:
+            return lyrics
     return None
 
 def scrape_j_lyric(url: str) -> str:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (lyrics-scraper)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-
-        lyric_div = soup.find("p", id="Lyric")
-        if not lyric_div:
-            return None
-
-        return lyric_div.get_text("\n", strip=True)
+        resp = fetch(url, stop=lyrics_watcher("j_lyric"))
+        return extract_lyrics("j_lyric", resp.content)
 
     except Exception as e:
         print(f"❌ Erreur scraping J-Lyric : {e}")
@@ -0,0 +1,313 @@
+"""
+Index persistant de la bibliothèque musicale (table `tracks` du cache SQLite).
+
+Pour chaque MP3 : taille et date de modification, tags (titre, artiste,
+album), durée, et présence des fichiers voisins <nom>.txt (paroles brutes) et
+<nom>.lrc (paroles synchronisées). Une nouvelle analyse ne relit les tags que
+des fichiers modifiés depuis la précédente ; la présence des .txt / .lrc est
+tirée du contenu des répertoires, sans accès supplémentaire au disque.
+
+Les outils (CLI, démon, préchargement, sync_lyrics.py) lisent les tags via
+l'index : un morceau inchangé n'est jamais réanalysé par mutagen.
+"""
+
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional
+
+from .cache import default_db_path
+from .tags import default_lrc_path, default_lyrics_txt_path
+
+AUDIO_EXTENSIONS = (".mp3",)
+# En dessous, les tags sont lus dans le processus courant (démarrer un pool coûte plus cher).
+POOL_THRESHOLD = 32
+
+
+class Track(NamedTuple):
+    path: str
+    size: int
+    mtime_ns: int
+    title: Optional[str]
+    artist: Optional[str]
+    album: Optional[str]
+    duration: Optional[float]
+    has_txt: bool
+    has_lrc: bool
+    error: Optional[str]
+
+
+class ScanStats(NamedTuple):
+    total: int
+    parsed: int
+    removed: int
+
+
+_COLUMNS = "path, size, mtime_ns, title, artist, album, duration, has_txt, has_lrc, error"
+
+
+def _track(row) -> Track:
+    path, size, mtime_ns, title, artist, album, duration, has_txt, has_lrc, error = row
+    return Track(path, size, mtime_ns, title, artist, album, duration, bool(has_txt), bool(has_lrc), error)
+
+
+def read_track_tags(mp3_path: str):
+    """(titre, artiste, album, durée, erreur) : une seule analyse du fichier par mutagen."""
+    from mutagen import MutagenError
+    from mutagen.easyid3 import EasyID3
+    from mutagen.mp3 import MP3
+
+    try:
+        try:
+            audio = MP3(mp3_path, ID3=EasyID3)
+            tags, duration = audio.tags or {}, audio.info.length
+        except MutagenError:
+            # Pas de trame MPEG exploitable : les tags restent lisibles, la durée est inconnue.
+            tags, duration = EasyID3(mp3_path), None
+    except Exception as e:
+        return None, None, None, None, str(e) or type(e).__name__
+    first = lambda key: (tags.get(key) or [None])[0]  # noqa: E731
+    return first("title"), first("artist"), first("album"), duration, None
+
+
+def _row(path, size, mtime_ns, has_txt, has_lrc):
+    """Ligne de la table `tracks` (colonnes _COLUMNS) ; les tags sont lus ici."""
+    title, artist, album, duration, error = read_track_tags(path)
+    return path, size, mtime_ns, title, artist, album, duration, int(has_txt), int(has_lrc), error
+
+
+def _parse_task(task):
+    # Exécutée dans un processus du pool : ne renvoie que des valeurs sérialisables.
+    return _row(*task)
+
+
+def _walk(root: str):
+    """(chemin, taille, mtime_ns, .txt présent, .lrc présent) de chaque MP3 sous `root`."""
+    try:
+        entries = list(os.scandir(root))
+    except OSError:
+        return
+    names = {entry.name for entry in entries}
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk(entry.path)
+            elif entry.name.lower().endswith(AUDIO_EXTENSIONS):
+                stat = entry.stat()
+                base = os.path.splitext(entry.name)[0]
+                yield entry.path, stat.st_size, stat.st_mtime_ns, f"{base}.txt" in names, f"{base}.lrc" in names
+        except OSError:
+            continue
+
+
+def _under(path: str, roots: List[str]) -> bool:
+    return any(path == root or path.startswith(root.rstrip(os.sep) + os.sep) for root in roots)
+
+
+class LibraryIndex:
+    """Index des MP3 par chemin absolu, mis à jour de façon incrémentale."""
+
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS tracks (
+                   path TEXT PRIMARY KEY,
+                   size INTEGER NOT NULL,
+                   mtime_ns INTEGER NOT NULL,
+                   title TEXT,
+                   artist TEXT,
+                   album TEXT,
+                   duration REAL,
+                   has_txt INTEGER NOT NULL,
+                   has_lrc INTEGER NOT NULL,
+                   error TEXT,
+                   scanned_at REAL NOT NULL
+               )"""
+        )
+        # Index partiels : les requêtes "sans paroles" / "sans synchro" ne parcourent que les lignes concernées.
+        self._conn.execute("CREATE INDEX IF NOT EXISTS tracks_without_txt ON tracks(path) WHERE has_txt = 0")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS tracks_without_lrc ON tracks(path) WHERE has_txt = 1 AND has_lrc = 0"
+        )
+        self._conn.commit()
+
+    def _store(self, rows) -> None:
+        now = time.time()
+        self._conn.executemany(
+            f"INSERT OR REPLACE INTO tracks ({_COLUMNS}, scanned_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(*row, now) for row in rows],
+        )
+
+    def get(self, mp3_path: str) -> Optional[Track]:
+        """Entrée telle qu'indexée, sans vérifier le fichier."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM tracks WHERE path = ?", (os.path.abspath(mp3_path),)
+            ).fetchone()
+        return _track(row) if row else None
+
+    def track(self, mp3_path: str) -> Track:
+        """Entrée à jour pour un fichier : les tags ne sont relus que si sa taille ou sa date ont changé."""
+        path = os.path.abspath(mp3_path)
+        stat = os.stat(path)
+        has_txt = os.path.exists(default_lyrics_txt_path(path))
+        has_lrc = os.path.exists(default_lrc_path(path))
+        known = self.get(path)
+        if known and (known.size, known.mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+            if (known.has_txt, known.has_lrc) != (has_txt, has_lrc):
+                self.update_sidecars(path)
+                known = known._replace(has_txt=has_txt, has_lrc=has_lrc)
+            return known
+        row = _row(path, stat.st_size, stat.st_mtime_ns, has_txt, has_lrc)
+        with self._lock:
+            self._store([row])
+            self._conn.commit()
+        return _track(row)
+
+    def update_sidecars(self, mp3_path: str) -> None:
+        """À appeler après l'écriture (ou la suppression) d'un .txt ou d'un .lrc."""
+        path = os.path.abspath(mp3_path)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE tracks SET has_txt = ?, has_lrc = ? WHERE path = ?",
+                (int(os.path.exists(default_lyrics_txt_path(path))), int(os.path.exists(default_lrc_path(path))),
+                 path),
+            )
+            self._conn.commit()
+
+    def scan(self, paths: Iterable[str], workers: Optional[int] = None, prune: bool = True) -> ScanStats:
+        """
+        Met l'index à jour pour les fichiers / répertoires `paths`. Seuls les MP3 nouveaux ou modifiés
+        sont analysés (dans un pool de processus) ; avec prune, les MP3 disparus sont retirés.
+        """
+        roots = [os.path.abspath(p) for p in paths]
+        found = {}
+        for root in roots:
+            if os.path.isdir(root):
+                for path, size, mtime_ns, has_txt, has_lrc in _walk(root):
+                    found[path] = (size, mtime_ns, has_txt, has_lrc)
+            elif root.lower().endswith(AUDIO_EXTENSIONS) and os.path.exists(root):
+                stat = os.stat(root)
+                found[root] = (stat.st_size, stat.st_mtime_ns, os.path.exists(default_lyrics_txt_path(root)),
+                               os.path.exists(default_lrc_path(root)))
+
+        with self._lock:
+            known = {
+                row[0]: row[1:]
+                for row in self._conn.execute("SELECT path, size, mtime_ns, has_txt, has_lrc FROM tracks")
+                if _under(row[0], roots)
+            }
+        to_parse, sidecars = [], []
+        for path, (size, mtime_ns, has_txt, has_lrc) in found.items():
+            previous = known.get(path)
+            if previous is None or previous[:2] != (size, mtime_ns):
+                to_parse.append((path, size, mtime_ns, has_txt, has_lrc))
+            elif tuple(map(bool, previous[2:])) != (has_txt, has_lrc):
+                sidecars.append((int(has_txt), int(has_lrc), path))
+        removed = [(path,) for path in known if path not in found] if prune else []
+
+        if len(to_parse) > POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parsed = list(pool.map(_parse_task, to_parse, chunksize=32))
+        else:
+            parsed = [_parse_task(task) for task in to_parse]
+
+        with self._lock:
+            self._store(parsed)
+            self._conn.executemany("UPDATE tracks SET has_txt = ?, has_lrc = ? WHERE path = ?", sidecars)
+            self._conn.executemany("DELETE FROM tracks WHERE path = ?", removed)
+            self._conn.commit()
+        return ScanStats(len(found), len(parsed), len(removed))
+
+    def _query(self, condition: str, roots=None) -> List[Track]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM tracks WHERE {condition} ORDER BY path"
+            ).fetchall()
+        tracks = [_track(row) for row in rows]
+        if roots:
+            roots = [os.path.abspath(root) for root in roots]
+            tracks = [track for track in tracks if _under(track.path, roots)]
+        return tracks
+
+    def without_lyrics(self, roots=None) -> List[Track]:
+        """Morceaux sans <nom>.txt."""
+        return self._query("has_txt = 0", roots)
+
+    def with_lyrics(self, roots=None) -> List[Track]:
+        """Morceaux avec paroles brutes (.txt), synchronisés ou non."""
+        return self._query("has_txt = 1", roots)
+
+    def without_sync(self, roots=None) -> List[Track]:
+        """Morceaux avec paroles brutes (.txt) mais sans .lrc."""
+        return self._query("has_txt = 1 AND has_lrc = 0", roots)
+
+    def counts(self):
+        """(morceaux, avec paroles, synchronisés, tags illisibles)."""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(has_txt), 0), COALESCE(SUM(has_lrc), 0), COUNT(error) FROM tracks"
+            ).fetchone()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_default_index = None
+_default_lock = threading.Lock()
+
+
+def get_library() -> LibraryIndex:
+    """Index partagé par tout le processus (ouvert à la première utilisation)."""
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = LibraryIndex()
+        return _default_index
+
+
+def read_tags(mp3_path: str):
+    """(titre, artiste) d'un MP3, via l'index ; lève ValueError si les tags sont illisibles."""
+    track = get_library().track(mp3_path)
+    if track.error:
+        raise ValueError(track.error)
+    return track.title, track.artist
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py library",
+        description="🗂️ Index de la bibliothèque : tags, durée, paroles (.txt) et synchronisation (.lrc) de chaque MP3."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    scan = commands.add_parser("scan", help="Indexer des répertoires (seuls les fichiers modifiés sont relus).")
+    scan.add_argument("paths", nargs="+")
+    scan.add_argument("-j", "--jobs", type=int, default=None, help="Processus de lecture des tags (défaut: nombre de CPU).")
+    for name, help_text in (("missing-lyrics", "Morceaux sans paroles (.txt)."),
+                            ("missing-sync", "Morceaux avec paroles mais sans .lrc.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("paths", nargs="*", help="Limiter à ces répertoires (défaut: toute la bibliothèque).")
+    commands.add_parser("stats", help="Résumé de l'index.")
+    args = parser.parse_args(argv)
+
+    index = get_library()
+    if args.command == "scan":
+        start = time.perf_counter()
+        stats = index.scan(args.paths, workers=args.jobs)
+        print(f"✅ {stats.total} morceau(x) indexé(s) en {time.perf_counter() - start:.2f}s : "
+              f"{stats.parsed} analysé(s), {stats.removed} retiré(s).")
+    elif args.command == "stats":
+        total, with_txt, with_lrc, errors = index.counts()
+        print(f"🎵 {total} morceaux, {with_txt} avec paroles, {with_lrc} synchronisés, {errors} aux tags illisibles.")
+    else:
+        tracks = index.without_lyrics(args.paths) if args.command == "missing-lyrics" else index.without_sync(args.paths)
+        # Un chemin par ligne : utilisable avec xargs.
+        for track in tracks:
+            print(track.path)
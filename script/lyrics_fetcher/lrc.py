@@ -0,0 +1,404 @@
+"""
+Format LRC / Enhanced LRC : lecture, écriture et transformations.
+
+Les horodatages sont des millisecondes entières, rangées dans des tableaux
+compacts (array) : pas d'arrondi flottant, et une bibliothèque entière de
+fichiers .lrc se traite rapidement. Sont gérés :
+- les tags d'en-tête ([ti:], [ar:], [al:], [by:], [offset:], ...) ;
+- plusieurs horodatages par ligne ([00:12.00][01:10.50]refrain) ;
+- le décalage [offset:] (positif = paroles affichées plus tôt) ;
+- les horodatages mot à mot Enhanced LRC (<mm:ss.xx>mot), y compris le texte
+  placé avant le premier mot et l'horodatage final (fin du dernier mot).
+
+Les lignes qui ne sont ni horodatées ni des tags (commentaires, texte libre)
+sont ignorées à la lecture, mais recopiées telles quelles par transform_file.
+
+iter_lrc / LrcWriter lisent et écrivent en flux, ligne par ligne ; Lyrics
+garde un fichier complet en mémoire pour l'affichage ou les fusions.
+"""
+
+import argparse
+import bisect
+import io
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+# [mm:ss], [mm:ss.x], [mm:ss.xx], [mm:ss.xxx] (et la variante [mm:ss:xx] de certains logiciels).
+_TIME_RE = r"(\d+):(\d{1,2})(?:[.:](\d{1,3}))?"
+_LINE_STAMP_RE = re.compile(r"\[" + _TIME_RE + r"\]")
+_WORD_STAMP_RE = re.compile(r"<" + _TIME_RE + r">")
+_TAG_RE = re.compile(r"^\[([A-Za-z#]+):(.*)\]$")
+
+
+def parse_timestamp(minutes: str, seconds: str, fraction: Optional[str] = None) -> int:
+    """Horodatage LRC → millisecondes (calcul entier, sans arrondi flottant)."""
+    ms = int(fraction.ljust(3, "0")) if fraction else 0
+    return (int(minutes) * 60 + int(seconds)) * 1000 + ms
+
+
+def format_timestamp(ms: int) -> str:
+    """Millisecondes → mm:ss.xx, arrondi au centième le plus proche."""
+    centiseconds = (max(0, ms) + 5) // 10
+    minutes, centiseconds = divmod(centiseconds, 6000)
+    seconds, hundredths = divmod(centiseconds, 100)
+    return f"{minutes:02d}:{seconds:02d}.{hundredths:02d}"
+
+
+def seconds_to_ms(seconds: float) -> int:
+    return round(seconds * 1000)
+
+
+class LrcTag(NamedTuple):
+    key: str
+    value: str
+
+
+class LrcLine(NamedTuple):
+    times: Sequence[int]
+    text: str
+    # Enhanced LRC : mots (espaces compris) et début de chaque mot, vides sinon. Un
+    # horodatage suivi d'aucun texte (fin du dernier mot) est gardé avec un mot vide.
+    words: Sequence[str] = ()
+    word_times: Sequence[int] = ()
+    # Texte placé avant le premier horodatage de mot.
+    lead: str = ""
+
+
+def _split_words(body: str):
+    parts = _WORD_STAMP_RE.split(body)
+    if len(parts) == 1:
+        return body.strip(), (), (), ""
+    words, word_times = [], array("q")
+    # parts = [texte avant, min, s, fraction, mot, min, s, fraction, mot, ...]
+    for i in range(1, len(parts), 4):
+        words.append(parts[i + 3])
+        word_times.append(parse_timestamp(parts[i], parts[i + 1], parts[i + 2]))
+    return (parts[0] + "".join(words)).strip(), words, word_times, parts[0]
+
+
+def iter_lrc(lines: Iterable[str], keep_other: bool = False) -> Iterator[Union[LrcTag, LrcLine, str]]:
+    """
+    Analyse en flux : un LrcTag ou un LrcLine par ligne utile, dans l'ordre du fichier.
+    keep_other=True renvoie aussi les autres lignes (vides comprises), telles quelles, sous forme de str.
+    """
+    for original in lines:
+        raw = original.strip().lstrip("\ufeff")
+        if not raw:
+            if keep_other:
+                yield original.rstrip("\r\n")
+            continue
+        times = array("q")
+        position = 0
+        while True:
+            match = _LINE_STAMP_RE.match(raw, position)
+            if not match:
+                break
+            times.append(parse_timestamp(*match.groups()))
+            position = match.end()
+        if times:
+            text, words, word_times, lead = _split_words(raw[position:])
+            yield LrcLine(times, text, words, word_times, lead)
+            continue
+        match = _TAG_RE.match(raw)
+        if match:
+            yield LrcTag(match.group(1).lower(), match.group(2).strip())
+        elif keep_other:
+            yield original.rstrip("\r\n")
+
+
+def format_line(line: LrcLine) -> str:
+    stamps = "".join(f"[{format_timestamp(t)}]" for t in line.times)
+    if line.words:
+        words = "".join(f"<{format_timestamp(t)}>{word}" for t, word in zip(line.word_times, line.words))
+        return stamps + line.lead + words
+    return stamps + line.text
+
+
+class LrcWriter:
+    """Écriture en flux : tags puis lignes, au fil de l'eau."""
+
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write_tag(self, key: str, value) -> None:
+        self.stream.write(f"[{key}:{value}]\n")
+
+    def write_line(self, line: LrcLine) -> None:
+        self.stream.write(format_line(line) + "\n")
+
+    def write(self, item: Union[LrcTag, LrcLine, str]) -> None:
+        if isinstance(item, LrcTag):
+            self.write_tag(item.key, item.value)
+        elif isinstance(item, str):
+            self.stream.write(item + "\n")  # ligne recopiée telle quelle (voir iter_lrc(keep_other=True))
+        else:
+            self.write_line(item)
+
+
+def _shifted(times, ms):
+    return array("q", (max(0, t + ms) for t in times))
+
+
+def _scaled(times, factor, pivot):
+    return array("q", (max(0, pivot + round((t - pivot) * factor)) for t in times))
+
+
+class Lyrics:
+    """
+    Fichier LRC en mémoire, sous forme de tableaux compacts.
+
+    Chaque texte n'est stocké qu'une fois ; `times[i]` est le début (ms) du
+    i-ème horodatage et `text_ids[i]` l'indice de son texte. Les mots Enhanced
+    LRC du texte k sont words[word_bounds[k]:word_bounds[k + 1]], précédés de leads[k].
+    """
+
+    def __init__(self, tags: Optional[Dict[str, str]] = None):
+        self.tags: Dict[str, str] = dict(tags or {})
+        self.times = array("q")
+        self.text_ids = array("l")
+        self.texts: List[str] = []
+        self.leads: List[str] = []
+        self.words: List[str] = []
+        self.word_times = array("q")
+        self.word_bounds = array("l", [0])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    @property
+    def offset(self) -> int:
+        try:
+            return int(self.tags.get("offset", "0"))
+        except ValueError:
+            return 0
+
+    def add(self, line: LrcLine) -> None:
+        text_id = len(self.texts)
+        self.texts.append(line.text)
+        self.leads.append(line.lead)
+        self.words.extend(line.words)
+        self.word_times.extend(line.word_times)
+        self.word_bounds.append(len(self.words))
+        self.times.extend(line.times)
+        self.text_ids.extend([text_id] * len(line.times))
+
+    def add_line(self, ms: int, text: str, words: Sequence[str] = (), word_times: Sequence[int] = ()) -> None:
+        self.add(LrcLine((ms,), text, words, word_times))
+
+    def line(self, index: int) -> LrcLine:
+        """index-ième ligne horodatée (un seul horodatage)."""
+        text_id = self.text_ids[index]
+        start, end = self.word_bounds[text_id], self.word_bounds[text_id + 1]
+        return LrcLine(
+            (self.times[index],), self.texts[text_id], self.words[start:end], self.word_times[start:end],
+            self.leads[text_id],
+        )
+
+    def word_times_of(self, index: int) -> array:
+        text_id = self.text_ids[index]
+        return self.word_times[self.word_bounds[text_id]:self.word_bounds[text_id + 1]]
+
+    def items(self) -> Iterator[Union[LrcTag, LrcLine]]:
+        """Tags puis lignes, chaque texte avec tous ses horodatages (ordre du premier horodatage)."""
+        for key, value in self.tags.items():
+            yield LrcTag(key, value)
+        grouped: Dict[int, array] = {}
+        for ms, text_id in zip(self.times, self.text_ids):
+            grouped.setdefault(text_id, array("q")).append(ms)
+        for text_id, times in sorted(grouped.items(), key=lambda item: min(item[1])):
+            start, end = self.word_bounds[text_id], self.word_bounds[text_id + 1]
+            yield LrcLine(
+                times, self.texts[text_id], self.words[start:end], self.word_times[start:end], self.leads[text_id]
+            )
+
+    # Transformations (en place, renvoient self pour les enchaîner)
+
+    def sort(self) -> "Lyrics":
+        order = sorted(range(len(self.times)), key=self.times.__getitem__)
+        self.times = array("q", (self.times[i] for i in order))
+        self.text_ids = array("l", (self.text_ids[i] for i in order))
+        return self
+
+    def shift(self, ms: int) -> "Lyrics":
+        self.times, self.word_times = _shifted(self.times, ms), _shifted(self.word_times, ms)
+        return self
+
+    def scale(self, factor: float, pivot: int = 0) -> "Lyrics":
+        """Étire les horodatages autour de `pivot` (ex. factor=1.02 pour un enregistrement 2 % plus lent)."""
+        self.times, self.word_times = _scaled(self.times, factor, pivot), _scaled(self.word_times, factor, pivot)
+        return self
+
+    def apply_offset(self) -> "Lyrics":
+        """Intègre le tag [offset:] aux horodatages et le supprime."""
+        offset = self.offset
+        self.tags.pop("offset", None)
+        return self.shift(-offset) if offset else self
+
+    def merge(self, other: "Lyrics") -> "Lyrics":
+        """Ajoute les lignes de `other` (ex. traduction), tags existants prioritaires ; le résultat est trié."""
+        self.apply_offset()
+        other = other.copy().apply_offset()
+        for key, value in other.tags.items():
+            self.tags.setdefault(key, value)
+        for item in other.items():
+            if isinstance(item, LrcLine):
+                self.add(item)
+        return self.sort()
+
+    def copy(self) -> "Lyrics":
+        duplicate = Lyrics(self.tags)
+        duplicate.times, duplicate.text_ids = array("q", self.times), array("l", self.text_ids)
+        duplicate.texts, duplicate.leads, duplicate.words = list(self.texts), list(self.leads), list(self.words)
+        duplicate.word_times, duplicate.word_bounds = array("q", self.word_times), array("l", self.word_bounds)
+        return duplicate
+
+    # Recherche (horodatages triés)
+
+    def index_at(self, ms: int) -> int:
+        """Indice de la ligne active à cette position, -1 avant la première ligne."""
+        return bisect.bisect_right(self.times, ms) - 1
+
+    def next_event(self, ms: int) -> Optional[int]:
+        """Prochain changement (ms) : mot suivant de la ligne active ou ligne suivante."""
+        index = self.index_at(ms)
+        candidates = []
+        if index + 1 < len(self.times):
+            candidates.append(self.times[index + 1])
+        if index >= 0:
+            word_times = self.word_times_of(index)
+            word_index = bisect.bisect_right(word_times, ms)
+            if word_index < len(word_times):
+                candidates.append(word_times[word_index])
+        return min(candidates) if candidates else None
+
+
+def parse(lines: Iterable[str]) -> Lyrics:
+    """Fichier complet, horodatages triés (lignes à plusieurs horodatages ou dans le désordre comprises)."""
+    lyrics = Lyrics()
+    for item in iter_lrc(lines):
+        if isinstance(item, LrcTag):
+            lyrics.tags[item.key] = item.value
+        else:
+            lyrics.add(item)
+    return lyrics.sort()
+
+
+def read_lrc(path: str) -> Lyrics:
+    with open(path, encoding="utf-8-sig") as f:
+        return parse(f)
+
+
+def loads(text: str) -> Lyrics:
+    return parse(io.StringIO(text))
+
+
+def write_lrc(path_or_stream, lyrics: Lyrics) -> None:
+    if isinstance(path_or_stream, str):
+        with open(path_or_stream, "w", encoding="utf-8") as f:
+            write_lrc(f, lyrics)
+        return
+    writer = LrcWriter(path_or_stream)
+    for item in lyrics.items():
+        writer.write(item)
+
+
+def dumps(lyrics: Lyrics) -> str:
+    stream = io.StringIO()
+    write_lrc(stream, lyrics)
+    return stream.getvalue()
+
+
+def transform_file(path: str, shift: int = 0, factor: float = 1.0, pivot: int = 0, output: Optional[str] = None) -> int:
+    """
+    Décale / étire un fichier LRC en flux (ligne par ligne, sans le charger
+    entièrement) ; réécrit le fichier sur place sauf si `output` est donné.
+    Les lignes qui ne sont ni horodatées ni des tags sont recopiées telles quelles.
+    Renvoie le nombre de lignes horodatées traitées.
+    """
+    output = output or path
+    temporary = output + ".tmp"
+    count = 0
+    with open(path, encoding="utf-8-sig") as source, open(temporary, "w", encoding="utf-8") as target:
+        writer = LrcWriter(target)
+        for item in iter_lrc(source, keep_other=True):
+            if isinstance(item, LrcLine):
+                times, word_times = item.times, item.word_times
+                if factor != 1.0:
+                    times, word_times = _scaled(times, factor, pivot), _scaled(word_times, factor, pivot)
+                if shift:
+                    times, word_times = _shifted(times, shift), _shifted(word_times, shift)
+                item = item._replace(times=times, word_times=word_times)
+                count += 1
+            writer.write(item)
+    os.replace(temporary, output)
+    return count
+
+
+def iter_lrc_files(paths) -> List[str]:
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in files if name.lower().endswith(".lrc"))
+        else:
+            found.append(path)
+    return sorted(found)
+
+
+def _transform_task(task):
+    path, shift, factor, pivot = task
+    try:
+        return path, transform_file(path, shift, factor, pivot), None
+    except (OSError, UnicodeDecodeError) as e:
+        return path, 0, str(e)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py lrc",
+        description="🕒 Opérations sur des fichiers .lrc (fichiers ou répertoires entiers)."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    shift = commands.add_parser("shift", help="Décaler tous les horodatages (les fichiers sont réécrits).")
+    shift.add_argument("ms", type=int, help="Décalage en millisecondes (négatif = plus tôt).")
+    shift.add_argument("paths", nargs="+")
+
+    scale = commands.add_parser("scale", help="Étirer les horodatages (les fichiers sont réécrits).")
+    scale.add_argument("factor", type=float, help="Facteur (ex. 1.02).")
+    scale.add_argument("--pivot", type=int, default=0, help="Instant fixe en millisecondes (défaut: 0).")
+    scale.add_argument("paths", nargs="+")
+
+    for command in (shift, scale):
+        command.add_argument("-j", "--jobs", type=int, default=None, help="Processus (défaut: nombre de CPU).")
+
+    merge = commands.add_parser("merge", help="Fusionner plusieurs .lrc (ex. romaji + traduction).")
+    merge.add_argument("inputs", nargs="+")
+    merge.add_argument("-o", "--output", required=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        lyrics = read_lrc(args.inputs[0])
+        for path in args.inputs[1:]:
+            lyrics.merge(read_lrc(path))
+        write_lrc(args.output, lyrics)
+        print(f"✅ {len(lyrics)} lignes écrites dans : {args.output}")
+        return
+
+    paths = iter_lrc_files(args.paths)
+    if args.command == "shift":
+        tasks = [(path, args.ms, 1.0, 0) for path in paths]
+    else:
+        tasks = [(path, 0, args.factor, args.pivot) for path in paths]
+    lines = errors = 0
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        for path, count, error in pool.map(_transform_task, tasks, chunksize=16):
+            if error:
+                errors += 1
+                print(f"❌ {path} : {error}")
+            lines += count
+    print(f"✅ {len(paths) - errors} fichier(s), {lines} lignes horodatées traitées.")
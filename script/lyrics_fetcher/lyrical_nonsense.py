@@ -1,30 +1,33 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+from .fetch import fetch
+from .parsing import extract_lyrics, lyrics_watcher
+from .search import planned_candidates, slugify
+from .utils import is_cancelled, set_source_url
 
-def find_lyrics_lyrical_nonsense(title: str, artist: str) -> str:
-    query = f'site:lyrical-nonsense.com "romaji lyrics" "{artist}" "{title}"'
-    print(f"🔍 Recherche Lyrical Nonsense : {query}")
+def resolve_lyrical_nonsense_urls(title: str, artist: str):
+    """URL construite à partir des slugs de l'artiste et du titre."""
+    artist_slug, title_slug = slugify(artist), slugify(title)
+    if artist_slug and title_slug:
+        yield f"https://www.lyrical-nonsense.com/global/lyrics/{artist_slug}/{title_slug}/"
 
-    for url in search(query, num_results=5):
-        if "lyrical-nonsense.com" in url:
-            print(f"✅ URL trouvée (Lyrical Nonsense): {url}")
-            return scrape_lyrical_nonsense(url)
+def find_lyrics_lyrical_nonsense(title: str, artist: str) -> str:
+    urls = planned_candidates(
+        "Lyrical Nonsense", title, artist, ['site:lyrical-nonsense.com "romaji lyrics" "{artist}" "{title}"'],
+        accept=lambda url: "lyrical-nonsense.com" in url, resolve=resolve_lyrical_nonsense_urls,
+    )
+    for url in urls:
+        if is_cancelled():
+            return None
+        print(f"✅ URL trouvée (Lyrical Nonsense): {url}")
+        set_source_url(url)
+        lyrics = scrape_lyrical_nonsense(url)
+        if lyrics:
+            return lyrics
     return None
 
 def scrape_lyrical_nonsense(url: str) -> str:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (lyrics-scraper)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-
-        romaji_section = soup.find("div", class_="romaji")
-        if not romaji_section:
-            return None
-
-        paragraphs = romaji_section.find_all("p")
-        lines = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
-        return "\n".join(lines).strip()
+        resp = fetch(url, stop=lyrics_watcher("lyrical_nonsense"))
+        return extract_lyrics("lyrical_nonsense", resp.content)
 
     except Exception as e:
         print(f"❌ Erreur scraping Lyrical Nonsense : {e}")
@@ -1,31 +1,45 @@
-import requests
-from bs4 import BeautifulSoup
-from googlesearch import search
+import re
+from urllib.parse import quote, urljoin
+from bs4 import SoupStrainer
+from .fetch import fetch
+from .parsing import extract_lyrics, lyrics_watcher, make_soup
+from .query import rank_scored, text_score
+from .search import planned_candidates
+from .utils import is_cancelled, set_source_url
 
-def find_lyrics_mojim(title: str, artist: str) -> str:
-    query = f'site:mojim.com "{artist}" "{title}"'
-    print(f"🔍 Recherche Mojim : {query}")
+def resolve_mojim_urls(title: str, artist: str):
+    """Pages de la section japonaise trouvées via la recherche par titre de Mojim, les titres les plus proches d'abord."""
+    resp = fetch(f"https://mojim.com/{quote(title)}.html?t3", timeout=5)
+    soup = make_soup(resp.content, SoupStrainer("dd"))
+    scored = []
+    for row in soup.find_all("dd"):
+        if artist.casefold() not in row.get_text().casefold():
+            continue
+        for link in row.find_all("a", href=True):
+            if re.match(r"/jpy\w+\.htm", link["href"]):
+                scored.append((text_score(link.get_text(), title), urljoin("https://mojim.com/", link["href"])))
+    yield from rank_scored(scored)
 
-    for url in search(query, num_results=5):
-        if "mojim.com" in url and "jpy" in url:  # pour filtrer la section japonaise
-            print(f"✅ URL trouvée (Mojim): {url}")
-            return scrape_mojim(url)
+def find_lyrics_mojim(title: str, artist: str) -> str:
+    urls = planned_candidates(
+        "Mojim", title, artist, ['site:mojim.com "{artist}" "{title}"'],
+        accept=lambda url: "mojim.com" in url and "jpy" in url,  # pour filtrer la section japonaise
+        resolve=resolve_mojim_urls,
+    )
+    for url in urls:
+        if is_cancelled():
+            return None
+        print(f"✅ URL trouvée (Mojim): {url}")
+        set_source_url(url)
+        lyrics = scrape_mojim(url)
+        if lyrics:
+            return lyrics
     return None
 
 def scrape_mojim(url: str) -> str:
     try:
-        headers = {"User-Agent": "Mozilla/5.0 (lyrics-scraper)"}
-        resp = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(resp.content, "html.parser")
-
-        lyric_block = soup.find("dd", id="fsZx3")
-        if not lyric_block:
-            return None
-
-        text = lyric_block.get_text("\n", strip=True)
-        if "更多更詳盡歌詞" in text:
-            text = text.split("更多更詳盡歌詞")[0]
-        return text.strip()
+        resp = fetch(url, stop=lyrics_watcher("mojim"))
+        return extract_lyrics("mojim", resp.content)
 
     except Exception as e:
         print(f"❌ Erreur scraping Mojim : {e}")
@@ -0,0 +1,281 @@
+"""
+Suivi du morceau en cours de lecture dans mplayer.
+
+Trois sources, de la plus directe à la plus rudimentaire :
+- MplayerSlave : mplayer est lancé par le démon en mode esclave (-slave),
+  sa sortie est lue en continu ;
+- MplayerFifo : mplayer, lancé par l'utilisateur, lit ses commandes dans une
+  FIFO (-input file=...) et écrit sa sortie dans une autre ;
+- LsofPoller : interrogation périodique de `lsof -c mplayer` (méthode de
+  docs/03, sans aucune intégration à mplayer).
+
+Chaque source appelle `on_track(chemin)` dès qu'un nouveau morceau commence,
+et `on_stop()` (facultatif) quand mplayer s'arrête.
+Les deux premières permettent aussi d'interroger mplayer (position, pause...).
+"""
+
+import errno
+import os
+import re
+import shutil
+import stat
+import subprocess
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+# Ligne écrite par mplayer au début de chaque fichier : "Playing /chemin/du/fichier.mp3."
+PLAYING_RE = re.compile(r"^Playing (.+)\.$")
+# Réponse à une commande get_* / get_property : "ANS_time_pos=12.34"
+ANSWER_RE = re.compile(r"^ANS_([A-Za-z_]+)=(.*)$")
+
+FIFO_INPUT_NAME = "mplayer.in"
+FIFO_OUTPUT_NAME = "mplayer.out"
+
+ANSWER_TIMEOUT = 0.5
+LSOF_INTERVAL = 2.0
+
+
+def _mplayer_cwds():
+    """Répertoires courants des processus mplayer visibles (Linux, via /proc)."""
+    cwds = []
+    try:
+        pids = [name for name in os.listdir("/proc") if name.isdigit()]
+    except OSError:
+        return cwds
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/comm", encoding="utf-8") as f:
+                if f.read().strip() != "mplayer":
+                    continue
+            cwds.append(os.readlink(f"/proc/{pid}/cwd"))
+        except OSError:
+            continue
+    return cwds
+
+
+class _MplayerSource(ABC):
+    """Analyse de la sortie de mplayer : changements de morceau et réponses aux commandes."""
+
+    def __init__(self, on_track, cwd: Optional[str] = None, on_stop=None):
+        self.on_track = on_track
+        self.on_stop = on_stop
+        self.cwd = cwd
+        self.current = None
+        self._answers = {}
+        self._answer_cond = threading.Condition()
+
+    def _resolve(self, path: str) -> str:
+        if os.path.isabs(path):
+            return path
+        # mplayer affiche le chemin tel qu'il l'a reçu, relatif à son propre répertoire courant.
+        for cwd in ([self.cwd] if self.cwd else _mplayer_cwds()):
+            candidate = os.path.join(cwd, path)
+            if os.path.exists(candidate):
+                return os.path.abspath(candidate)
+        return os.path.abspath(path)
+
+    def _feed(self, raw: bytes) -> None:
+        line = os.fsdecode(raw).rstrip("\r\n")
+        match = PLAYING_RE.match(line)
+        if match:
+            self.current = self._resolve(match.group(1))
+            self.on_track(self.current)
+            return
+        match = ANSWER_RE.match(line)
+        if match:
+            with self._answer_cond:
+                self._answers[match.group(1)] = match.group(2)
+                self._answer_cond.notify_all()
+
+    def _stopped_playing(self) -> None:
+        """Fin de la sortie de mplayer : plus de morceau en cours."""
+        self.current = None
+        if self.on_stop:
+            self.on_stop()
+
+    @abstractmethod
+    def send(self, command: str) -> bool:
+        """Envoie une commande esclave à mplayer ; False si mplayer ne l'écoute pas."""
+
+    def query(self, prop: str, timeout: float = ANSWER_TIMEOUT) -> Optional[str]:
+        """Valeur d'une propriété de mplayer (time_pos, pause, path...), sans changer l'état de pause."""
+        with self._answer_cond:
+            self._answers.pop(prop, None)
+        if not self.send(f"pausing_keep_force get_property {prop}"):
+            return None
+        deadline = time.monotonic() + timeout
+        with self._answer_cond:
+            while prop not in self._answers:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._answer_cond.wait(remaining)
+            return self._answers.pop(prop)
+
+    def time_pos(self) -> Optional[float]:
+        """Position de lecture en secondes, ou None si mplayer ne répond pas."""
+        value = self.query("time_pos")
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+
+class MplayerSlave(_MplayerSource):
+    """mplayer lancé par le démon en mode esclave : commandes sur stdin, événements sur stdout."""
+
+    def __init__(self, files, on_track, mplayer: str = "mplayer", extra_args=(), on_stop=None):
+        super().__init__(on_track, cwd=os.getcwd(), on_stop=on_stop)
+        self.command = [mplayer, "-slave", "-quiet", *extra_args, *(os.path.abspath(f) for f in files)]
+        self.process = None
+        self._send_lock = threading.Lock()
+
+    def start(self) -> None:
+        self.process = subprocess.Popen(
+            self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL
+        )
+        threading.Thread(target=self._read, name="mplayer-slave", daemon=True).start()
+
+    def _read(self) -> None:
+        for raw in self.process.stdout:
+            self._feed(raw)
+        self._stopped_playing()
+
+    def send(self, command: str) -> bool:
+        if self.process is None or self.process.poll() is not None:
+            return False
+        with self._send_lock:
+            try:
+                self.process.stdin.write(os.fsencode(command + "\n"))
+                self.process.stdin.flush()
+                return True
+            except (BrokenPipeError, ValueError):
+                return False
+
+    def wait(self) -> int:
+        return self.process.wait()
+
+    def stop(self) -> None:
+        if self.process is None or self.process.poll() is not None:
+            return
+        self.send("quit")
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.terminate()
+
+
+class MplayerFifo(_MplayerSource):
+    """
+    mplayer lancé par l'utilisateur, relié au démon par deux FIFO :
+
+        mplayer -input file=<dir>/mplayer.in fichiers... > <dir>/mplayer.out
+
+    Le démon survit aux redémarrages de mplayer : il attend simplement le suivant.
+    """
+
+    def __init__(self, fifo_dir: str, on_track, on_stop=None):
+        super().__init__(on_track, on_stop=on_stop)
+        self.input_path = os.path.join(fifo_dir, FIFO_INPUT_NAME)
+        self.output_path = os.path.join(fifo_dir, FIFO_OUTPUT_NAME)
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _ensure_fifo(path: str) -> None:
+        if os.path.exists(path):
+            if not stat.S_ISFIFO(os.stat(path).st_mode):
+                raise ValueError(f"{path} existe et n'est pas une FIFO")
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.mkfifo(path, 0o600)
+
+    def start(self) -> None:
+        self._ensure_fifo(self.input_path)
+        self._ensure_fifo(self.output_path)
+        self._thread = threading.Thread(target=self._read, name="mplayer-fifo", daemon=True)
+        self._thread.start()
+
+    def _read(self) -> None:
+        while not self._stopped.is_set():
+            # L'ouverture bloque jusqu'à ce qu'un mplayer écrive dans la FIFO ; fin de fichier = mplayer arrêté.
+            with open(self.output_path, "rb") as output:
+                for raw in output:
+                    self._feed(raw)
+            self._stopped_playing()
+
+    def send(self, command: str) -> bool:
+        try:
+            fd = os.open(self.input_path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError as e:
+            if e.errno in (errno.ENXIO, errno.ENOENT):
+                return False  # aucun mplayer n'écoute la FIFO
+            raise
+        try:
+            os.write(fd, os.fsencode(command + "\n"))
+            return True
+        except BlockingIOError:
+            return False
+        finally:
+            os.close(fd)
+
+    def wait(self) -> None:
+        while self._thread.is_alive():
+            self._thread.join(1.0)
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+
+class LsofPoller:
+    """Repli sans intégration : fichier .mp3 ouvert par mplayer d'après lsof, vérifié périodiquement."""
+
+    def __init__(self, on_track, interval: float = LSOF_INTERVAL, on_stop=None):
+        self.on_track = on_track
+        self.on_stop = on_stop
+        self.interval = interval
+        self.current = None
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def open_mp3() -> Optional[str]:
+        output = subprocess.run(["lsof", "-c", "mplayer", "-F", "n"], capture_output=True, check=False).stdout
+        for raw in output.splitlines():
+            name = os.fsdecode(raw[1:])
+            if raw.startswith(b"n") and name.lower().endswith(".mp3"):
+                return name
+        return None
+
+    def start(self) -> None:
+        if shutil.which("lsof") is None:
+            raise RuntimeError("lsof est introuvable")
+        self._thread = threading.Thread(target=self._poll, name="lsof-poller", daemon=True)
+        self._thread.start()
+
+    def _poll(self) -> None:
+        while not self._stopped.is_set():
+            path = self.open_mp3()
+            if path and path != self.current:
+                self.current = path
+                self.on_track(path)
+            elif path is None and self.current is not None:
+                self.current = None
+                if self.on_stop:
+                    self.on_stop()
+            self._stopped.wait(self.interval)
+
+    def send(self, command: str) -> bool:
+        return False
+
+    def time_pos(self) -> Optional[float]:
+        return None
+
+    def wait(self) -> None:
+        while self._thread.is_alive():
+            self._thread.join(1.0)
+
+    def stop(self) -> None:
+        self._stopped.set()
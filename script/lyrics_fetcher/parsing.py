@@ -0,0 +1,179 @@
+"""
+Extraction des paroles depuis les pages HTML des fournisseurs.
+
+Pour chaque site, on déclare une seule fois le conteneur des paroles (sous
+forme de SoupStrainer) et la manière d'en extraire le texte. Seul ce
+conteneur est construit en arbre, avec le parseur lxml s'il est installé :
+c'est nettement plus rapide et moins gourmand en mémoire que de construire
+l'arbre complet de la page (les pages Genius en particulier sont lourdes).
+
+Quand un élément englobe à coup sûr toutes les paroles, il est déclaré aussi
+(`end`) : lyrics_watcher() repère sa fermeture pendant le téléchargement, et
+fetch() arrête alors de lire la page (voir fetch.fetch, paramètre stop).
+"""
+
+import codecs
+from html.parser import HTMLParser
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from .instrumentation import timed
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+class Extractor(NamedTuple):
+    # Conteneur des paroles : seul ce sous-arbre est construit.
+    strainer: SoupStrainer
+    # Texte des paroles à partir de la soupe restreinte, ou None.
+    extract: Callable[[BeautifulSoup], Optional[str]]
+    # Élément (balise, attributs) dont la fermeture marque la fin des paroles, si on en connaît un.
+    end: Optional[Tuple[str, Dict[str, str]]] = None
+
+
+def make_soup(content, parse_only: Optional[SoupStrainer] = None, parser: Optional[str] = None) -> BeautifulSoup:
+    return BeautifulSoup(content, parser or PARSER, parse_only=parse_only)
+
+
+def _extract_animelyrics(soup: BeautifulSoup) -> Optional[str]:
+    blocks = soup.find_all("div", class_="romaji")
+    if len(blocks) == 0:
+        blocks = soup.find_all("td", class_="romaji")
+    if not blocks:
+        return None
+
+    lyrics = []
+    for block in blocks:
+        dt = block.find("dt")
+        if dt and "Lyrics from" in dt.text:
+            dt.decompose()
+        lyrics.append(block.get_text("\n", strip=True))
+    return "\n".join(lyrics).strip()
+
+
+def _extract_lyrical_nonsense(soup: BeautifulSoup) -> Optional[str]:
+    romaji_section = soup.find("div", class_="romaji")
+    if not romaji_section:
+        return None
+
+    paragraphs = romaji_section.find_all("p")
+    lines = [p.get_text(strip=True) for p in paragraphs if p.get_text(strip=True)]
+    return "\n".join(lines).strip()
+
+
+def _extract_genius(soup: BeautifulSoup) -> Optional[str]:
+    containers = soup.find_all("div", {"data-lyrics-container": "true"})
+    if not containers:
+        return None
+
+    lines = [div.get_text(separator="\n", strip=True) for div in containers]
+    full_lyrics = "\n".join(lines).strip()
+
+    if "to be transcribed" in full_lyrics.lower():
+        return None
+
+    return full_lyrics
+
+
+def _extract_j_lyric(soup: BeautifulSoup) -> Optional[str]:
+    lyric_div = soup.find("p", id="Lyric")
+    if not lyric_div:
+        return None
+
+    return lyric_div.get_text("\n", strip=True)
+
+
+def _extract_mojim(soup: BeautifulSoup) -> Optional[str]:
+    lyric_block = soup.find("dd", id="fsZx3")
+    if not lyric_block:
+        return None
+
+    text = lyric_block.get_text("\n", strip=True)
+    if "更多更詳盡歌詞" in text:
+        text = text.split("更多更詳盡歌詞")[0]
+    return text.strip()
+
+
+def _extract_nautiljon(soup: BeautifulSoup) -> Optional[str]:
+    lyrics_section = soup.find("span", {"itemprop": "lyrics"})
+    if not lyrics_section:
+        return None
+    return lyrics_section.get_text()
+
+
+EXTRACTORS: Dict[str, Extractor] = {
+    # Plusieurs blocs "romaji" sans conteneur commun identifiable : page lue en entier.
+    "animelyrics": Extractor(SoupStrainer(["div", "td"], class_="romaji"), _extract_animelyrics),
+    "lyrical_nonsense": Extractor(
+        SoupStrainer("div", class_="romaji"), _extract_lyrical_nonsense, ("div", {"class": "romaji"})
+    ),
+    # Les conteneurs data-lyrics-container sont tous dans div#lyrics-root.
+    "genius": Extractor(
+        SoupStrainer("div", attrs={"data-lyrics-container": "true"}), _extract_genius, ("div", {"id": "lyrics-root"})
+    ),
+    "j_lyric": Extractor(SoupStrainer("p", id="Lyric"), _extract_j_lyric, ("p", {"id": "Lyric"})),
+    "mojim": Extractor(SoupStrainer("dd", id="fsZx3"), _extract_mojim, ("dd", {"id": "fsZx3"})),
+    "nautiljon": Extractor(SoupStrainer("span", attrs={"itemprop": "lyrics"}), _extract_nautiljon),
+}
+
+
+class ContainerWatcher(HTMLParser):
+    """
+    Suit le HTML morceau par morceau (au fil du téléchargement) et signale la
+    fermeture du premier élément `tag` portant les attributs `attrs` (pour "class",
+    il suffit que la valeur figure parmi les classes de l'élément).
+    """
+
+    def __init__(self, tag: str, attrs: Dict[str, str]):
+        super().__init__(convert_charrefs=False)
+        self.tag = tag
+        self.attrs = attrs
+        self.depth = 0  # profondeur d'imbrication de `tag` à l'intérieur du conteneur
+        self.complete = False
+        # Les balises et attributs recherchés sont en ASCII : un décodage UTF-8 approximatif suffit.
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed_chunk(self, chunk: bytes) -> bool:
+        """Analyse un morceau du corps ; True une fois le conteneur refermé (la suite est inutile)."""
+        if not self.complete:
+            self.feed(self._decoder.decode(chunk))
+        return self.complete
+
+    def _matches(self, attrs) -> bool:
+        values = dict(attrs)
+        for name, expected in self.attrs.items():
+            value = values.get(name) or ""
+            if value != expected and not (name == "class" and expected in value.split()):
+                return False
+        return True
+
+    def handle_starttag(self, tag, attrs):
+        if tag != self.tag or self.complete:
+            return
+        if self.depth:
+            self.depth += 1
+        elif self._matches(attrs):
+            self.depth = 1
+
+    def handle_endtag(self, tag):
+        if tag == self.tag and self.depth:
+            self.depth -= 1
+            self.complete = not self.depth
+
+
+def lyrics_watcher(provider: str) -> Optional[ContainerWatcher]:
+    """Observateur de fin des paroles pour fetch(stop=...), ou None si la page doit être lue en entier."""
+    end = EXTRACTORS[provider].end
+    return ContainerWatcher(*end) if end else None
+
+
+def extract_lyrics(provider: str, content, parser: Optional[str] = None) -> Optional[str]:
+    """Paroles contenues dans la page (bytes ou str) d'un fournisseur, ou None."""
+    extractor = EXTRACTORS[provider]
+    with timed("parse", provider):
+        return extractor.extract(make_soup(content, extractor.strainer, parser))
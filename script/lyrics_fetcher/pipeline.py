@@ -0,0 +1,180 @@
+"""
+Chaîne complète d'un morceau, dans un seul processus :
+
+    metadata → lookup → normalize → sync → write
+
+Les données passent en mémoire d'une étape à l'autre dans un TrackJob ;
+l'écriture du .txt et du .lrc est facultative. lyrics_fetcher_cli.py et
+sync_lyrics.py n'en sont que des interfaces en ligne de commande, et le démon
+ou le traitement par lots appellent directement les étapes dont ils ont besoin
+(sans relancer d'interpréteur ni réimporter pygame et mutagen).
+
+Exemple :
+    pipeline = LyricsPipeline(sync_mode="auto")
+    job = pipeline.run("chanson.mp3")
+    job.synced  # objet Lyrics, aussi écrit dans chanson.lrc
+"""
+
+import os
+from typing import List, Optional
+
+from .cache import CachedLyrics, find_romaji_lyrics_cached
+from .library import Track, get_library
+from .lrc import Lyrics, write_lrc
+from .tags import default_lrc_path, default_lyrics_txt_path
+from .utils import DEFAULT_DEADLINE, format_lyrics_text
+
+LRC_CREATOR = "Autolyrics Syncer v0.1"
+# Valeurs utilisées (tags LRC, en-tête du .txt) quand les tags ID3 manquent.
+UNKNOWN_TITLE = "Unknown Title"
+UNKNOWN_ARTIST = "Unknown Artist"
+UNKNOWN_ALBUM = "Unknown Album"
+
+
+class PipelineError(Exception):
+    """Étape impossible (fichier absent, tags sans titre ni artiste, écriture refusée...)."""
+
+
+class TrackJob:
+    """État d'un morceau à travers les étapes : chaque étape complète les champs des suivantes."""
+
+    def __init__(self, mp3_path: str, txt_path: Optional[str] = None, lrc_path: Optional[str] = None):
+        self.mp3_path = mp3_path
+        self.txt_path = txt_path or default_lyrics_txt_path(mp3_path)
+        self.lrc_path = lrc_path or default_lrc_path(mp3_path)
+        # metadata
+        self.track: Optional[Track] = None
+        self.title: Optional[str] = None
+        self.artist: Optional[str] = None
+        self.album: Optional[str] = None
+        self.tag_error: Optional[str] = None
+        # lookup (ou load_text)
+        self.entry: Optional[CachedLyrics] = None
+        self.lyrics_text: Optional[str] = None  # texte brut, en-tête "Titre - Artiste" compris
+        # normalize
+        self.lines: List[str] = []
+        # sync
+        self.synced: Optional[Lyrics] = None
+        # write
+        self.txt_written = False
+        self.lrc_written = False
+
+    @property
+    def found(self) -> bool:
+        return self.entry is not None and self.entry.found
+
+
+class LyricsPipeline:
+    def __init__(self, sync_mode: Optional[str] = None, deadline: float = DEFAULT_DEADLINE, use_cache: bool = True,
+                 refresh: bool = False, cache=None, write_txt: bool = True, write_lrc: bool = True,
+                 latency_ms: Optional[int] = None, verbose: bool = True, **lookup_options):
+        """
+        sync_mode : "line", "word", "auto" (voir sync.py) ou None pour s'arrêter aux paroles brutes.
+        verbose=False tait les messages d'écriture (démon, traitement par lots).
+        Les options restantes (max_parallel, adaptive, cross_check...) sont transmises à la recherche.
+        """
+        self.sync_mode = sync_mode
+        self.deadline = deadline
+        self.use_cache = use_cache
+        self.refresh = refresh
+        self.cache = cache
+        self.write_txt = write_txt
+        self.write_lrc = write_lrc
+        self.latency_ms = latency_ms
+        self.verbose = verbose
+        self.lookup_options = lookup_options
+
+    def metadata(self, job: TrackJob) -> TrackJob:
+        """Tags du MP3 via l'index de la bibliothèque ; des tags illisibles sont signalés dans job.tag_error."""
+        try:
+            job.track = get_library().track(job.mp3_path)
+        except FileNotFoundError:
+            raise PipelineError(f"Fichier MP3 non trouvé : {job.mp3_path}")
+        except OSError as e:
+            raise PipelineError(f"Fichier MP3 illisible : {e}")
+        job.title, job.artist, job.album = job.track.title, job.track.artist, job.track.album
+        job.tag_error = job.track.error
+        return job
+
+    def lookup(self, job: TrackJob) -> TrackJob:
+        """Recherche des paroles (cache puis sources). Lève LookupIncomplete si elle n'a pas pu conclure."""
+        if not job.title or not job.artist:
+            raise PipelineError("Impossible d'extraire le titre ou l'artiste depuis le fichier mp3.")
+        job.entry = find_romaji_lyrics_cached(
+            job.title, job.artist, self.deadline, use_cache=self.use_cache, refresh=self.refresh, cache=self.cache,
+            **self.lookup_options
+        )
+        job.lyrics_text = format_lyrics_text(job.title, job.artist, job.entry.lyrics)
+        return job
+
+    def load_text(self, job: TrackJob) -> TrackJob:
+        """À la place de lookup : paroles brutes lues dans job.txt_path."""
+        try:
+            with open(job.txt_path, encoding="utf-8") as f:
+                job.lyrics_text = f.read()
+        except FileNotFoundError:
+            raise PipelineError(f"Fichier de paroles non trouvé : {job.txt_path}")
+        return job
+
+    def normalize(self, job: TrackJob) -> TrackJob:
+        """Lignes à synchroniser : toutes les lignes non vides du texte, en-tête compris (comme sync_lyrics.py)."""
+        job.lines = [line.strip() for line in (job.lyrics_text or "").splitlines() if line.strip()]
+        return job
+
+    def sync(self, job: TrackJob, mode: Optional[str] = None) -> TrackJob:
+        mode = mode or self.sync_mode
+        if mode is None:
+            return job
+        from .sync import synchronize
+        job.synced = synchronize(mode, job.mp3_path, job.lines, self.latency_ms)
+        return job
+
+    def write(self, job: TrackJob) -> TrackJob:
+        """Écrit ce qui est prêt et pas encore écrit : paroles trouvées (.txt), paroles synchronisées (.lrc)."""
+        written = False
+        if self.write_txt and job.found and not job.txt_written:
+            try:
+                with open(job.txt_path, "w", encoding="utf-8") as f:
+                    f.write(job.lyrics_text)
+            except OSError as e:
+                raise PipelineError(f"Erreur lors de la sauvegarde des paroles brutes : {e}")
+            job.txt_written = written = True
+            if self.verbose:
+                print(f"✅ Paroles brutes sauvegardées dans : {job.txt_path}")
+        if self.write_lrc and job.synced is not None and not job.lrc_written:
+            if not job.synced:
+                print("Aucune parole synchronisée à sauvegarder.")
+            else:
+                # Tags d'identification (placés avant les lignes horodatées)
+                tags = {"ti": job.title or UNKNOWN_TITLE, "ar": job.artist or UNKNOWN_ARTIST,
+                        "al": job.album or UNKNOWN_ALBUM, "by": LRC_CREATOR}
+                tags.update(job.synced.tags)
+                job.synced.tags = tags
+                try:
+                    write_lrc(job.lrc_path, job.synced)
+                except OSError as e:
+                    raise PipelineError(f"Erreur lors de la sauvegarde du fichier LRC : {e}")
+                job.lrc_written = written = True
+                if self.verbose:
+                    print(f"Fichier LRC sauvegardé : {job.lrc_path}")
+        if written and os.path.exists(job.mp3_path):
+            get_library().update_sidecars(job.mp3_path)
+        return job
+
+    def run(self, mp3_path: str, txt_path: Optional[str] = None, lrc_path: Optional[str] = None,
+            lookup: bool = True) -> TrackJob:
+        """
+        Toutes les étapes pour un morceau. lookup=False synchronise les paroles déjà présentes
+        dans txt_path au lieu de les rechercher. S'arrête après lookup si rien n'est trouvé.
+        """
+        job = self.metadata(TrackJob(mp3_path, txt_path, lrc_path))
+        if lookup:
+            self.lookup(job)
+            if not job.found:
+                return job
+            self.write(job)  # les paroles brutes sont gardées même si la synchronisation est abandonnée
+        else:
+            self.load_text(job)
+        self.normalize(job)
+        self.sync(job)
+        return self.write(job)
@@ -0,0 +1,203 @@
+"""
+Préchargement des paroles des prochains morceaux de la file de lecture.
+
+La file vient d'une playlist mplayer (ou M3U), de l'ordre d'un répertoire ou
+d'une liste explicite. Les N morceaux qui suivent le morceau courant sont
+recherchés en arrière-plan et rangés dans le cache local : au début d'un
+morceau, la recherche est presque toujours servie par le cache.
+
+Le préchargement reste discret : un seul morceau à la fois, une source à la
+fois (max_parallel=1), en pause pendant les recherches au premier plan, et
+abandon de la recherche en cours dès que le morceau sort de la file.
+"""
+
+import argparse
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+from urllib.parse import unquote
+
+from .cache import LyricsCache, find_romaji_lyrics_cached
+from .library import read_tags
+from .tags import default_lyrics_txt_path
+from .utils import DEFAULT_DEADLINE, LookupIncomplete
+
+# Nombre de morceaux à précharger après le morceau courant.
+DEFAULT_DEPTH = 3
+# Valeur "nice" appliquée au thread de préchargement (Linux).
+PREFETCH_NICENESS = 10
+
+AUDIO_EXTENSIONS = (".mp3",)
+
+
+def read_playlist(path: str) -> List[str]:
+    """Playlist mplayer (-playlist) ou M3U : un chemin par ligne, relatif au répertoire de la playlist."""
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, encoding="utf-8", errors="surrogateescape") as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("file://"):
+                line = unquote(line[len("file://"):])
+            elif "://" in line:
+                continue  # flux réseau : pas de tags à lire
+            entries.append(os.path.normpath(os.path.join(base, line)))
+    return entries
+
+
+def directory_queue(mp3_path: str) -> List[str]:
+    """Morceaux du répertoire de `mp3_path`, dans l'ordre du shell (`mplayer *.mp3`)."""
+    directory = os.path.dirname(os.path.abspath(mp3_path))
+    try:
+        names = sorted(os.listdir(directory))
+    except OSError:
+        return []
+    return [os.path.join(directory, name) for name in names if name.lower().endswith(AUDIO_EXTENSIONS)]
+
+
+def upcoming(queue: List[str], current: Optional[str], depth: int = DEFAULT_DEPTH) -> List[str]:
+    """Les `depth` morceaux qui suivent `current` dans la file (le début de la file si current est absent)."""
+    queue = [os.path.abspath(path) for path in queue]
+    start = 0
+    if current is not None:
+        current = os.path.abspath(current)
+        if current in queue:
+            start = queue.index(current) + 1
+    return [path for path in queue[start:start + depth] if path != current]
+
+
+def _lower_thread_priority() -> None:
+    # Sous Linux, chaque thread a sa propre valeur nice : le parsing du préchargement cède le CPU.
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), PREFETCH_NICENESS)
+    except (AttributeError, OSError):
+        pass
+
+
+class PrefetchScheduler:
+    """
+    Précharge dans le cache les paroles des prochains morceaux de la file.
+
+    update(file, morceau_courant) remplace la liste des morceaux à précharger ;
+    la recherche en cours est annulée si son morceau n'en fait plus partie.
+    """
+
+    def __init__(self, depth: int = DEFAULT_DEPTH, deadline: float = DEFAULT_DEADLINE, cache=None,
+                 **lookup_options):
+        self.depth = depth
+        self.deadline = deadline
+        self.cache = cache or LyricsCache()
+        if lookup_options.get("max_parallel") is None:
+            lookup_options["max_parallel"] = 1
+        self.lookup_options = lookup_options
+        self._cond = threading.Condition()
+        self._pending = []
+        self._running = None
+        self._cancel = threading.Event()
+        self._foreground = 0
+        self._stopped = False
+        self._thread = threading.Thread(target=self._work, name="prefetch", daemon=True)
+        self._thread.start()
+
+    def update(self, queue: List[str], current: Optional[str]) -> None:
+        targets = upcoming(queue, current, self.depth)
+        with self._cond:
+            if self._running is not None and self._running not in targets:
+                self._cancel.set()
+            self._pending = [path for path in targets if path != self._running]
+            self._cond.notify_all()
+
+    @contextmanager
+    def foreground(self):
+        """Suspend le démarrage de nouveaux préchargements pendant une recherche au premier plan."""
+        with self._cond:
+            self._foreground += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._foreground -= 1
+                self._cond.notify_all()
+
+    def join(self) -> None:
+        """Attend que tous les morceaux demandés soient préchargés."""
+        with self._cond:
+            while (self._pending or self._running) and not self._stopped:
+                self._cond.wait()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._pending = []
+            self._cancel.set()
+            self._cond.notify_all()
+
+    def _work(self) -> None:
+        _lower_thread_priority()
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._pending or self._foreground):
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                path = self._running = self._pending.pop(0)
+                cancel = self._cancel = threading.Event()
+            try:
+                self._prefetch(path, cancel)
+            except Exception as e:
+                print(f"⚠️ Préchargement impossible pour {path} : {e}")
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+
+    def _prefetch(self, mp3_path: str, cancel: threading.Event) -> None:
+        if os.path.exists(default_lyrics_txt_path(mp3_path)):
+            return
+        title, artist = read_tags(mp3_path)
+        if not title or not artist or self.cache.get(title, artist) is not None:
+            return
+        try:
+            entry = find_romaji_lyrics_cached(
+                title, artist, self.deadline, cache=self.cache, cancel_event=cancel, **self.lookup_options
+            )
+        except LookupIncomplete as e:
+            print(f"⏭️ Préchargement interrompu pour {title} - {artist} : {e}")
+            return
+        print(f"📥 Préchargé : {title} - {artist} ({entry.provider if entry.found else 'non trouvé'})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="lyrics_fetcher_cli.py prefetch",
+        description="📥 Précharge dans le cache local les paroles des prochains morceaux d'une file de lecture."
+    )
+    parser.add_argument("files", nargs="*", help="File de lecture explicite (fichiers .mp3, dans l'ordre).")
+    parser.add_argument("--playlist", help="Playlist mplayer (-playlist) ou M3U.")
+    parser.add_argument("--after", metavar="MP3",
+                        help="Morceau en cours : seuls les morceaux suivants sont préchargés. Sans file explicite "
+                             "ni playlist, la file est le répertoire de ce morceau.")
+    parser.add_argument("-n", "--depth", type=int, default=DEFAULT_DEPTH,
+                        help=f"Nombre de morceaux à précharger (défaut: {DEFAULT_DEPTH}).")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help=f"Délai global (en secondes) par morceau (défaut: {DEFAULT_DEADLINE:g}).")
+    args = parser.parse_args(argv)
+
+    if args.files:
+        queue = args.files
+    elif args.playlist:
+        queue = read_playlist(args.playlist)
+    elif args.after:
+        queue = directory_queue(args.after)
+    else:
+        parser.error("indiquer une file : fichiers, --playlist ou --after")
+
+    scheduler = PrefetchScheduler(depth=args.depth, deadline=args.deadline)
+    scheduler.update(queue, args.after)
+    try:
+        scheduler.join()
+    except KeyboardInterrupt:
+        scheduler.stop()
@@ -0,0 +1,123 @@
+"""
+Registre des sources de paroles.
+
+Chaque source déclare son nom, sa priorité, les langues qu'elle couvre et son
+point d'entrée ("module:fonction"). Le module d'une source n'est importé
+qu'au moment où elle est réellement interrogée : importer le paquet (ou
+fallback) ne charge ni requests, ni BeautifulSoup, ni Selenium, et Selenium
+n'est chargé que si la recherche atteint Nautiljon.
+
+L'ordre par défaut (priorité croissante) peut être remplacé par
+configure(order=...) ou par la variable d'environnement AUTOLYRICS_PROVIDERS
+(noms séparés par des virgules ; les sources absentes de la liste sont ignorées).
+"""
+
+import importlib
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+LyricsFinder = Callable[[str, str], Optional[str]]
+
+
+class Provider(NamedTuple):
+    name: str
+    # Plus la valeur est petite, plus la source est prioritaire.
+    priority: int
+    # Langues (codes ISO 639-1) des morceaux couverts par la source.
+    languages: Tuple[str, ...]
+    # "module:fonction", relatif au paquet lyrics_fetcher si le module commence par un point.
+    entry_point: str
+
+    def load(self) -> LyricsFinder:
+        module_name, _, attribute = self.entry_point.partition(":")
+        module = importlib.import_module(module_name, package=__package__)
+        return getattr(module, attribute)
+
+
+class LazyFinder:
+    """Fonction de recherche d'une source, importée au premier appel seulement."""
+
+    def __init__(self, provider: Provider):
+        self.provider = provider
+        self._func = None
+        self._lock = threading.Lock()
+
+    def load(self) -> LyricsFinder:
+        if self._func is None:
+            with self._lock:
+                if self._func is None:
+                    self._func = self.provider.load()
+        return self._func
+
+    def __call__(self, title: str, artist: str) -> Optional[str]:
+        return self.load()(title, artist)
+
+    def __repr__(self) -> str:
+        return f"<LazyFinder {self.provider.entry_point}>"
+
+
+REGISTRY: Dict[str, Provider] = {}
+_finders: Dict[str, LazyFinder] = {}
+
+_config = {
+    "order": None,      # liste de noms remplaçant l'ordre par priorité
+    "language": None,   # ne garder que les sources couvrant cette langue
+}
+
+
+def register(provider: Provider) -> None:
+    """Ajoute (ou remplace) une source dans le registre."""
+    REGISTRY[provider.name] = provider
+    _finders[provider.name] = LazyFinder(provider)
+
+
+# Sources dans l'ordre de priorité documenté (docs/04_recherche_lyrics_romaji.md).
+for _provider in (
+    Provider("animelyrics", 1, ("ja",), ".animelyrics:find_lyrics_animelyrics"),
+    Provider("lyrical_nonsense", 2, ("ja",), ".lyrical_nonsense:find_lyrics_lyrical_nonsense"),
+    Provider("genius", 3, ("ja", "ko", "zh"), ".genius:find_lyrics_genius"),
+    Provider("j_lyric", 4, ("ja",), ".j_lyric:find_lyrics_j_lyric"),
+    Provider("mojim", 5, ("ja", "zh"), ".mojim:find_lyrics_mojim"),
+    Provider("nautiljon", 6, ("ja", "ko"), ".nautiljon:find_lyrics_nautiljon"),
+):
+    register(_provider)
+
+
+def _parse_order(order) -> Optional[List[str]]:
+    if order is None:
+        return None
+    if isinstance(order, str):
+        order = [name.strip() for name in order.split(",") if name.strip()]
+    unknown = [name for name in order if name not in REGISTRY]
+    if unknown:
+        raise ValueError(f"Sources inconnues : {', '.join(unknown)} (disponibles : {', '.join(REGISTRY)})")
+    return list(order)
+
+
+def configure(**options) -> None:
+    """Modifie l'ordre des sources (order) ou la langue couverte (language) utilisés par défaut."""
+    for key, value in options.items():
+        if key not in _config:
+            raise ValueError(f"Option inconnue : {key}")
+        _config[key] = _parse_order(value) if key == "order" else value
+
+
+def get_providers(order=None, language: Optional[str] = None) -> List[Tuple[str, LyricsFinder]]:
+    """
+    Sources à interroger, par ordre de priorité : paires (nom, fonction de recherche)
+    dont le module n'est importé qu'au premier appel.
+    """
+    names = _parse_order(order) or _config["order"] or _parse_order(os.environ.get("AUTOLYRICS_PROVIDERS") or None)
+    if names is None:
+        names = sorted(REGISTRY, key=lambda name: REGISTRY[name].priority)
+    language = language or _config["language"]
+    if language:
+        names = [name for name in names if language in REGISTRY[name].languages]
+    return [(name, _finders[name]) for name in names]
+
+
+def covers_registry(providers=None) -> bool:
+    """Vrai si les sources (paires (nom, fonction), par défaut get_providers()) sont toutes celles du registre."""
+    providers = get_providers() if providers is None else providers
+    return {name for name, _ in providers} >= set(REGISTRY)
@@ -0,0 +1,265 @@
+"""
+Planification des recherches : normalisation des tags, variantes de requête,
+score des URL candidates et vérification croisée des paroles.
+
+Les tags écrits par deemix contiennent souvent des mentions qui font échouer
+une recherche exacte ("Gurenge (TV Size)", "Song feat. X", caractères pleine
+chasse, alias entre crochets comme "紅蓮華 (Gurenge)"). Les requêtes sont donc
+construites à partir de variantes normalisées, classées de la plus probable à
+la moins probable, et les URL candidates sont notées d'après leur ressemblance
+avec le titre et l'artiste avant toute récupération de page.
+
+Les scores sont des ratios difflib entre 0 et 1 ; None signifie que l'URL ne
+permet pas de juger (identifiants opaques comme sur J-Lyric ou Mojim, ou titre
+en kanji sans lecture connue face à une URL en romaji, voir romaji.py).
+"""
+
+import re
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote, urlsplit
+
+from .romaji import is_romaji, to_romaji
+
+_config = {
+    # Nombre maximal de variantes (titre, artiste) interrogées par fournisseur.
+    "max_variants": 3,
+    # Score en dessous duquel une URL de résultat de recherche n'est pas récupérée.
+    "min_url_score": 0.5,
+    # Similarité minimale entre deux textes de paroles pour les considérer identiques.
+    "min_agreement": 0.6,
+}
+
+
+def configure(**options) -> None:
+    """Modifie la configuration (max_variants, min_url_score, min_agreement)."""
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    _config.update(options)
+
+
+# Mentions sans rapport avec le titre lui-même, entre parenthèses ou après un tiret.
+_NOISE = re.compile(
+    r"(?i)^\s*(?:"
+    r"(?:tv|short|full|movie|game|anime|radio|single|album)[\s-]*(?:size|ver(?:sion|\.)?|edit(?:ion)?)"
+    r"|.*\bver(?:sion|\.)?|.*\bremix|.*\bmix|.*\bremaster(?:ed)?|.*\bedit"
+    r"|(?:feat|ft)\b.*|featuring\b.*|with\b.*|from\b.*|prod\b.*"
+    r"|instrumental|off[\s-]*vocal|karaoke|acoustic|live\b.*|cover"
+    r"|(?:opening|ending|insert)(?:\s+(?:theme|song))?\b.*|(?:op|ed)\s*\d*"
+    r")\s*$"
+)
+# Parenthèses et crochets ASCII collés au mot suivant ("(K)NoW_NAME") : partie du titre.
+_BRACKETS = re.compile(r"\(([^()]*)\)(?!\w)|\[([^\[\]]*)\](?!\w)|【([^【】]*)】|「([^「」]*)」|『([^『』]*)』|〈([^〈〉]*)〉|《([^《》]*)》")
+_FEAT = re.compile(r"(?i)\s+(?:feat\.?|ft\.|featuring)\s+.*$")
+_DASH_SUFFIX = re.compile(r"\s+[-~〜]\s+(.*)$")
+_ARTIST_SEPARATORS = re.compile(r"\s*(?:,|;|/|&|×|\s+x\s+|\s+and\s+|、)\s*", re.IGNORECASE)
+
+# Mots d'URL qui ne disent rien du morceau (domaines, sections des sites).
+_URL_STOPWORDS = {
+    "www", "com", "net", "org", "html", "htm", "php", "genius", "romanizations", "romanized", "romaji",
+    "lyrics", "lyric", "paroles", "global", "anime", "artist", "translation", "english",
+    "mojim", "nautiljon", "animelyrics", "lyrical", "nonsense", "j", "jpop",
+}
+
+
+class QueryVariant(NamedTuple):
+    title: str
+    artist: str
+
+
+def _clean(text: str) -> str:
+    """NFKC (pleine chasse → ASCII) et espaces normalisés."""
+    return " ".join(unicodedata.normalize("NFKC", text or "").split())
+
+
+def _split_brackets(text: str) -> Tuple[str, List[str]]:
+    """Texte sans ses segments entre crochets, et les segments qui ne sont pas du bruit (alias)."""
+    aliases = []
+
+    def strip(match):
+        content = _clean(next(group for group in match.groups() if group is not None))
+        if content and not _NOISE.match(content):
+            aliases.append(content)
+        return " "
+
+    main = _clean(_BRACKETS.sub(strip, text))
+    suffix = _DASH_SUFFIX.search(main)
+    if suffix and _NOISE.match(suffix.group(1)):
+        main = main[:suffix.start()]
+    return main, aliases
+
+
+def title_forms(title: str) -> List[str]:
+    """Formes du titre, de la plus probable à la moins probable : titre normalisé, puis alias."""
+    title = _clean(title)
+    main, aliases = _split_brackets(title)
+    main = _FEAT.sub("", main).strip()
+    if not main:
+        # Titre entièrement entre crochets ("【Re:Zero】") : on le garde tel quel.
+        main, aliases = _FEAT.sub("", title).strip() or title, []
+    return _unique([main] + aliases)
+
+
+def artist_forms(artist: str) -> List[str]:
+    """Formes de l'artiste : premier artiste crédité, sans featuring, puis alias entre crochets."""
+    artist = _FEAT.sub("", _clean(artist))
+    main, aliases = _split_brackets(artist)
+    main = _ARTIST_SEPARATORS.split(main)[0].strip() if main else ""
+    return _unique([main or artist] + aliases)
+
+
+def normalize_title(title: str) -> str:
+    """"Gurenge (TV Size)" → "Gurenge", "Ｓｏｎｇ feat. X" → "Song"."""
+    return title_forms(title)[0]
+
+
+def normalize_artist(artist: str) -> str:
+    """"LiSA, Uru" → "LiSA", "LiSA (織部里沙)" → "LiSA"."""
+    return artist_forms(artist)[0]
+
+
+def _unique(values: Iterable[str]) -> List[str]:
+    seen, result = set(), []
+    for value in values:
+        key = value.casefold()
+        if value and key not in seen:
+            seen.add(key)
+            result.append(value)
+    return result
+
+
+def query_variants(title: str, artist: str, limit: Optional[int] = None) -> List[QueryVariant]:
+    """
+    Variantes (titre, artiste) à interroger, dans l'ordre : tags normalisés, puis
+    alias du titre, puis alias de l'artiste. Un tag sans mention parasite ni alias
+    ne donne qu'une seule variante (donc aucune requête supplémentaire).
+    """
+    titles, artists = title_forms(title), artist_forms(artist)
+    variants = [QueryVariant(titles[0], artists[0])]
+    variants += [QueryVariant(alias, artists[0]) for alias in titles[1:]]
+    variants += [QueryVariant(titles[0], alias) for alias in artists[1:]]
+    return variants[:limit or _config["max_variants"]]
+
+
+def _words(text: str) -> List[str]:
+    """Mots en minuscules, sans accents ni ponctuation."""
+    text = unicodedata.normalize("NFKD", unicodedata.normalize("NFKC", text or "").casefold())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return re.findall(r"[^\W_]+", text)
+
+
+def _is_ascii(words: List[str]) -> bool:
+    return all(word.isascii() for word in words)
+
+
+def _window_similarity(needle: List[str], haystack: List[str]) -> float:
+    """
+    Meilleur ratio entre `needle` et une suite de mots consécutifs de `haystack` de
+    longueur voisine, espaces ignorés ("kiminokoe" converti d'un titre en kana
+    correspond à "kimi-no-koe").
+    """
+    if not needle or not haystack:
+        return 0.0
+    if f" {' '.join(needle)} " in f" {' '.join(haystack)} ":
+        return 1.0
+    target = "".join(needle)
+    best = 0.0
+    for size in range(max(1, len(needle) - 1), len(needle) + 3):
+        for start in range(max(1, len(haystack) - size + 1)):
+            window = "".join(haystack[start:start + size])
+            best = max(best, SequenceMatcher(None, target, window, autojunk=False).ratio())
+    return best
+
+
+def _best_similarity(forms: List[str], words: List[str]) -> Optional[float]:
+    """Similarité de la meilleure forme comparable aux mots (None si aucune ne l'est)."""
+    scores = []
+    for form in forms:
+        form_words = _words(form)
+        if form_words and not _is_ascii(form_words) and _is_ascii(words):
+            # Titre en kana/kanji face à une URL en romaji : comparé une fois converti, si possible.
+            form_words = _words(to_romaji(form) or "")
+            if not _is_ascii(form_words):
+                continue
+        if form_words:
+            scores.append(_window_similarity(form_words, words))
+    return max(scores) if scores else None
+
+
+def text_score(text: str, title: str) -> Optional[float]:
+    """Ressemblance d'un texte (lien d'une page de recherche...) avec le titre."""
+    words = _words(text)
+    return _best_similarity(title_forms(title), words) if words else None
+
+
+def url_words(url: str) -> List[str]:
+    """Mots significatifs du chemin d'une URL (sans identifiants mêlant lettres et chiffres)."""
+    words = _words(unquote(urlsplit(url).path).replace("-", " "))
+    return [
+        word for word in words
+        if word not in _URL_STOPWORDS and (word.isdigit() or not any(c.isdigit() for c in word))
+    ]
+
+
+def score_url(url: str, title: str, artist: str) -> Optional[float]:
+    """
+    Ressemblance d'une URL avec le morceau : le titre compte pour l'essentiel,
+    l'artiste (souvent absent des URL) départage. None si l'URL ne permet pas de juger.
+    """
+    words = url_words(url)
+    if not words:
+        return None
+    title_similarity = _best_similarity(title_forms(title), words)
+    if title_similarity is None:
+        return None
+    artist_similarity = _best_similarity(artist_forms(artist), words) or 0.0
+    return title_similarity * (0.8 + 0.2 * artist_similarity)
+
+
+def rank_urls(urls: Iterable[str], title: str, artist: str, min_score: Optional[float] = None) -> List[str]:
+    """
+    URL triées par score décroissant ; celles qu'on ne peut pas noter suivent dans
+    leur ordre d'origine, celles sous min_score sont écartées sans être récupérées.
+    """
+    return rank_scored([(score_url(url, title, artist), url) for url in urls], min_score)
+
+
+def rank_scored(scored: Iterable[Tuple[Optional[float], str]], min_score: Optional[float] = None) -> List[str]:
+    """Comme rank_urls, pour des paires (score, URL) déjà calculées (ex. d'après le texte des liens)."""
+    min_score = _config["min_url_score"] if min_score is None else min_score
+    kept, unknown = [], []
+    for score, url in scored:
+        if score is None:
+            unknown.append(url)
+        elif score >= min_score:
+            kept.append((score, url))
+        else:
+            print(f"⏭️ URL écartée (score {score:.2f}) : {url}")
+    kept.sort(key=lambda item: -item[0])
+    return [url for _, url in kept] + unknown
+
+
+def _shingles(text: str, size: int = 6) -> set:
+    """Suites de `size` lettres consécutives, espaces ignorés (insensible au découpage en mots)."""
+    letters = "".join(_words(text))
+    return {letters[i:i + size] for i in range(max(1, len(letters) - size + 1))} if letters else set()
+
+
+def lyrics_agree(a: str, b: str, min_agreement: Optional[float] = None) -> Optional[bool]:
+    """
+    Vrai si deux textes de paroles sont pour l'essentiel les mêmes : part des suites de
+    lettres du plus court présentes dans l'autre (une version TV Size concorde donc avec
+    la version complète). Des paroles en kana/kanji sont d'abord converties en romaji
+    si l'autre texte l'est ; None si on ne peut pas les comparer (texte vide, kanji illisibles).
+    """
+    min_agreement = _config["min_agreement"] if min_agreement is None else min_agreement
+    if is_romaji(a) != is_romaji(b):
+        a, b = (a, to_romaji(b)) if is_romaji(a) else (to_romaji(a), b)
+        if a is None or b is None:
+            return None
+    shingles_a, shingles_b = _shingles(a), _shingles(b)
+    if not shingles_a or not shingles_b:
+        return None
+    return len(shingles_a & shingles_b) >= min_agreement * min(len(shingles_a), len(shingles_b))
@@ -0,0 +1,320 @@
+"""
+Translittération locale kana/kanji → romaji (Hepburn) et détection d'écriture.
+
+Les kana sont convertis par une table (plus longue correspondance d'abord :
+"きゃ" avant "き"), avec le petit tsu (consonne doublée) et le trait d'allongement
+(voyelle répétée). Les kanji demandent une lecture, fournie par un lecteur
+enfichable :
+- DictionaryReader : dictionnaire {mot: lecture en kana}, par exemple chargé
+  depuis le fichier désigné par $AUTOLYRICS_KANJI_DICT (une entrée "mot<TAB>lecture" par ligne) ;
+- PykakasiReader : pykakasi, s'il est installé (segmentation en mots comprise).
+Sans lecteur, un texte qui contient des kanji n'est pas converti (to_romaji renvoie None).
+
+La détection d'écriture compte les caractères de chaque écriture en une passe
+numpy si numpy est installé (expressions régulières sinon).
+
+    to_romaji("きみのこえがきこえるよ")  # → "kiminokoegakikoeruyo" (sans lecteur : pas de découpage en mots)
+"""
+
+import os
+import re
+import threading
+import unicodedata
+from typing import Callable, Dict, List, Optional, Tuple
+
+KANJI_DICT_ENV = "AUTOLYRICS_KANJI_DICT"
+
+# Lecteur : ligne de texte → [(forme écrite, lecture en kana ou None si inconnue)], découpée en mots.
+Reader = Callable[[str], List[Tuple[str, Optional[str]]]]
+
+_config = {
+    # Lecteur des kanji ; None : dictionnaire de $AUTOLYRICS_KANJI_DICT et/ou pykakasi s'ils sont disponibles.
+    "kanji_reader": None,
+}
+_default_reader = None
+_default_reader_lock = threading.Lock()
+
+
+def configure(**options) -> None:
+    """Modifie la configuration (kanji_reader)."""
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    _config.update(options)
+
+
+# --- Détection d'écriture ---------------------------------------------------
+
+# Écriture → plages de points de code (bornes incluses).
+SCRIPT_RANGES = {
+    "hiragana": ((0x3040, 0x309F),),
+    "katakana": ((0x30A0, 0x30FF), (0x31F0, 0x31FF), (0xFF66, 0xFF9F)),
+    "kanji": ((0x3005, 0x3005), (0x3400, 0x4DBF), (0x4E00, 0x9FFF), (0xF900, 0xFAFF)),
+    "hangul": ((0x1100, 0x11FF), (0x3130, 0x318F), (0xAC00, 0xD7AF)),
+    "latin": ((0x41, 0x5A), (0x61, 0x7A), (0xC0, 0x24F)),
+}
+_SCRIPT_PATTERNS = {
+    script: re.compile("[" + "".join(f"{chr(low)}-{chr(high)}" for low, high in ranges) + "]")
+    for script, ranges in SCRIPT_RANGES.items()
+}
+_numpy_tables = None  # (bornes triées, écriture de chaque intervalle), construit au premier appel
+
+
+def _numpy_script_tables():
+    """Bornes des plages pour np.searchsorted, ou False si numpy n'est pas installé."""
+    global _numpy_tables
+    if _numpy_tables is None:
+        try:
+            import numpy as np
+        except ImportError:
+            _numpy_tables = False
+            return _numpy_tables
+        bounds = sorted((low, high, script) for script, ranges in SCRIPT_RANGES.items() for low, high in ranges)
+        edges, labels = [], []
+        for low, high, script in bounds:
+            edges += [low, high + 1]
+            labels += [script, None]
+        _numpy_tables = (np, np.array(edges, dtype=np.uint32), labels)
+    return _numpy_tables
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    """Nombre de caractères de chaque écriture de SCRIPT_RANGES dans le texte."""
+    tables = _numpy_script_tables()
+    if not tables:
+        return {script: len(pattern.findall(text)) for script, pattern in _SCRIPT_PATTERNS.items()}
+    np, edges, labels = tables
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    # Intervalle de chaque caractère : 0 avant la première borne, i après la i-ème.
+    bins = np.bincount(np.searchsorted(edges, codes, side="right"), minlength=len(edges) + 1)
+    counts = dict.fromkeys(SCRIPT_RANGES, 0)
+    for i, script in enumerate(labels):
+        if script is not None:
+            counts[script] += int(bins[i + 1])
+    return counts
+
+
+def detect_script(text: str) -> str:
+    """'japanese' (kana, ou kanji sans hangul), 'korean' ou 'latin'."""
+    counts = script_counts(text)
+    if counts["hiragana"] or counts["katakana"]:
+        return "japanese"
+    if counts["hangul"]:
+        return "korean"
+    if counts["kanji"]:
+        return "japanese"
+    return "latin"
+
+
+def is_romaji(text: str, tolerance: float = 0.05) -> bool:
+    """
+    Vrai si le texte est en alphabet latin : au plus `tolerance` de ses lettres sont
+    des kana, kanji ou hangul (un titre en japonais en tête de paroles en romaji est admis).
+    """
+    counts = script_counts(text)
+    foreign = counts["hiragana"] + counts["katakana"] + counts["kanji"] + counts["hangul"]
+    return foreign <= tolerance * (foreign + counts["latin"])
+
+
+def has_kanji(text: str) -> bool:
+    return bool(_SCRIPT_PATTERNS["kanji"].search(text))
+
+
+# --- Kana → romaji ------------------------------------------------------------
+
+_KANA_ROWS = """
+あ a い i う u え e お o ぁ a ぃ i ぅ u ぇ e ぉ o
+か ka き ki く ku け ke こ ko が ga ぎ gi ぐ gu げ ge ご go
+さ sa し shi す su せ se そ so ざ za じ ji ず zu ぜ ze ぞ zo
+た ta ち chi つ tsu て te と to だ da ぢ ji づ zu で de ど do
+な na に ni ぬ nu ね ne の no
+は ha ひ hi ふ fu へ he ほ ho ば ba び bi ぶ bu べ be ぼ bo ぱ pa ぴ pi ぷ pu ぺ pe ぽ po
+ま ma み mi む mu め me も mo や ya ゆ yu よ yo ゃ ya ゅ yu ょ yo
+ら ra り ri る ru れ re ろ ro わ wa ゎ wa ゐ i ゑ e を wo ん n ゔ vu ゕ ka ゖ ke
+きゃ kya きゅ kyu きょ kyo ぎゃ gya ぎゅ gyu ぎょ gyo
+しゃ sha しゅ shu しょ sho しぇ she じゃ ja じゅ ju じょ jo じぇ je
+ちゃ cha ちゅ chu ちょ cho ちぇ che ぢゃ ja ぢゅ ju ぢょ jo
+にゃ nya にゅ nyu にょ nyo ひゃ hya ひゅ hyu ひょ hyo びゃ bya びゅ byu びょ byo ぴゃ pya ぴゅ pyu ぴょ pyo
+みゃ mya みゅ myu みょ myo りゃ rya りゅ ryu りょ ryo
+てぃ ti でぃ di とぅ tu どぅ du てゅ tyu でゅ dyu つぁ tsa つぃ tsi つぇ tse つぉ tso
+ふぁ fa ふぃ fi ふぇ fe ふぉ fo ふゅ fyu うぃ wi うぇ we うぉ wo いぇ ye
+ゔぁ va ゔぃ vi ゔぇ ve ゔぉ vo くぁ kwa ぐぁ gwa
+"""
+_KANA_PAIRS = _KANA_ROWS.split()
+KANA_TABLE: Dict[str, str] = dict(zip(_KANA_PAIRS[::2], _KANA_PAIRS[1::2]))
+_MAX_KANA = max(len(kana) for kana in KANA_TABLE)
+
+# Katakana → hiragana (même table pour les deux) ; ponctuation japonaise → ASCII.
+_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+_PUNCTUATION = {"、": ", ", "。": ". ", "・": " ", "「": '"', "」": '"', "『": '"', "』": '"', "〜": "~", "　": " "}
+_TO_HIRAGANA.update({ord(mark): ascii_form for mark, ascii_form in _PUNCTUATION.items()})
+_VOWELS = "aeiou"
+# Particules lues autrement qu'elles ne s'écrivent, quand le lecteur les isole.
+_PARTICLES = {"は": "wa", "へ": "e"}
+
+
+def kana_to_romaji(text: str) -> str:
+    """Kana (hiragana ou katakana) en romaji ; les autres caractères sont recopiés tels quels."""
+    text = text.translate(_TO_HIRAGANA)
+    out: List[str] = []
+    sokuon = False
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == "っ":
+            sokuon = True
+            i += 1
+            continue
+        if char == "ー":
+            # Allongement : on répète la dernière voyelle.
+            if out and out[-1] and out[-1][-1] in _VOWELS:
+                out.append(out[-1][-1])
+            i += 1
+            continue
+        for length in range(_MAX_KANA, 0, -1):
+            roma = KANA_TABLE.get(text[i:i + length])
+            if roma is not None:
+                break
+        else:
+            roma, length = char, 1
+        if sokuon:
+            # Petit tsu : consonne doublée ("kitto", "matcha").
+            if roma[:1].isalpha() and roma[0] not in _VOWELS and roma[0] != "n":
+                roma = ("t" if roma.startswith("ch") else roma[0]) + roma
+            sokuon = False
+        out.append(roma)
+        i += length
+    return "".join(out)
+
+
+# --- Lecteurs des kanji ---------------------------------------------------------
+
+class DictionaryReader:
+    """
+    Lecteur à partir d'un dictionnaire {mot: lecture en kana} : plus longue
+    correspondance d'abord. Les kanji absents du dictionnaire sont confiés à
+    `fallback` (autre lecteur) s'il y en a un, sinon laissés sans lecture.
+    """
+
+    def __init__(self, entries: Dict[str, str], fallback: Optional[Reader] = None):
+        self.entries = {unicodedata.normalize("NFKC", word): reading for word, reading in entries.items() if word}
+        self.max_length = max((len(word) for word in self.entries), default=0)
+        self.fallback = fallback
+
+    @classmethod
+    def from_file(cls, path: str, fallback: Optional[Reader] = None) -> "DictionaryReader":
+        """Fichier texte UTF-8, une entrée "mot<TAB>lecture" par ligne (# : commentaire)."""
+        entries = {}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                fields = line.rstrip("\n").split("\t")
+                if len(fields) >= 2 and not line.startswith("#"):
+                    entries[fields[0].strip()] = fields[1].strip()
+        return cls(entries, fallback)
+
+    def __call__(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        tokens: List[Tuple[str, Optional[str]]] = []
+        plain = []  # caractères sans entrée accumulés
+
+        def flush():
+            if not plain:
+                return
+            run = "".join(plain)
+            plain.clear()
+            if self.fallback is not None and has_kanji(run):
+                tokens.extend(self.fallback(run))
+            else:
+                tokens.append((run, None if has_kanji(run) else run))
+
+        i = 0
+        while i < len(text):
+            for length in range(min(self.max_length, len(text) - i), 0, -1):
+                reading = self.entries.get(text[i:i + length])
+                if reading is not None:
+                    flush()
+                    tokens.append((text[i:i + length], reading))
+                    i += length
+                    break
+            else:
+                plain.append(text[i])
+                i += 1
+        flush()
+        return tokens
+
+
+class PykakasiReader:
+    """Lecteur pykakasi (segmentation en mots et lecture des kanji)."""
+
+    def __init__(self):
+        import pykakasi
+
+        self._kakasi = pykakasi.kakasi()
+        self._lock = threading.Lock()
+
+    def __call__(self, text: str) -> List[Tuple[str, Optional[str]]]:
+        with self._lock:
+            items = self._kakasi.convert(text)
+        return [(item["orig"], item["hira"] or None) for item in items]
+
+
+def get_reader() -> Optional[Reader]:
+    """Lecteur configuré, sinon celui par défaut (dictionnaire de $AUTOLYRICS_KANJI_DICT, pykakasi), ou None."""
+    global _default_reader
+    if _config["kanji_reader"] is not None:
+        return _config["kanji_reader"]
+    with _default_reader_lock:
+        if _default_reader is None:
+            try:
+                reader = PykakasiReader()
+            except ImportError:
+                reader = None
+            path = os.environ.get(KANJI_DICT_ENV)
+            if path:
+                try:
+                    reader = DictionaryReader.from_file(path, fallback=reader)
+                except OSError as e:
+                    print(f"⚠️ Dictionnaire de lectures illisible ({path}) : {e}")
+            _default_reader = reader or False
+        return _default_reader or None
+
+
+# --- Conversion ---------------------------------------------------------------
+
+def _romanize_line(line: str, reader: Optional[Reader]) -> Optional[str]:
+    if has_kanji(line):
+        if reader is None:
+            return None
+        tokens = reader(line)
+    else:
+        tokens = [(word, word) for word in line.split()]
+        reader = None  # découpage d'origine : pas de particule isolée à reconnaître
+    words = []
+    for index, (surface, reading) in enumerate(tokens):
+        if reading is None or has_kanji(reading):
+            return None
+        reading = reading.strip()
+        particle, rest = reading[:1], reading[1:]
+        if reader is not None and index > 0 and particle in _PARTICLES and not rest.strip("、。,.!?"):
+            words.append(_PARTICLES[particle] + kana_to_romaji(rest))
+        else:
+            words.append(kana_to_romaji(reading))
+    text = " ".join(word for word in words if word.strip())
+    text = re.sub(r"\s+([,.!?])", r"\1", " ".join(text.split()))
+    return text.strip()
+
+
+def to_romaji(text: str) -> Optional[str]:
+    """
+    Texte japonais converti en romaji, ligne par ligne (lignes vides conservées).
+    None si des kanji n'ont pas pu être lus (aucun lecteur disponible, mot inconnu)
+    ou si le texte n'est pas du japonais (hangul laissé tel quel, hanzi sans lecture).
+    """
+    reader = get_reader() if has_kanji(text) else None
+    lines = []
+    for line in unicodedata.normalize("NFKC", text).split("\n"):
+        converted = _romanize_line(line, reader)
+        if converted is None:
+            return None
+        lines.append(converted)
+    romaji = "\n".join(lines)
+    return romaji if is_romaji(romaji) else None
@@ -0,0 +1,158 @@
+"""
+Recherche des URL candidates pour un fournisseur.
+
+Chaque fournisseur peut proposer des URL "directes" (construites à partir de
+slugs ou obtenues via le moteur de recherche du site). Google n'est interrogé
+qu'ensuite, et ses résultats sont mémorisés dans le cache local pour ne pas
+répéter les mêmes requêtes (et limiter les erreurs 429).
+
+planned_candidates enchaîne ces recherches sur les variantes du titre et de
+l'artiste (voir query.py), en notant les résultats de Google avant de les
+récupérer.
+"""
+
+import re
+import threading
+import unicodedata
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from . import traffic
+from .cache import SearchCache
+from .instrumentation import timed
+from .query import query_variants, rank_urls
+from .traffic import GOOGLE_HOST
+from .utils import record_transport_error
+
+_config = {
+    # Fonction (query, num_results) -> URL remplaçant googlesearch.search (ex. serveur de test local).
+    "backend": None,
+    "use_cache": True,
+    "direct_resolution": True,
+}
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+def configure(**options) -> None:
+    """Modifie la configuration (backend, use_cache, direct_resolution)."""
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    _config.update(options)
+
+
+def _get_search_cache() -> SearchCache:
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
+
+
+def google_search(query: str, num_results: int = 5) -> List[str]:
+    """Résultats Google pour la requête, depuis le cache local s'ils y sont encore valides."""
+    cache = _get_search_cache() if _config["use_cache"] else None
+    if cache is not None:
+        urls = cache.get(query, num_results)
+        if urls is not None:
+            print(f"💾 Recherche en cache ({len(urls)} résultat(s)) : {query}")
+            return urls
+
+    backend = _config["backend"]
+    if backend is None:
+        urls = _google_search(query, num_results)
+    else:
+        with timed("search"):
+            urls = list(backend(query, num_results=num_results))
+    if cache is not None:
+        cache.put(query, num_results, urls)
+    return urls
+
+
+def _google_search(query: str, num_results: int) -> List[str]:
+    """googlesearch.search, sous le contrôle de traffic.py (débit, pause après un 429, disjoncteur)."""
+    from googlesearch import search
+
+    try:
+        traffic.acquire(GOOGLE_HOST)
+        with timed("search"):
+            urls = list(search(query, num_results=num_results))
+    except traffic.Unavailable:
+        record_transport_error()
+        raise
+    except Exception as e:
+        response = getattr(e, "response", None)
+        traffic.record_failure(GOOGLE_HOST, response.headers.get("Retry-After") if response is not None else None)
+        record_transport_error()
+        raise
+    traffic.record_success(GOOGLE_HOST)
+    return urls
+
+
+def candidate_urls(query: str, num_results: int = 5, direct_urls: Optional[Iterable[str]] = None,
+                   title: Optional[str] = None, artist: Optional[str] = None,
+                   accept: Optional[Callable[[str], bool]] = None, seen: Optional[set] = None) -> Iterator[str]:
+    """
+    URL candidates, dans l'ordre : URL directes du fournisseur, puis résultats Google.
+
+    direct_urls est typiquement un générateur : il n'est consommé (et ne fait ses
+    éventuels appels réseau) qu'au moment où l'appelant parcourt les candidats.
+    Google n'est interrogé que si aucune URL directe n'a convenu.
+
+    accept filtre les URL (domaine et section du fournisseur). Avec title et artist,
+    les résultats de Google sont classés d'après leur ressemblance avec le morceau
+    et les moins ressemblants écartés (voir query.rank_urls). seen permet de ne pas
+    proposer deux fois la même URL d'une requête à l'autre.
+    """
+    seen = set() if seen is None else seen
+    if direct_urls is not None and _config["direct_resolution"]:
+        try:
+            for url in direct_urls:
+                if url not in seen and (accept is None or accept(url)):
+                    seen.add(url)
+                    yield url
+        except Exception as e:
+            print(f"⚠️ Résolution directe impossible : {e}")
+
+    urls = [url for url in google_search(query, num_results=num_results)
+            if url not in seen and (accept is None or accept(url))]
+    if title is not None and artist is not None:
+        urls = rank_urls(urls, title, artist)
+    for url in urls:
+        if url not in seen:
+            seen.add(url)
+            yield url
+
+
+def planned_candidates(label: str, title: str, artist: str, queries: Sequence[str],
+                       accept: Callable[[str], bool], resolve=None, num_results: int = 5) -> Iterator[str]:
+    """
+    URL candidates d'un fournisseur pour toutes les variantes du morceau (query.query_variants).
+
+    queries : modèles de requête Google ("site:... {artist} {title}"), essayés dans
+    l'ordre pour chaque variante ; resolve(title, artist) : résolution directe du
+    fournisseur. Les variantes suivantes ne sont interrogées que si l'appelant
+    continue de parcourir les candidats (aucune page ne convenait).
+    """
+    seen = set()
+    for variant in query_variants(title, artist):
+        direct_urls = resolve(variant.title, variant.artist) if resolve is not None else None
+        for template in queries:
+            query = template.format(title=variant.title, artist=variant.artist)
+            print(f"🔍 Recherche {label} : {query}")
+            yield from candidate_urls(query, num_results, direct_urls, title=title, artist=artist,
+                                      accept=accept, seen=seen)
+            direct_urls = None
+
+
+def slugify(text: str, separator: str = "-") -> Optional[str]:
+    """
+    Slug ASCII ("Gurenge (TV Size)" → "gurenge-tv-size"), ou None si le texte
+    contient des caractères non latins (kana, kanji...) qu'on ne sait pas translittérer.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    if any(ord(c) > 127 for c in text):
+        return None
+    slug = re.sub(r"[^a-z0-9]+", separator, text.lower()).strip(separator)
+    return slug or None
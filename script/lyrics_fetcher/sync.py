@@ -0,0 +1,229 @@
+"""
+Modes de synchronisation des paroles (étape `sync` de lyrics_fetcher/pipeline.py).
+
+Chaque mode reçoit le MP3 et les lignes chantées, et renvoie un objet Lyrics
+en mémoire (vide si la synchronisation est abandonnée) :
+- line : Entrée au début de chaque ligne ;
+- word : une touche au début de chaque mot (Enhanced LRC, voir tapping.py) ;
+- auto : d'après l'activité vocale détectée dans l'audio (voir autosync.py).
+
+pygame n'est importé qu'au lancement d'une synchronisation.
+"""
+
+import re
+import termios
+import time
+from typing import List, Optional
+
+from .lrc import Lyrics, format_timestamp, seconds_to_ms
+from .tapping import BACKSPACE_KEYS, ESCAPE, NS_PER_MS, PlaybackClock, RawKeyboard, calibrate_latency, make_click
+
+SYNC_MODES = ("line", "word", "auto")
+
+
+def sync_per_line(mp3_path: str, lines: List[str]) -> Lyrics:
+    """
+    Permet à l'utilisateur de synchroniser les paroles manuellement ligne par ligne.
+    L'utilisateur appuie sur une touche pour marquer le début de chaque ligne.
+    """
+    import pygame
+
+    print(f"Chargement du MP3 : {mp3_path}")
+    print("Préparez-vous à synchroniser les paroles.")
+    print("Appuyez sur Entrée au moment où chaque ligne de parole commence.")
+    print("Appuyez sur 'q' puis Entrée pour quitter en cours de synchronisation.")
+    print("-" * 30)
+
+    synced = Lyrics()  # Lignes horodatées (millisecondes entières)
+    playback_started = False
+    # Initialisation de start_time pour le cas où pygame échoue complètement
+    start_time = time.time()
+
+    try:
+        # Essai d'initialisation de pygame.mixer avec des paramètres spécifiques
+        try:
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
+        except pygame.error as e_init_specific:
+            print(f"Avertissement : Erreur lors de l'initialisation de pygame.mixer (paramètres spécifiques): {e_init_specific}")
+            print("Tentative d'initialisation avec les paramètres par défaut.")
+            pygame.mixer.init() # Essai avec les paramètres par défaut si le premier échoue
+
+        # Si l'initialisation a réussi, on charge et joue la musique
+        pygame.mixer.music.load(mp3_path)
+        print(f"Lecture de : {mp3_path}")
+        pygame.mixer.music.play()
+        start_time = time.time() # Récupérer le temps de début réel APRES le play()
+        playback_started = True
+
+    except pygame.error as e_pygame:
+        # Cette exception attrape les erreurs de init() par défaut ou de load()/play()
+        print(f"Erreur Pygame : {e_pygame}")
+        print("La synchronisation se fera sans lecture audio réelle (simulation du temps).")
+        # start_time est déjà initialisé pour la simulation
+        # playback_started reste False
+
+    for i, line in enumerate(lines):
+        print(f"\nProchaine ligne ({i+1}/{len(lines)}):")
+        print(f"🎵 {line} 🎵")
+
+        user_input = input("Appuyez sur Entrée ou 'q' pour quitter: ")
+        if user_input.lower() == 'q':
+            print("Synchronisation annulée par l'utilisateur.")
+            synced = Lyrics() # Vider pour ne pas sauvegarder un fichier partiel
+            break
+
+        current_timestamp_ms = seconds_to_ms(time.time() - start_time)
+        synced.add_line(current_timestamp_ms, line)
+        print(f"-> Ligne enregistrée à {format_timestamp(current_timestamp_ms)}")
+
+    if playback_started:
+        pygame.mixer.music.stop()
+        pygame.mixer.quit()
+
+    print("\nSynchronisation terminée.")
+    return synced
+
+
+def _render_word_progress(words, marked, line_index):
+    """Réécrit la ligne en cours : mots déjà marqués en gras, le suivant souligné."""
+    parts = []
+    for position, (i, word) in enumerate(words):
+        if i != line_index:
+            continue
+        if position < marked:
+            parts.append(f"\033[1m{word}\033[0m")
+        elif position == marked:
+            parts.append(f"\033[4m{word.rstrip()}\033[0m{word[len(word.rstrip()):]}")
+        else:
+            parts.append(f"\033[2m{word}\033[0m")
+    print(f"\r\033[K🎵 {''.join(parts)}", end="", flush=True)
+
+
+def sync_per_word(mp3_path: str, lines: List[str], latency_ms: Optional[int] = None) -> Lyrics:
+    """
+    Permet à l'utilisateur de synchroniser les paroles mot par mot (Enhanced LRC).
+    Chaque touche marque le début du mot suivant, sans Entrée : les touches sont lues
+    brutes et horodatées sur l'horloge monotone ancrée à la position de lecture, puis
+    corrigées de la latence de l'utilisateur (mesurée par calibrage si latency_ms est None).
+    """
+    import pygame
+
+    words = [(i, word) for i, line in enumerate(lines) for word in re.findall(r"\S+\s*", line)]
+    if not words:
+        print("Aucune parole à synchroniser.")
+        return Lyrics()
+
+    music = None
+    click = None
+    try:
+        try:
+            pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
+        except pygame.error:
+            pygame.mixer.init()
+        click = make_click(pygame)
+        pygame.mixer.music.load(mp3_path)
+        music = pygame.mixer.music
+    except pygame.error as e_pygame:
+        print(f"Erreur Pygame : {e_pygame}")
+        print("La synchronisation se fera sans lecture audio réelle (simulation du temps).")
+
+    print("Une touche quelconque (ex. alterner f et j) au début de chaque mot.")
+    print("Retour arrière : annuler la dernière marque. Échap : quitter sans sauvegarder.")
+    print("-" * 30)
+
+    marks = []  # début de chaque mot marqué, en ms
+    try:
+        with RawKeyboard() as keyboard:
+            if latency_ms is None:
+                print("Calibrage : tapez une touche en rythme sur chaque clic.")
+                latency_ms = calibrate_latency(keyboard, click)
+                if latency_ms is None:
+                    print("Calibrage impossible (trop peu de frappes) : aucune correction appliquée.")
+                    latency_ms = 0
+                else:
+                    print(f"-> Latence mesurée : {latency_ms} ms (réutilisable avec --latency {latency_ms})")
+            latency_ns = latency_ms * NS_PER_MS
+
+            clock = PlaybackClock(music)
+            if music is not None:
+                print(f"Lecture de : {mp3_path}")
+                music.play()
+            clock.start()
+
+            shown_line = shown_marks = None
+            while len(marks) < len(words):
+                line_index = words[len(marks)][0]
+                if line_index != shown_line:
+                    if shown_line is not None:
+                        _render_word_progress(words, len(marks), shown_line)
+                    print(f"\nLigne {line_index + 1}/{len(lines)} :")
+                    shown_line = line_index
+                if len(marks) != shown_marks:
+                    _render_word_progress(words, len(marks), line_index)
+                    shown_marks = len(marks)
+
+                # Réveil régulier sans touche : recalage de l'horloge sur get_pos().
+                key = keyboard.read(0.05)
+                clock.observe()
+                if key is None:
+                    continue
+                key, stamp = key
+                if key == ESCAPE:
+                    print("\nSynchronisation annulée par l'utilisateur.")
+                    marks = []
+                    break
+                if key in BACKSPACE_KEYS:
+                    if marks:
+                        marks.pop()
+                    continue
+                ms = max(0, (clock.position_ns(stamp) - latency_ns) // NS_PER_MS)
+                marks.append(max(ms, marks[-1]) if marks else ms)
+            else:
+                _render_word_progress(words, len(marks), shown_line)
+    except termios.error:
+        print("La synchronisation mot par mot nécessite un terminal interactif.")
+        marks = []
+    finally:
+        if music is not None:
+            music.stop()
+        if pygame.mixer.get_init():
+            pygame.mixer.quit()
+
+    print("\n\nSynchronisation terminée.")
+    synced = Lyrics()
+    for line_index, line in enumerate(lines):
+        line_words = [(word, ms) for (i, word), ms in zip(words, marks) if i == line_index]
+        if not line_words:
+            continue
+        texts, times = zip(*line_words)
+        synced.add_line(times[0], line, texts, times)
+    return synced
+
+
+def sync_auto(mp3_path: str, lines: List[str]) -> Lyrics:
+    """
+    Synchronise les paroles ligne par ligne sans intervention, d'après l'activité vocale
+    détectée dans l'audio (voir autosync.py). Le résultat est un premier jet : les
+    décalages éventuels se corrigent ensuite à la main.
+    """
+    from .autosync import auto_sync
+
+    print(f"Analyse de l'audio : {mp3_path}")
+    start = time.perf_counter()
+    starts_ms = auto_sync(mp3_path, lines)
+    synced = Lyrics({"re": "Autolyrics auto-sync"})
+    for ms, line in zip(starts_ms, lines):
+        synced.add_line(ms, line)
+    print(f"-> {len(lines)} lignes alignées en {time.perf_counter() - start:.1f}s")
+    return synced
+
+
+def synchronize(mode: str, mp3_path: str, lines: List[str], latency_ms: Optional[int] = None) -> Lyrics:
+    """Lance le mode de synchronisation `mode` (voir SYNC_MODES)."""
+    if mode == "line":
+        return sync_per_line(mp3_path, lines)
+    if mode == "word":
+        return sync_per_word(mp3_path, lines, latency_ms)
+    if mode == "auto":
+        return sync_auto(mp3_path, lines)
+    raise ValueError(f"Mode de synchronisation inconnu : {mode}")
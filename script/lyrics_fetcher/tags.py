@@ -0,0 +1,13 @@
+import os
+
+
+def default_lyrics_txt_path(mp3_path: str) -> str:
+    """Chemin par défaut du fichier de paroles brutes : <nom_mp3>.txt à côté du MP3."""
+    base, _ = os.path.splitext(mp3_path)
+    return f"{base}.txt"
+
+
+def default_lrc_path(mp3_path: str) -> str:
+    """Chemin par défaut des paroles synchronisées : <nom_mp3>.lrc à côté du MP3."""
+    base, _ = os.path.splitext(mp3_path)
+    return f"{base}.lrc"
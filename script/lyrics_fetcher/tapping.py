@@ -0,0 +1,157 @@
+"""
+Saisie au clavier pour la synchronisation manuelle (sync_lyrics.py --mode word).
+
+- RawKeyboard : terminal en mode cbreak sans écho. Chaque touche est lue dès
+  la frappe (ni Entrée ni tampon de ligne) et horodatée par time.monotonic_ns()
+  au réveil de select, avant tout affichage.
+- PlaybackClock : position de lecture sur l'horloge monotone, ancrée sur
+  pygame.mixer.music.get_pos() (insensible aux réglages de l'heure système).
+- calibrate_latency : l'utilisateur tape en rythme sur des clics. Le décalage
+  médian entre frappe et clic regroupe son temps de réaction et la latence de
+  sortie audio, que l'on retranche ensuite à chaque horodatage.
+"""
+
+import math
+import os
+import select
+import statistics
+import sys
+import termios
+import time
+import tty
+from array import array
+from typing import Optional, Tuple
+
+ESCAPE = b"\x1b"
+BACKSPACE_KEYS = (b"\x7f", b"\x08")
+
+NS_PER_MS = 1_000_000
+# get_pos() avance par blocs du tampon audio : l'ancre est le minimum de (instant - position) sur deux fenêtres glissantes.
+ANCHOR_WINDOW_NS = 2_000_000_000
+
+CALIBRATION_BEATS = 16
+CALIBRATION_WARMUP = 4  # premiers clics ignorés, le temps de prendre le rythme
+CALIBRATION_PERIOD_MS = 500
+CLICK_MS = 25
+
+
+class RawKeyboard:
+    """Contexte : terminal en mode cbreak sans écho, restauré à la sortie."""
+
+    def __init__(self, stream=None):
+        self.fd = (stream or sys.stdin).fileno()
+        self._saved = None
+
+    def __enter__(self) -> "RawKeyboard":
+        self._saved = termios.tcgetattr(self.fd)
+        tty.setcbreak(self.fd)  # ni ICANON ni ECHO
+        return self
+
+    def __exit__(self, *exc) -> None:
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self._saved)
+
+    def read(self, timeout: Optional[float] = None) -> Optional[Tuple[bytes, int]]:
+        """(touche, instant monotone en ns) ou None si aucune touche avant `timeout` secondes."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return None
+        stamp = time.monotonic_ns()
+        key = os.read(self.fd, 1)
+        if key == ESCAPE:
+            # Séquence d'échappement (flèches...) : lue d'un bloc pour ne compter qu'une touche.
+            while select.select([self.fd], [], [], 0)[0]:
+                key += os.read(self.fd, 16)
+        return key, stamp
+
+
+class PlaybackClock:
+    """Position de lecture en ns, extrapolée sur time.monotonic_ns() entre deux lectures de get_pos()."""
+
+    def __init__(self, music=None):
+        self._music = music
+        self._anchor = 0
+        self._current = self._previous = math.inf
+        self._window_start = 0
+
+    def start(self) -> None:
+        """À appeler juste après music.play() (ou au début de la simulation, sans audio)."""
+        self._anchor = self._window_start = time.monotonic_ns()
+        self._current = self._previous = math.inf
+        self.observe()
+
+    def observe(self) -> None:
+        """Recale l'ancre sur get_pos() ; peu coûteux, à appeler souvent (à chaque touche, à chaque réveil)."""
+        if self._music is None:
+            return
+        position_ms = self._music.get_pos()
+        now = time.monotonic_ns()
+        if position_ms < 0:
+            return
+        candidate = now - position_ms * NS_PER_MS
+        if now - self._window_start > ANCHOR_WINDOW_NS:
+            # Nouvelle fenêtre : une dérive de l'horloge de la carte son n'est retenue que deux fenêtres.
+            self._previous, self._current, self._window_start = self._current, candidate, now
+        else:
+            self._current = min(self._current, candidate)
+        self._anchor = min(self._previous, self._current)
+
+    def position_ns(self, instant_ns: Optional[int] = None) -> int:
+        return (time.monotonic_ns() if instant_ns is None else instant_ns) - self._anchor
+
+
+def make_click(pygame):
+    """Clic court (1 kHz amorti) au format du mixer, ou None si le mixer n'est pas initialisé."""
+    settings = pygame.mixer.get_init()
+    if not settings:
+        return None
+    frequency, size, channels = settings
+    if size != -16:
+        return None
+    count = frequency * CLICK_MS // 1000
+    samples = array("h")
+    for i in range(count):
+        value = int(20000 * math.sin(2 * math.pi * 1000 * i / frequency) * math.exp(-6 * i / count))
+        samples.extend([value] * channels)
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+def calibrate_latency(keyboard: RawKeyboard, click=None, beats: int = CALIBRATION_BEATS,
+                      period_ms: int = CALIBRATION_PERIOD_MS) -> Optional[int]:
+    """
+    Latence (ms) entre un son et la frappe correspondante, mesurée en tapant en rythme.
+    `click` est un pygame.mixer.Sound (sinon, la cloche du terminal). None si trop peu de frappes exploitables.
+    """
+    period = period_ms * NS_PER_MS
+    first = time.monotonic_ns() + 1_000_000_000
+    beat_times, taps = [], []
+    for k in range(beats + 1):
+        target = first + k * period
+        while True:
+            remaining = target - time.monotonic_ns()
+            if remaining <= 0:
+                break
+            key = keyboard.read(remaining / 1e9)
+            if key is not None:
+                if key[0] == ESCAPE:
+                    return None
+                taps.append(key[1])
+        if k == beats:
+            break
+        if click is not None:
+            click.play()
+            sys.stdout.write("●")
+        else:
+            sys.stdout.write("\a●")
+        sys.stdout.flush()
+        beat_times.append(time.monotonic_ns())
+    sys.stdout.write("\n")
+
+    offsets = []
+    for tap in taps:
+        index = min(range(len(beat_times)), key=lambda i: abs(tap - beat_times[i]))
+        offset = tap - beat_times[index]
+        if index >= CALIBRATION_WARMUP and abs(offset) < period // 2:
+            offsets.append(offset)
+    if len(offsets) < (beats - CALIBRATION_WARMUP) // 2:
+        return None
+    return round(statistics.median(offsets) / NS_PER_MS)
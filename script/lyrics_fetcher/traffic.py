@@ -0,0 +1,344 @@
+"""
+Contrôle du trafic vers Google et les sites de paroles.
+
+- Seau à jetons par hôte : au plus `rate` requêtes par seconde en régime
+  établi, avec des rafales de `burst` requêtes.
+- Backoff exponentiel avec gigue après une réponse 429/5xx ou une erreur
+  réseau : l'hôte est mis en pause pour tous les threads (et Retry-After est respecté).
+- Disjoncteurs : après `failure_threshold` échecs consécutifs, un hôte (ou une
+  source, voir fallback.py) est ignoré pendant `cooldown` secondes, doublées à
+  chaque nouvel échec jusqu'à `max_cooldown`. À la fin de la pause, une seule
+  requête d'essai est autorisée : son succès referme le disjoncteur.
+
+L'état est partagé entre threads, et entre processus (CLI, démon, traitement
+par lots) via un fichier JSON verrouillé par fcntl dans le répertoire du cache.
+Chaque processus en garde une copie en mémoire, relue au plus toutes les
+`sync_interval` secondes : le fichier n'est réécrit que lorsqu'un échec, une
+pause ou un disjoncteur change, et à chaque jeton des hôtes limités en débit
+(au plus `rate` fois par seconde). Une requête réussie vers un hôte sain ne
+touche pas au disque. Il apparaît dans les mesures de instrumentation.snapshot().
+"""
+
+import fcntl
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from .cache import cache_dir
+from .utils import is_cancelled
+
+GOOGLE_HOST = "www.google.com"
+
+HOSTS = "hosts"
+PROVIDERS = "providers"
+
+# États d'un disjoncteur.
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_config = {
+    # Hôte → (requêtes par seconde, rafale). Les autres hôtes ne sont limités que par min_host_interval.
+    "host_rates": {GOOGLE_HOST: (1.0, 5)},
+    # Intervalle minimal (en secondes) entre deux requêtes vers un même hôte ; 0 = pas de limite.
+    "min_host_interval": 0.0,
+    # Pause après le premier échec (s), doublée à chaque échec consécutif, plafonnée à max_backoff.
+    "backoff_base": 1.0,
+    "max_backoff": 60.0,
+    "failure_threshold": 5,
+    "cooldown": 60.0,
+    "max_cooldown": 900.0,
+    # Fichier d'état partagé entre processus ; None : état propre au processus.
+    "state_path": "default",
+    # Délai maximal (s) avant de voir les pauses et disjoncteurs décidés par un autre processus.
+    "sync_interval": 0.5,
+}
+# Clés d'une entrée remises à zéro par un succès.
+_FAILURE_KEYS = ("failures", "trips", "open_until", "probe_until")
+
+_lock = threading.Lock()
+_local_state = {HOSTS: {}, PROVIDERS: {}}
+# Fichier d'où vient _local_state, et date (time.monotonic) de sa dernière lecture.
+_synced_path = None
+_synced_at = 0.0
+_random = random.Random()
+
+
+class Unavailable(Exception):
+    """Hôte ou source ignoré : disjoncteur ouvert."""
+
+
+def configure(**options) -> None:
+    """Modifie la configuration (host_rates, min_host_interval, backoff_base, max_backoff, failure_threshold, cooldown, max_cooldown, state_path, sync_interval)."""
+    unknown = set(options) - set(_config)
+    if unknown:
+        raise ValueError(f"Options inconnues : {', '.join(sorted(unknown))}")
+    _config.update(options)
+
+
+def state_path() -> Optional[str]:
+    path = _config["state_path"]
+    if path == "default":
+        os.makedirs(cache_dir(), exist_ok=True)
+        return os.path.join(cache_dir(), "traffic_state.json")
+    return path
+
+
+def _parse(text: str) -> dict:
+    try:
+        state = json.loads(text or "{}")
+    except ValueError:
+        state = {}
+    state.setdefault(HOSTS, {})
+    state.setdefault(PROVIDERS, {})
+    return state
+
+
+def _load(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_SH)
+            try:
+                return _parse(f.read())
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+    except FileNotFoundError:
+        return _parse("")
+
+
+@contextmanager
+def _state(shared: bool = False):
+    """
+    État complet, verrouillé le temps du bloc.
+
+    Par défaut, copie en mémoire du processus (relue du fichier au plus toutes les
+    sync_interval secondes) : les modifications ne sont pas propagées. shared=True :
+    fichier relu et réécrit sous verrou fcntl, pour les modifications que les
+    autres processus doivent voir.
+    """
+    global _local_state, _synced_path, _synced_at
+    path = state_path()
+    with _lock:
+        if path is None:
+            yield _local_state
+            return
+        if not shared:
+            if path != _synced_path or time.monotonic() - _synced_at >= _config["sync_interval"]:
+                _local_state, _synced_path, _synced_at = _load(path), path, time.monotonic()
+            yield _local_state
+            return
+        with open(path, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                state = _parse(f.read())
+                yield state
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                _local_state, _synced_path, _synced_at = state, path, time.monotonic()
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _rate(host: str):
+    """(requêtes par seconde, rafale) pour cet hôte, ou None s'il n'est pas limité."""
+    rate = _config["host_rates"].get(host)
+    if rate is not None:
+        return rate
+    interval = _config["min_host_interval"]
+    return (1.0 / interval, 1) if interval else None
+
+
+def _breaker_state(entry: dict, now: float) -> str:
+    if now < entry.get("open_until", 0.0):
+        return OPEN
+    if entry.get("trips"):
+        return HALF_OPEN
+    return CLOSED
+
+
+def _admit(entry: dict, now: float, name: str) -> None:
+    """Lève Unavailable si le disjoncteur est ouvert ; en demi-ouverture, ne laisse passer qu'un essai à la fois."""
+    state = _breaker_state(entry, now)
+    if state == OPEN:
+        raise Unavailable(f"disjoncteur ouvert pour {name} (encore {entry['open_until'] - now:.0f}s)")
+    if state == HALF_OPEN:
+        if now < entry.get("probe_until", 0.0):
+            raise Unavailable(f"disjoncteur de {name} en cours de test")
+        # Essai unique : les autres appelants sont refusés jusqu'à son résultat (ou 30 s).
+        entry["probe_until"] = now + 30.0
+
+
+def _take(entry: dict, now: float, host: str) -> float:
+    """Admission et jeton pour `host` ; renvoie l'attente nécessaire (<= 0 : la requête peut partir)."""
+    _admit(entry, now, host)
+    wait = entry.get("paused_until", 0.0) - now
+    rate = _rate(host)
+    if wait <= 0 and rate is not None:
+        per_second, burst = rate
+        tokens = min(burst, entry.get("tokens", burst) + (now - entry.get("refilled_at", now)) * per_second)
+        entry["refilled_at"] = now
+        if tokens >= 1:
+            entry["tokens"] = tokens - 1
+        else:
+            entry["tokens"] = tokens
+            wait = (1 - tokens) / per_second
+    if wait > 0:
+        # Essai de demi-ouverture reporté : il sera de nouveau admis au prochain tour.
+        entry.pop("probe_until", None)
+    return wait
+
+
+def acquire(host: str) -> None:
+    """
+    Attend un jeton pour une requête vers `host` (et la fin d'une éventuelle pause
+    de backoff). Lève Unavailable si le disjoncteur de l'hôte est ouvert ou si la
+    recherche du thread courant est annulée pendant l'attente.
+    """
+    if not host:
+        return
+    while True:
+        # Hôte sans limite de débit ni essai de demi-ouverture : la copie en mémoire suffit.
+        with _state() as state:
+            now = time.time()
+            entry = state[HOSTS].get(host, {})
+            shared = _rate(host) is not None or _breaker_state(entry, now) == HALF_OPEN
+            if not shared:
+                wait = _take(entry, now, host)
+        if shared:
+            with _state(shared=True) as state:
+                wait = _take(state[HOSTS].setdefault(host, {}), time.time(), host)
+        if wait <= 0:
+            return
+        if is_cancelled():
+            raise Unavailable(f"{host} : recherche annulée pendant l'attente")
+        # Attente par tranches courtes : une annulation est prise en compte rapidement.
+        time.sleep(min(wait, 0.5))
+
+
+def _retry_after(value) -> Optional[float]:
+    """Délai d'un en-tête Retry-After (secondes ou date HTTP), en secondes."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _fail(entry: dict, now: float) -> None:
+    entry["failures"] = entry.get("failures", 0) + 1
+    entry.pop("probe_until", None)
+    if _breaker_state(entry, now) == OPEN:
+        return  # requête partie avant l'ouverture : la pause en cours ne s'allonge pas
+    if entry["failures"] >= _config["failure_threshold"] or entry.get("trips"):
+        # Seuil atteint, ou essai raté en demi-ouverture : (ré)ouverture, pause doublée.
+        entry["trips"] = entry.get("trips", 0) + 1
+        cooldown = min(_config["max_cooldown"], _config["cooldown"] * 2 ** (entry["trips"] - 1))
+        entry["open_until"] = now + cooldown
+
+
+def _succeed(kind: str, name: str) -> None:
+    # paused_until expire de lui-même : une requête partie avant un 429 d'un autre
+    # thread ou processus ne doit pas lever la pause (ni le Retry-After) de l'hôte.
+    with _state() as state:
+        if not any(key in state[kind].get(name, {}) for key in _FAILURE_KEYS):
+            return  # rien à remettre à zéro : pas d'écriture
+    with _state(shared=True) as state:
+        entry = state[kind].setdefault(name, {})
+        for key in _FAILURE_KEYS:
+            entry.pop(key, None)
+
+
+def _check(kind: str, name: str, label: str) -> None:
+    with _state() as state:
+        now = time.time()
+        entry = state[kind].get(name, {})
+        if _breaker_state(entry, now) != HALF_OPEN:
+            _admit(entry, now, label)
+            return
+    # L'essai de demi-ouverture est réservé pour tous les processus.
+    with _state(shared=True) as state:
+        _admit(state[kind].setdefault(name, {}), time.time(), label)
+
+
+def record_success(host: str) -> None:
+    """Réponse obtenue (même 404) : compteur d'échecs et disjoncteur de l'hôte remis à zéro."""
+    if host:
+        _succeed(HOSTS, host)
+
+
+def record_failure(host: str, retry_after=None) -> float:
+    """
+    Réponse 429/5xx ou erreur réseau : l'hôte est mis en pause (backoff exponentiel,
+    gigue "equal jitter", au moins Retry-After) et le disjoncteur compte l'échec.
+    Renvoie la pause en secondes.
+    """
+    if not host:
+        return 0.0
+    with _state(shared=True) as state:
+        now = time.time()
+        entry = state[HOSTS].setdefault(host, {})
+        _fail(entry, now)
+        delay = min(_config["max_backoff"], _config["backoff_base"] * 2 ** (entry["failures"] - 1))
+        delay = _random.uniform(delay / 2, delay)
+        delay = max(delay, _retry_after(retry_after) or 0.0)
+        entry["paused_until"] = max(entry.get("paused_until", 0.0), now + delay)
+        return delay
+
+
+def check_provider(name: str) -> None:
+    """Lève Unavailable si le disjoncteur de la source est ouvert."""
+    _check(PROVIDERS, name, f"la source {name}")
+
+
+def provider_succeeded(name: str) -> None:
+    _succeed(PROVIDERS, name)
+
+
+def provider_failed(name: str) -> None:
+    with _state(shared=True) as state:
+        _fail(state[PROVIDERS].setdefault(name, {}), time.time())
+
+
+def reset() -> None:
+    """Oublie l'état de tous les hôtes et sources."""
+    with _state(shared=True) as state:
+        state[HOSTS].clear()
+        state[PROVIDERS].clear()
+
+
+def snapshot() -> dict:
+    """État des limiteurs et disjoncteurs, sérialisable en JSON (voir instrumentation.snapshot)."""
+    try:
+        with _state() as state:
+            state = json.loads(json.dumps(state))
+    except OSError as e:
+        return {"error": str(e)}
+    now = time.time()
+    result = {HOSTS: {}, PROVIDERS: {}}
+    for kind in (HOSTS, PROVIDERS):
+        for name, entry in sorted(state[kind].items()):
+            info = {"breaker": _breaker_state(entry, now), "failures": entry.get("failures", 0)}
+            if info["breaker"] == OPEN:
+                info["open_for_s"] = round(entry["open_until"] - now, 1)
+            if kind == HOSTS:
+                if entry.get("paused_until", 0.0) > now:
+                    info["paused_for_s"] = round(entry["paused_until"] - now, 1)
+                if "tokens" in entry and _rate(name) is not None:
+                    per_second, burst = _rate(name)
+                    tokens = min(burst, entry["tokens"] + (now - entry.get("refilled_at", now)) * per_second)
+                    info["tokens"] = round(tokens, 2)
+            result[kind][name] = info
+    return result
@@ -1,15 +1,68 @@
-# Placeholders pour l'instant. Futur : détection de langue, conversion romaji, logs, etc.
+# Utilitaires partagés. La détection d'écriture et la conversion en romaji sont dans romaji.py.
 
-def is_romaji(text: str) -> bool:
-    return all(ord(c) < 128 for c in text)
+import threading
 
+from .romaji import detect_script, is_romaji  # noqa: F401
+
+# Délai global (en secondes) accordé par défaut à l'ensemble des sources (voir fallback.py).
+DEFAULT_DEADLINE = 60.0
+
+
+class LookupIncomplete(Exception):
+    """Aucune source n'a trouvé de paroles, mais certaines n'ont pas pu conclure (erreur ou délai dépassé)."""
+
+
+# Contexte propre au thread courant : permet au moteur de recherche concurrent
+# (voir fallback.py) de signaler aux fournisseurs que leur travail est devenu inutile.
+_context = threading.local()
+
+
+def set_cancel_event(event: threading.Event) -> None:
+    _context.cancel_event = event
+
+
+def is_cancelled() -> bool:
+    """Vrai si la recherche menée par ce thread a été annulée (réponse déjà décidée ou délai dépassé)."""
+    event = getattr(_context, "cancel_event", None)
+    return event is not None and event.is_set()
+
+
+def set_current_provider(name) -> None:
+    _context.provider = name
+
+
+def get_current_provider():
+    """Nom du fournisseur exécuté par ce thread (pour l'instrumentation), ou None."""
+    return getattr(_context, "provider", None)
+
+
+def set_source_url(url) -> None:
+    """Mémorise l'URL de la page d'où proviennent les paroles renvoyées par le fournisseur courant."""
+    _context.source_url = url
+
+
+def get_source_url():
+    return getattr(_context, "source_url", None)
+
+
+def reset_transport_errors() -> None:
+    _context.transport_errors = 0
+
+
+def record_transport_error() -> None:
+    """Signale une requête sans réponse exploitable (erreur réseau, 429/5xx, hôte suspendu)."""
+    _context.transport_errors = get_transport_errors() + 1
+
+
+def get_transport_errors() -> int:
+    """Requêtes en échec depuis le dernier reset_transport_errors() dans ce thread."""
+    return getattr(_context, "transport_errors", 0)
+
+
+def format_lyrics_text(title: str, artist: str, lyrics) -> str:
+    if lyrics:
+        return f"{title} - {artist}\n\n{lyrics}"
+    return f"{title} - {artist}\n\n❌ Paroles non trouvées automatiquement.\nEssaye manuellement sur Google."
 
-def detect_script(text: str) -> str:
-    # Très simplifié
-    if any('\u3040' <= c <= '\u30ff' for c in text):
-        return 'japanese'
-    elif any('\u1100' <= c <= '\u11FF' or '\uAC00' <= c <= '\uD7AF' for c in text):
-        return 'korean'
-    return 'latin'
 
 
@@ -1,98 +1,159 @@
 #!/usr/bin/env python3
 import argparse
-import os
-import sys # Pour sys.executable
-import subprocess # Pour appeler sync_lyrics.py
-from mutagen.easyid3 import EasyID3
-from lyrics_fetcher.fallback import get_romaji_lyrics
-
-def extract_metadata(mp3_path):
-    audio = EasyID3(mp3_path)
-    title = audio.get("title", [None])[0]
-    artist = audio.get("artist", [None])[0]
-    return title, artist
+import sys
+from lyrics_fetcher.pipeline import LyricsPipeline, PipelineError, TrackJob
+from lyrics_fetcher.sync import SYNC_MODES
+from lyrics_fetcher.utils import DEFAULT_DEADLINE, LookupIncomplete
 
 def main():
-    parser = argparse.ArgumentParser(description="🔎 Recherche automatique de paroles en romaji et synchronisation optionnelle.")
+    # Sous-commande "batch" : traitement de bibliothèques entières (voir lyrics_fetcher/batch.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from lyrics_fetcher.batch import main as batch_main
+        return batch_main(sys.argv[2:])
+    # Sous-commande "daemon" : suivi résident du morceau joué par mplayer (voir lyrics_fetcher/daemon.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "daemon":
+        from lyrics_fetcher.daemon import main as daemon_main
+        return daemon_main(sys.argv[2:])
+    # Sous-commande "prefetch" : préchargement des prochains morceaux d'une file (voir lyrics_fetcher/prefetch.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "prefetch":
+        from lyrics_fetcher.prefetch import main as prefetch_main
+        return prefetch_main(sys.argv[2:])
+    # Sous-commande "display" : affichage synchronisé des paroles .lrc (voir lyrics_fetcher/display.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "display":
+        from lyrics_fetcher.display import main as display_main
+        return display_main(sys.argv[2:])
+    # Sous-commande "lrc" : décalage, étirement et fusion de fichiers .lrc (voir lyrics_fetcher/lrc.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "lrc":
+        from lyrics_fetcher.lrc import main as lrc_main
+        return lrc_main(sys.argv[2:])
+    # Sous-commande "library" : index des tags et des paroles de la bibliothèque (voir lyrics_fetcher/library.py)
+    if len(sys.argv) > 1 and sys.argv[1] == "library":
+        from lyrics_fetcher.library import main as library_main
+        return library_main(sys.argv[2:])
+
+    parser = argparse.ArgumentParser(
+        description="🔎 Recherche automatique de paroles en romaji et synchronisation optionnelle.",
+        epilog="Pour traiter des répertoires entiers : lyrics_fetcher_cli.py batch --help. "
+               "Pour suivre mplayer en continu : lyrics_fetcher_cli.py daemon --help"
+    )
     parser.add_argument("mp3_path", help="Chemin vers le fichier .mp3")
     parser.add_argument(
         "--sync",
         action="store_true",
-        help="Lancer la synchronisation manuelle des paroles après les avoir récupérées."
+        help="Lancer la synchronisation des paroles après les avoir récupérées."
+    )
+    parser.add_argument(
+        "--sync-mode",
+        choices=SYNC_MODES,
+        default="line",
+        help="Avec --sync : 'line' (Entrée à chaque ligne, défaut), 'word' (une touche par mot) ou 'auto'."
     )
     parser.add_argument(
         "-o", "--output_lyrics_txt",
         help="Chemin pour sauvegarder les paroles brutes .txt (optionnel, défaut: <nom_mp3>.txt)"
     )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help=f"Délai global (en secondes) accordé à la recherche sur l'ensemble des sources (défaut: {DEFAULT_DEADLINE:g})."
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignorer le cache local des paroles (ni lecture, ni écriture)."
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignorer l'entrée en cache et la remplacer par le résultat d'une nouvelle recherche."
+    )
+    parser.add_argument(
+        "--providers",
+        help="Sources à interroger, dans l'ordre, séparées par des virgules (défaut: $AUTOLYRICS_PROVIDERS ou ordre documenté)."
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=None,
+        help="Nombre maximal de sources interrogées simultanément (défaut: toutes)."
+    )
+    parser.add_argument(
+        "--adaptive",
+        action="store_true",
+        help="Ordonner les sources selon leurs taux de succès passés (par artiste si possible)."
+    )
+    parser.add_argument(
+        "--cross-check",
+        action="store_true",
+        help="Attendre une seconde source pour vérifier les paroles trouvées (plus lent, moins de faux positifs)."
+    )
+    parser.add_argument(
+        "--profile",
+        metavar="FICHIER",
+        help="Écrire les mesures de la recherche : JSON, ou cProfile si le fichier se termine par .prof."
+    )
     args = parser.parse_args()
 
-    mp3_file_path = args.mp3_path
-    title, artist = extract_metadata(mp3_file_path)
-    if not title or not artist:
-        print("❌ Impossible d'extraire le titre ou l'artiste depuis le fichier mp3.")
-        return
-
-    print(f"🎵 Lecture des métadonnées : {title} - {artist}")
-    lyrics_text = get_romaji_lyrics(title, artist)
-
-    if not lyrics_text or lyrics_text.strip() == "LYRICS NOT FOUND":
-        print("❌ Paroles non trouvées. Impossible de continuer avec la synchronisation.")
+    if args.providers:
+        from lyrics_fetcher import providers
+        try:
+            providers.configure(order=args.providers)
+        except ValueError as e:
+            parser.error(str(e))
+
+    if args.profile and args.profile.endswith(".prof"):
+        from lyrics_fetcher import instrumentation
+        instrumentation.enable_profiling()
+
+    pipeline = LyricsPipeline(
+        sync_mode=args.sync_mode if args.sync else None, deadline=args.deadline, use_cache=not args.no_cache,
+        refresh=args.refresh, max_parallel=args.parallel, adaptive=args.adaptive,
+        cross_check=args.cross_check
+    )
+    job = TrackJob(args.mp3_path, txt_path=args.output_lyrics_txt)
+    try:
+        pipeline.metadata(job)
+        if job.tag_error:
+            print(f"❌ Impossible de lire les tags du fichier mp3 : {job.tag_error}")
+            return
+        if not job.title or not job.artist:
+            print("❌ Impossible d'extraire le titre ou l'artiste depuis le fichier mp3.")
+            return
+        print(f"🎵 Lecture des métadonnées : {job.title} - {job.artist}")
+        try:
+            pipeline.lookup(job)
+        except LookupIncomplete as e:
+            print(f"⚠️ Recherche incomplète, résultat non mis en cache : {e}")
+            return
+    except PipelineError as e:
+        print(f"❌ {e}")
         return
+    finally:
+        if args.profile:
+            from lyrics_fetcher import instrumentation
+            instrumentation.write_profile(args.profile)
 
     print("\n========================\n")
-    print(lyrics_text)
+    print(job.lyrics_text)
     print("\n========================\n")
 
-    # Sauvegarde des paroles brutes
-    if args.output_lyrics_txt:
-        lyrics_txt_path = args.output_lyrics_txt
-    else:
-        base, _ = os.path.splitext(mp3_file_path)
-        lyrics_txt_path = f"{base}.txt"
-
-    try:
-        with open(lyrics_txt_path, 'w', encoding='utf-8') as f:
-            f.write(lyrics_text)
-        print(f"✅ Paroles brutes sauvegardées dans : {lyrics_txt_path}")
-    except IOError as e:
-        print(f"❌ Erreur lors de la sauvegarde des paroles brutes : {e}")
+    if not job.found:
+        print("❌ Paroles non trouvées. Impossible de continuer avec la synchronisation.")
         return
 
-    # Lancer la synchronisation si demandé
-    if args.sync:
-        print(f"\n🔄 Lancement de la synchronisation pour {mp3_file_path} et {lyrics_txt_path}...")
-
-        # Déterminer le chemin du script sync_lyrics.py
-        # On suppose qu'il est dans le même répertoire que ce script (lyrics_fetcher_cli.py)
-        current_script_dir = os.path.dirname(os.path.abspath(__file__))
-        sync_script_path = os.path.join(current_script_dir, "sync_lyrics.py")
-
-        if not os.path.exists(sync_script_path):
-            print(f"❌ Erreur : Le script de synchronisation '{sync_script_path}' est introuvable.")
-            return
-
-        try:
-            # sys.executable est le chemin vers l'interpréteur Python courant
-            command = [sys.executable, sync_script_path, mp3_file_path, lyrics_txt_path]
-            print(f"Exécution de : {' '.join(command)}")
-
-            # Utiliser Popen pour une meilleure gestion si on veut capturer stdout/stderr en temps réel plus tard
-            # Pour l'instant, run suffit et est plus simple
-            process = subprocess.run(command, check=False) # check=False pour gérer nous-même les erreurs
-
-            if process.returncode == 0:
-                print("✅ Synchronisation terminée avec succès.")
-            else:
-                print(f"⚠️ Le script de synchronisation s'est terminé avec le code d'erreur : {process.returncode}")
-
-        except FileNotFoundError:
-            print(f"❌ Erreur : L'interpréteur Python '{sys.executable}' ou le script '{sync_script_path}' est introuvable.")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Erreur lors de l'exécution du script de synchronisation : {e}")
-        except Exception as e:
-            print(f"❌ Une erreur inattendue est survenue lors du lancement de la synchronisation : {e}")
-    else:
-        print("\nPour synchroniser ces paroles, relancez avec l'option --sync.")
+    try:
+        # Sauvegarde des paroles brutes, puis synchronisation dans ce même processus si demandée
+        pipeline.write(job)
+        if args.sync:
+            print(f"\n🔄 Synchronisation ({args.sync_mode}) pour {job.mp3_path} et {job.txt_path}...")
+            pipeline.normalize(job)
+            pipeline.sync(job)
+            pipeline.write(job)
+        else:
+            print("\nPour synchroniser ces paroles, relancez avec l'option --sync.")
+    except PipelineError as e:
+        print(f"❌ {e}")
 
 if __name__ == "__main__":
     main()
@@ -1,2 +1,8 @@
 #!/bin/env bash
-./lyrics_fetcher_cli.py "$(lsof  -c mplayer -F 2>/dev/null | cut -c 2- | grep '\.mp3')"
+current="$(lsof  -c mplayer -F 2>/dev/null | cut -c 2- | grep '\.mp3')"
+./lyrics_fetcher_cli.py "$current"
+status=$?
+# Préchargement en arrière-plan des morceaux suivants du répertoire, une fois la recherche du
+# morceau courant terminée (les deux processus ne se disputent pas les mêmes sites).
+nice ./lyrics_fetcher_cli.py prefetch --after "$current" >/dev/null 2>&1 &
+exit $status
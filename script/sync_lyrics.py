@@ -4,17 +4,21 @@
 """
 Script pour synchroniser des paroles non synchronisées avec un fichier audio MP3
 et générer un fichier de paroles synchronisées au format LRC (Enhanced LRC).
+
+Interface en ligne de commande des étapes normalize → sync → write de
+lyrics_fetcher/pipeline.py ; les modes de synchronisation sont dans
+lyrics_fetcher/sync.py.
 """
 
 import argparse
 import os
-import time
-import pygame # Ajout de pygame
-from mutagen.easyid3 import EasyID3 # Ajout pour les métadonnées MP3
+from concurrent.futures import ProcessPoolExecutor
+from lyrics_fetcher.library import get_library
+from lyrics_fetcher.pipeline import LyricsPipeline, TrackJob
 
 class LyricsSyncer:
     """
-    Classe pour gérer la synchronisation des paroles.
+    Classe pour gérer la synchronisation des paroles d'un couple (.mp3, .txt).
     """
     def __init__(self, mp3_path, lyrics_path, output_path=None):
         self.mp3_path = mp3_path
@@ -26,135 +30,68 @@ class LyricsSyncer:
         if not os.path.exists(self.lyrics_path):
             raise FileNotFoundError(f"Fichier de paroles non trouvé : {self.lyrics_path}")
 
-        self.raw_lyrics_lines = self._load_raw_lyrics()
-        self.synced_lyrics = [] # Contiendra les lignes [mm:ss.xx]Paroles
+        self.pipeline = LyricsPipeline(write_txt=False)
+        self.job = TrackJob(self.mp3_path, txt_path=self.lyrics_path, lrc_path=self.output_path)
+        self.pipeline.metadata(self.job)
+        if self.job.tag_error:
+            print(f"Avertissement : Impossible de lire les métadonnées ID3 du MP3 : {self.job.tag_error}")
+        self.pipeline.load_text(self.job)
+        self.pipeline.normalize(self.job)
 
     def _generate_output_path(self):
         """Génère un chemin de sortie par défaut pour le fichier .lrc."""
         base, _ = os.path.splitext(self.mp3_path)
         return f"{base}.lrc"
 
-    def _load_raw_lyrics(self):
-        """Charge les lignes de paroles depuis le fichier .txt."""
-        with open(self.lyrics_path, 'r', encoding='utf-8') as f:
-            lines = [line.strip() for line in f if line.strip()]
-        return lines
+    @property
+    def synced_lyrics(self):
+        return self.job.synced
 
-    def _format_time(self, seconds_float):
-        """Convertit un temps en secondes (float) au format mm:ss.xx."""
-        minutes = int(seconds_float // 60)
-        seconds = int(seconds_float % 60)
-        hundredths = int((seconds_float - (minutes * 60) - seconds) * 100)
-        return f"{minutes:02d}:{seconds:02d}.{hundredths:02d}"
+    def _sync(self, mode, latency_ms=None):
+        self.pipeline.latency_ms = latency_ms
+        self.pipeline.sync(self.job, mode)
+        self.pipeline.write(self.job)
 
     def sync_manually_per_line(self):
-        """
-        Permet à l'utilisateur de synchroniser les paroles manuellement ligne par ligne.
-        L'utilisateur appuie sur une touche pour marquer le début de chaque ligne.
-        """
-        print(f"Chargement du MP3 : {self.mp3_path}")
-        print("Préparez-vous à synchroniser les paroles.")
-        print("Appuyez sur Entrée au moment où chaque ligne de parole commence.")
-        print("Appuyez sur 'q' puis Entrée pour quitter en cours de synchronisation.")
-        print("-" * 30)
-
-        playback_started = False
-        # Initialisation de start_time pour le cas où pygame échoue complètement
-        start_time = time.time()
-
-        try:
-            # Essai d'initialisation de pygame.mixer avec des paramètres spécifiques
-            try:
-                pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=2048)
-            except pygame.error as e_init_specific:
-                print(f"Avertissement : Erreur lors de l'initialisation de pygame.mixer (paramètres spécifiques): {e_init_specific}")
-                print("Tentative d'initialisation avec les paramètres par défaut.")
-                pygame.mixer.init() # Essai avec les paramètres par défaut si le premier échoue
-
-            # Si l'initialisation a réussi, on charge et joue la musique
-            pygame.mixer.music.load(self.mp3_path)
-            print(f"Lecture de : {self.mp3_path}")
-            pygame.mixer.music.play()
-            start_time = time.time() # Récupérer le temps de début réel APRES le play()
-            playback_started = True
-
-        except pygame.error as e_pygame:
-            # Cette exception attrape les erreurs de init() par défaut ou de load()/play()
-            print(f"Erreur Pygame : {e_pygame}")
-            print("La synchronisation se fera sans lecture audio réelle (simulation du temps).")
-            # start_time est déjà initialisé pour la simulation
-            # playback_started reste False
-
-        for i, line in enumerate(self.raw_lyrics_lines):
-            print(f"\nProchaine ligne ({i+1}/{len(self.raw_lyrics_lines)}):")
-            print(f"🎵 {line} 🎵")
-
-            user_input = input("Appuyez sur Entrée ou 'q' pour quitter: ")
-            if user_input.lower() == 'q':
-                print("Synchronisation annulée par l'utilisateur.")
-                self.synced_lyrics = [] # Vider pour ne pas sauvegarder un fichier partiel
-                break
-
-            current_timestamp_sec = time.time() - start_time
-            formatted_time = self._format_time(current_timestamp_sec)
-            self.synced_lyrics.append(f"[{formatted_time}]{line}")
-            print(f"-> Ligne enregistrée à {formatted_time}")
-
-        if playback_started:
-            pygame.mixer.music.stop()
-            pygame.mixer.quit()
-
-        print("\nSynchronisation terminée.")
-        self._save_lrc_file()
-
-    def _save_lrc_file(self):
-        """Sauvegarde les paroles synchronisées dans un fichier .lrc."""
-        if not self.synced_lyrics:
-            print("Aucune parole synchronisée à sauvegarder.")
-            return
-
-        # Ajout de tags d'identification
-        lrc_content = []
-
-        title = "Unknown Title"
-        artist = "Unknown Artist"
-        album = "Unknown Album"
-
-        try:
-            audio_meta = EasyID3(self.mp3_path)
-            if "title" in audio_meta:
-                title = audio_meta["title"][0]
-            if "artist" in audio_meta:
-                artist = audio_meta["artist"][0]
-            if "album" in audio_meta:
-                album = audio_meta["album"][0]
-        except Exception as e:
-            print(f"Avertissement : Impossible de lire les métadonnées ID3 du MP3 : {e}")
-
-        lrc_content.append(f"[ti:{title}]")
-        lrc_content.append(f"[ar:{artist}]")
-        lrc_content.append(f"[al:{album}]")
-        lrc_content.append(f"[by:Autolyrics Syncer v0.1]")
-
-        lrc_content.extend(self.synced_lyrics)
-
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            for line in lrc_content:
-                f.write(line + "\n")
-        print(f"Fichier LRC sauvegardé : {self.output_path}")
-
-    def sync_manually_per_word(self):
-        """
-        Permet à l'utilisateur de synchroniser les paroles mot par mot.
-        (Plus complexe, à implémenter dans une future itération)
-        """
-        print("La synchronisation mot par mot n'est pas encore implémentée.")
-        # Logique possible:
-        # 1. Afficher la ligne entière.
-        # 2. Lire la ligne (synthèse vocale ou le chanteur).
-        # 3. L'utilisateur appuie sur une touche pour chaque mot.
-        # 4. Nécessite une interface plus interactive (ex: avec curses, PySimpleGUI, ou web).
-        pass
+        """L'utilisateur appuie sur Entrée pour marquer le début de chaque ligne."""
+        self._sync("line")
+
+    def sync_manually_per_word(self, latency_ms=None):
+        """Une touche par mot (Enhanced LRC), latence mesurée par calibrage si latency_ms est None."""
+        self._sync("word", latency_ms)
+
+    def sync_automatically(self):
+        """Synchronisation sans intervention d'après l'activité vocale détectée dans l'audio."""
+        self._sync("auto")
+
+
+def _auto_sync_task(paths):
+    """Synchronisation automatique d'un morceau, exécutée dans un processus du pool."""
+    mp3_path, lyrics_path = paths
+    try:
+        LyricsSyncer(mp3_path, lyrics_path).sync_automatically()
+        return mp3_path, None
+    except Exception as e:
+        return mp3_path, str(e)
+
+
+def sync_batch_automatically(paths, jobs=None, overwrite=False):
+    """Synchronise automatiquement chaque .mp3 de `paths` ayant un .txt et pas encore de .lrc."""
+    from lyrics_fetcher.tags import default_lyrics_txt_path
+
+    library = get_library()
+    library.scan(paths, workers=jobs)
+    tracks = library.with_lyrics(paths) if overwrite else library.without_sync(paths)
+    tasks = [(track.path, default_lyrics_txt_path(track.path)) for track in tracks]
+    print(f"{len(tasks)} morceau(x) à synchroniser.")
+
+    errors = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for mp3_path, error in pool.map(_auto_sync_task, tasks):
+            if error:
+                errors += 1
+                print(f"❌ {mp3_path} : {error}")
+    print(f"Terminé : {len(tasks) - errors} fichier(s) .lrc écrit(s), {errors} erreur(s).")
 
 
 def main():
@@ -162,17 +99,33 @@ def main():
         description="Synchronise un fichier de paroles (.txt) avec un fichier audio (.mp3) "
                     "pour créer un fichier .lrc."
     )
-    parser.add_argument("mp3_path", help="Chemin vers le fichier .mp3")
-    parser.add_argument("lyrics_path", help="Chemin vers le fichier .txt des paroles non synchronisées")
+    parser.add_argument("mp3_path", nargs="?", help="Chemin vers le fichier .mp3")
+    parser.add_argument("lyrics_path", nargs="?", help="Chemin vers le fichier .txt des paroles non synchronisées")
     parser.add_argument("-o", "--output", help="Chemin vers le fichier .lrc de sortie (optionnel)")
     parser.add_argument(
         "--mode",
-        choices=["line", "word"],
+        choices=["line", "word", "auto"],
         default="line",
-        help="Mode de synchronisation: 'line' (ligne par ligne) ou 'word' (mot par mot, non implémenté)."
+        help="Mode de synchronisation: 'line' (ligne par ligne), 'word' (mot par mot, Enhanced LRC) "
+             "ou 'auto' (d'après l'activité vocale détectée dans l'audio)."
     )
+    parser.add_argument("--latency", type=int, default=None, metavar="MS",
+                        help="Mode 'word' : latence à retrancher (ms), au lieu du calibrage en début de séance.")
+    parser.add_argument("--batch", nargs="+", metavar="CHEMIN",
+                        help="Mode 'auto' : synchronise tous les .mp3 de ces fichiers/répertoires "
+                             "qui ont un .txt et pas encore de .lrc.")
+    parser.add_argument("-j", "--jobs", type=int, default=None,
+                        help="Processus pour --batch (défaut: nombre de CPU).")
+    parser.add_argument("--overwrite", action="store_true", help="Avec --batch : remplacer les .lrc existants.")
 
     args = parser.parse_args()
+    if args.batch:
+        if args.mode != "auto":
+            parser.error("--batch n'est disponible qu'avec --mode auto")
+        sync_batch_automatically(args.batch, args.jobs, args.overwrite)
+        return
+    if not args.mp3_path or not args.lyrics_path:
+        parser.error("mp3_path et lyrics_path sont requis (sauf avec --batch)")
 
     try:
         syncer = LyricsSyncer(args.mp3_path, args.lyrics_path, args.output)
@@ -180,7 +133,9 @@ def main():
         if args.mode == "line":
             syncer.sync_manually_per_line()
         elif args.mode == "word":
-            syncer.sync_manually_per_word()
+            syncer.sync_manually_per_word(args.latency)
+        elif args.mode == "auto":
+            syncer.sync_automatically()
 
     except FileNotFoundError as e:
         print(f"Erreur : {e}")
@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# Les modules sont importés comme par lyrics_fetcher_cli.py, depuis le répertoire script/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    """Cache, statistiques et état du trafic dans un répertoire temporaire propre à chaque test."""
+    monkeypatch.setenv("AUTOLYRICS_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path / "cache"
@@ -0,0 +1,107 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import pytest
+
+from lyrics_fetcher import batch
+from lyrics_fetcher.batch import STATUS_DONE, STATUS_NOT_FOUND, Manifest, run_batch
+from lyrics_fetcher.cache import CachedLyrics
+from lyrics_fetcher.library import Track
+from lyrics_fetcher.pipeline import LyricsPipeline
+
+
+class FakeLibrary:
+    """Index sans mutagen : chaque piste a pour titre le nom de son fichier."""
+
+    def scan(self, paths, workers=None):
+        pass
+
+    def get(self, mp3_path):
+        name = mp3_path.rsplit("/", 1)[-1][:-4]
+        return Track(mp3_path, 0, 0, name, "Artiste", None, None, False, False, None)
+
+
+@pytest.fixture
+def music(tmp_path, monkeypatch):
+    root = tmp_path / "music"
+    root.mkdir()
+    for i in range(5):
+        (root / f"piste{i}.mp3").write_bytes(b"")
+    monkeypatch.setattr(batch, "get_library", FakeLibrary)
+    monkeypatch.setattr(LyricsPipeline, "write", lambda self, job: None)
+    return root
+
+
+def _lookup_with(looked_up, gate=None):
+    def lookup(self, job):
+        if gate is not None and len(looked_up) == 2:
+            gate.blocked.set()
+            gate.cancelled.wait(5)
+        looked_up.append(job.title)
+        found = job.title != "piste3"
+        job.entry = CachedLyrics("paroles" if found else None, "genius" if found else None, None, 0.0)
+        return job
+    return lookup
+
+
+class CtrlC:
+    """Ctrl-C dans le thread principal après deux pistes, pendant que la troisième est en cours."""
+
+    def __init__(self, monkeypatch):
+        self.blocked = threading.Event()
+        self.cancelled = threading.Event()
+        gate = self
+
+        class Executor(ThreadPoolExecutor):
+            def shutdown(self, wait=True, *, cancel_futures=False):
+                super().shutdown(wait=False, cancel_futures=cancel_futures)
+                if cancel_futures:
+                    gate.cancelled.set()
+                if wait:
+                    super().shutdown(wait=True)
+
+        def interrupted(futures):
+            completed = as_completed(futures)
+            yield next(completed)
+            yield next(completed)
+            self.blocked.wait(5)
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(batch, "ThreadPoolExecutor", Executor)
+        monkeypatch.setattr(batch, "as_completed", interrupted)
+
+
+def test_manifest_last_entry_wins_and_truncated_line_is_ignored(tmp_path):
+    path = tmp_path / "manifest.jsonl"
+    manifest = Manifest(str(path))
+    manifest.record("/a.mp3", STATUS_NOT_FOUND)
+    manifest.record("/a.mp3", STATUS_DONE, provider="genius")
+    manifest.close()
+    with open(path, "a", encoding="utf-8") as f:
+        f.write('{"path": "/b.mp3", "sta')
+    reloaded = Manifest(str(path))
+    reloaded.close()
+    assert reloaded.status("/a.mp3") == STATUS_DONE
+    assert reloaded.status("/b.mp3") is None
+
+
+def test_interrupted_batch_resumes_where_it_stopped(music, monkeypatch):
+    looked_up = []
+    monkeypatch.setattr(LyricsPipeline, "lookup", _lookup_with(looked_up, CtrlC(monkeypatch)))
+    with pytest.raises(KeyboardInterrupt):
+        run_batch([str(music)], jobs=1, use_cache=False)
+    # la recherche en cours se termine, celles en attente sont abandonnées
+    assert looked_up == ["piste0", "piste1", "piste2"]
+
+    manifest = Manifest(str(music / batch.MANIFEST_NAME))
+    manifest.close()
+    statuses = {path.rsplit("/", 1)[-1]: entry["status"] for path, entry in manifest.entries.items()}
+    assert statuses == {"piste0.mp3": STATUS_DONE, "piste1.mp3": STATUS_DONE, "piste2.mp3": STATUS_DONE}
+
+    monkeypatch.setattr(batch, "ThreadPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch, "as_completed", as_completed)
+    resumed = []
+    monkeypatch.setattr(LyricsPipeline, "lookup", _lookup_with(resumed))
+    counts = run_batch([str(music)], jobs=1, use_cache=False)
+    assert resumed == ["piste3", "piste4"]
+    assert counts == {STATUS_DONE: 4, STATUS_NOT_FOUND: 1}
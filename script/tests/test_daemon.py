@@ -0,0 +1,32 @@
+from lyrics_fetcher.daemon import NowPlayingDaemon
+
+
+def test_unexpected_error_in_lookup_is_shown(monkeypatch, capsys):
+    daemon = NowPlayingDaemon(use_cache=False)
+
+    def broken(job):
+        raise OSError("disque illisible")
+
+    monkeypatch.setattr(daemon.pipeline, "metadata", broken)
+    try:
+        daemon.on_track("/music/chanson.mp3")
+        daemon._lookups.shutdown(wait=True)
+    finally:
+        daemon.close()
+    out = capsys.readouterr().out
+    assert "❌ Erreur inattendue pour /music/chanson.mp3 : OSError: disque illisible" in out
+
+
+def test_same_track_is_handled_again_after_mplayer_stops(monkeypatch):
+    daemon = NowPlayingDaemon(use_cache=False)
+    handled = []
+    monkeypatch.setattr(daemon, "_handle", handled.append)
+    try:
+        daemon.on_track("/music/a.mp3")
+        daemon.on_track("/music/a.mp3")
+        daemon.on_stop()
+        daemon.on_track("/music/a.mp3")
+        daemon._lookups.shutdown(wait=True)
+    finally:
+        daemon.close()
+    assert handled == ["/music/a.mp3", "/music/a.mp3"]
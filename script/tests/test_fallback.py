@@ -0,0 +1,100 @@
+import threading
+
+import pytest
+
+from lyrics_fetcher import cache, fallback, instrumentation, romaji, traffic
+from lyrics_fetcher.utils import LookupIncomplete
+
+ROMAJI = "kimi no koe ga kikoeru yo\nsora no mukou made\n" * 3
+KANA = "きみのこえがきこえるよ\nそらのむこうまで\n" * 3
+KANJI = "君の声が聞こえるよ\n空の向こうまで\n" * 3
+
+
+@pytest.fixture(autouse=True)
+def offline(monkeypatch):
+    """Ni statistiques persistantes, ni état de trafic partagé, ni lecteur de kanji."""
+    monkeypatch.setattr(instrumentation, "persist_outcomes", lambda artist, outcomes: None)
+    monkeypatch.setitem(traffic._config, "state_path", None)
+    traffic.reset()
+    monkeypatch.setitem(romaji._config, "kanji_reader", romaji.DictionaryReader({}))
+
+
+def source(lyrics=None, wait=None, error=None):
+    """Fausse source : attend éventuellement `wait` (threading.Event), puis renvoie `lyrics` ou lève `error`."""
+    def find(title, artist):
+        if wait is not None:
+            wait.wait(5)
+        if error is not None:
+            raise error
+        return lyrics
+    return find
+
+
+def find(*providers, **options):
+    return fallback.find_romaji_lyrics("Titre", "Artiste", providers=list(providers), **options)
+
+
+def test_highest_priority_hit_wins():
+    match = find(("a", source()), ("b", source(ROMAJI)), ("c", source(ROMAJI.upper())))
+    assert match.provider == "b"
+    assert match.romaji
+    assert match.confirmed_by == ("c",)
+
+
+def test_lower_priority_hit_waits_for_higher_priority_source():
+    release = threading.Event()
+    threading.Timer(0.1, release.set).start()
+    match = find(("a", source(ROMAJI, wait=release)), ("b", source("other lyrics entirely " * 5)))
+    assert match.provider == "a"
+
+
+def test_kana_hit_is_converted_and_wins():
+    match = find(("j_lyric", source(KANA)), ("nautiljon", source(ROMAJI)))
+    assert match.provider == "j_lyric"
+    assert match.romaji
+    assert match.lyrics.startswith("kiminokoegakikoeruyo")
+
+
+def test_unconvertible_hit_does_not_end_the_race():
+    match = find(("j_lyric", source(KANJI)), ("nautiljon", source(ROMAJI)))
+    assert match.provider == "nautiljon"
+    assert match.romaji
+
+
+def test_unconvertible_hit_is_last_resort_and_not_cached(isolated_cache):
+    match = find(("j_lyric", source(KANJI)), ("nautiljon", source()))
+    assert match.provider == "j_lyric"
+    assert match.lyrics == KANJI
+    assert not match.romaji
+
+    lyrics_cache = cache.LyricsCache()
+    providers = [("j_lyric", source(KANJI))]
+    entry = cache.find_romaji_lyrics_cached("Titre", "Artiste", cache=lyrics_cache, providers=providers)
+    assert entry.lyrics == KANJI
+    assert lyrics_cache.get("Titre", "Artiste") is None
+
+
+def test_all_misses_return_none_and_errors_are_incomplete():
+    assert find(("a", source()), ("b", source())) is None
+    with pytest.raises(LookupIncomplete):
+        find(("a", source(error=RuntimeError("boom"))), ("b", source()))
+    match = find(("a", source(error=RuntimeError("boom"))), ("b", source(ROMAJI)))
+    assert match.provider == "b"
+
+
+def test_deadline_returns_best_finished_hit():
+    never = threading.Event()
+    match = find(("slow", source(ROMAJI, wait=never)), ("kana", source(KANJI)), ("fast", source(ROMAJI)),
+                 deadline=0.3)
+    assert match.provider == "fast"
+    match = find(("slow", source(ROMAJI, wait=never)), ("kana", source(KANJI)), deadline=0.3)
+    assert match.provider == "kana"
+    assert not match.romaji
+    with pytest.raises(LookupIncomplete):
+        find(("slow", source(ROMAJI, wait=never)), ("empty", source()), deadline=0.3)
+
+
+def test_restricted_provider_miss_is_not_cached():
+    lyrics_cache = cache.LyricsCache()
+    cache.find_romaji_lyrics_cached("Titre", "Artiste", cache=lyrics_cache, providers=[("genius", source())])
+    assert lyrics_cache.get("Titre", "Artiste") is None
@@ -0,0 +1,84 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from lyrics_fetcher import fetch
+from lyrics_fetcher.parsing import extract_lyrics, lyrics_watcher
+
+ETAG = '"v1"'
+LYRICS_PAGE = (
+    b'<html><body><div id="lyrics-root"><div data-lyrics-container="true">Kimi no na wa</div></div>'
+    + b"<p>commentaires</p>" * 20000
+    + b"</body></html>"
+)
+
+
+class PageHandler(BaseHTTPRequestHandler):
+    """Page Genius factice avec ETag ; note les en-têtes conditionnels reçus."""
+
+    conditional = []
+
+    def do_GET(self):
+        self.conditional.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(LYRICS_PAGE)))
+        self.end_headers()
+        try:
+            self.wfile.write(LYRICS_PAGE)
+        except ConnectionError:
+            pass  # lecture arrêtée par le client
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(monkeypatch):
+    PageHandler.conditional = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), PageHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    # Cache HTTP rouvert dans le répertoire du test, configuration d'origine rétablie ensuite.
+    monkeypatch.setattr(fetch, "_http_cache", None)
+    monkeypatch.setattr(fetch, "_config", dict(fetch._config))
+    fetch.configure()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/paroles"
+    httpd.shutdown()
+    httpd.server_close()
+    if fetch._http_cache is not None:
+        fetch._http_cache.close()
+    fetch.configure()
+
+
+def test_page_stopped_by_watcher_is_cached_and_revalidated(server):
+    first = fetch.fetch(server, stop=lyrics_watcher("genius"))
+    assert not first.truncated
+    assert len(first.content) < len(LYRICS_PAGE)
+    assert extract_lyrics("genius", first.content) == "Kimi no na wa"
+
+    second = fetch.fetch(server, stop=lyrics_watcher("genius"))
+    assert PageHandler.conditional == [None, ETAG]
+    assert second.from_cache
+    assert second.content == first.content
+
+
+def test_page_cut_by_size_limit_is_truncated_and_not_cached(server):
+    fetch.configure(max_body_bytes=64 * 1024)
+    first = fetch.fetch(server)
+    assert first.truncated
+    assert len(first.content) < len(LYRICS_PAGE)
+
+    second = fetch.fetch(server)
+    assert PageHandler.conditional == [None, None]
+    assert not second.from_cache
+
+
+def test_full_page_is_read_without_watcher(server):
+    page = fetch.fetch(server)
+    assert page.ok and not page.truncated
+    assert page.content == LYRICS_PAGE
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from lyrics_fetcher import library
+from lyrics_fetcher.library import LibraryIndex, ScanStats
+
+
+@pytest.fixture
+def parsed(monkeypatch):
+    """Chemins dont les tags ont été lus, dans l'ordre."""
+    calls = []
+
+    def read_track_tags(mp3_path):
+        calls.append(os.path.basename(mp3_path))
+        return os.path.basename(mp3_path)[:-4], "Artiste", None, 180.0, None
+
+    monkeypatch.setattr(library, "read_track_tags", read_track_tags)
+    return calls
+
+
+@pytest.fixture
+def music(tmp_path):
+    root = tmp_path / "music"
+    (root / "album").mkdir(parents=True)
+    for name in ("a.mp3", "b.mp3", "album/c.mp3"):
+        (root / name).write_bytes(b"ID3")
+    return root
+
+
+@pytest.fixture
+def index(isolated_cache):
+    isolated_cache.mkdir(parents=True, exist_ok=True)
+    index = LibraryIndex(str(isolated_cache / "library.db"))
+    yield index
+    index.close()
+
+
+def test_rescan_only_parses_new_or_modified_files(index, music, parsed):
+    assert index.scan([str(music)]) == ScanStats(3, 3, 0)
+    assert sorted(parsed) == ["a.mp3", "b.mp3", "c.mp3"]
+
+    parsed.clear()
+    assert index.scan([str(music)]) == ScanStats(3, 0, 0)
+    assert parsed == []
+
+    (music / "b.mp3").write_bytes(b"ID3 v2")
+    (music / "d.mp3").write_bytes(b"ID3")
+    assert index.scan([str(music)]) == ScanStats(4, 2, 0)
+    assert sorted(parsed) == ["b.mp3", "d.mp3"]
+
+
+def test_sidecars_and_removed_files_are_updated_without_parsing(index, music, parsed):
+    index.scan([str(music)])
+    parsed.clear()
+    (music / "a.txt").write_text("paroles", encoding="utf-8")
+    (music / "album" / "c.mp3").unlink()
+
+    assert index.scan([str(music)]) == ScanStats(2, 0, 1)
+    assert parsed == []
+    assert index.get(str(music / "a.mp3")).has_txt
+    assert index.get(str(music / "album" / "c.mp3")) is None
+    assert [track.path for track in index.without_lyrics()] == [str(music / "b.mp3")]
+
+
+def test_track_reads_tags_again_only_after_a_change(index, music, parsed):
+    path = str(music / "a.mp3")
+    assert index.track(path).title == "a"
+    assert index.track(path).title == "a"
+    assert parsed == ["a.mp3"]
+
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    index.track(path)
+    assert parsed == ["a.mp3", "a.mp3"]
@@ -0,0 +1,98 @@
+from lyrics_fetcher import lrc
+from lyrics_fetcher.lrc import LrcLine, LrcTag
+
+
+ENHANCED = "[00:01.00]intro <00:01.50>mot <00:02.00>fin <00:02.50>\n"
+
+
+def test_timestamps_are_exact_milliseconds():
+    assert lrc.parse_timestamp("01", "02", "5") == 62500
+    assert lrc.parse_timestamp("01", "02", "05") == 62050
+    assert lrc.parse_timestamp("01", "02", "005") == 62005
+    assert lrc.parse_timestamp("0", "7") == 7000
+    assert lrc.format_timestamp(62050) == "01:02.05"
+    assert lrc.format_timestamp(62006) == "01:02.01"
+    assert lrc.format_timestamp(-30) == "00:00.00"
+
+
+def test_iter_lrc_tags_and_lines():
+    items = list(lrc.iter_lrc(["\ufeff[ti: Titre ]\n", "[00:12.00][01:10.50]refrain\n", "\n", "# commentaire\n"]))
+    assert items[0] == LrcTag("ti", "Titre")
+    assert isinstance(items[1], LrcLine)
+    assert list(items[1].times) == [12000, 70500]
+    assert items[1].text == "refrain"
+    assert len(items) == 2
+
+
+def test_iter_lrc_keep_other_returns_raw_lines():
+    items = list(lrc.iter_lrc(["# commentaire\n", "\n", "texte libre\n"], keep_other=True))
+    assert items == ["# commentaire", "", "texte libre"]
+
+
+def test_enhanced_line_keeps_lead_and_end_stamp():
+    line = next(lrc.iter_lrc([ENHANCED]))
+    assert line.lead == "intro "
+    assert line.words == ["mot ", "fin ", ""]
+    assert list(line.word_times) == [1500, 2000, 2500]
+    assert line.text == "intro mot fin"
+
+
+def test_round_trip_preserves_enhanced_line():
+    text = "[ti:Titre]\n[00:01.00]un\n" + ENHANCED + "[00:03.00][00:04.00]deux\n"
+    assert lrc.dumps(lrc.loads(text)) == text
+
+
+def test_shift_and_scale():
+    lyrics = lrc.loads("[00:01.00]a\n" + ENHANCED)
+    lyrics.shift(-1500)
+    assert list(lyrics.times) == [0, 0]
+    assert list(lyrics.word_times) == [0, 500, 1000]
+    lyrics = lrc.loads("[00:10.00]a\n").scale(1.5, pivot=2000)
+    assert list(lyrics.times) == [14000]
+
+
+def test_apply_offset_and_merge():
+    romaji = lrc.loads("[offset:500]\n[00:02.00]kimi\n")
+    translation = lrc.loads("[00:01.00]toi\n[ar:Artiste]\n")
+    merged = romaji.merge(translation)
+    assert "offset" not in merged.tags
+    assert merged.tags["ar"] == "Artiste"
+    assert [merged.line(i).text for i in range(len(merged))] == ["toi", "kimi"]
+    assert list(merged.times) == [1000, 1500]
+
+
+def test_next_event_includes_word_stamps():
+    lyrics = lrc.loads(ENHANCED + "[00:04.00]suite\n")
+    assert lyrics.index_at(500) == -1
+    assert lyrics.next_event(1600) == 2000
+    assert lyrics.next_event(2600) == 4000
+    assert lyrics.next_event(4000) is None
+
+
+def test_transform_file_preserves_other_lines(tmp_path):
+    path = tmp_path / "song.lrc"
+    path.write_text("[ti:Titre]\n# commentaire\n" + ENHANCED + "ligne sans horodatage\n\n[00:03.00]simple\n",
+                    encoding="utf-8")
+    assert lrc.transform_file(str(path), shift=100) == 2
+    assert path.read_text(encoding="utf-8") == (
+        "[ti:Titre]\n# commentaire\n"
+        "[00:01.10]intro <00:01.60>mot <00:02.10>fin <00:02.60>\n"
+        "ligne sans horodatage\n\n[00:03.10]simple\n"
+    )
+
+
+def test_transform_file_to_output(tmp_path):
+    source, target = tmp_path / "in.lrc", tmp_path / "out.lrc"
+    source.write_text("[00:10.00]a\n", encoding="utf-8")
+    lrc.transform_file(str(source), factor=2.0, output=str(target))
+    assert source.read_text(encoding="utf-8") == "[00:10.00]a\n"
+    assert target.read_text(encoding="utf-8") == "[00:20.00]a\n"
+
+
+def test_parse_sorts_multi_stamp_and_unordered_lines():
+    lyrics = lrc.loads("[00:10.00][01:20.00]refrain\n[00:30.00]couplet\n[00:05.00]intro\n")
+    assert list(lyrics.times) == [5000, 10000, 30000, 80000]
+    assert [lyrics.line(i).text for i in range(len(lyrics))] == ["intro", "refrain", "couplet", "refrain"]
+    assert lyrics.line(lyrics.index_at(85000)).text == "refrain"
+    assert lyrics.line(lyrics.index_at(31000)).text == "couplet"
+    assert lrc.dumps(lyrics) == "[00:05.00]intro\n[00:10.00][01:20.00]refrain\n[00:30.00]couplet\n"
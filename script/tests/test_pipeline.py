@@ -0,0 +1,9 @@
+from lyrics_fetcher.pipeline import LyricsPipeline, TrackJob
+
+
+def test_normalize_keeps_every_non_empty_line():
+    job = TrackJob("/music/chanson.mp3")
+    job.title, job.artist = "Titre", "Artiste"
+    job.lyrics_text = "Titre - Artiste\n\n  kimi no koe  \n\nsora no mukou\n"
+    LyricsPipeline().normalize(job)
+    assert job.lines == ["Titre - Artiste", "kimi no koe", "sora no mukou"]
@@ -0,0 +1,90 @@
+import pytest
+
+from lyrics_fetcher import query, romaji
+from lyrics_fetcher.query import QueryVariant
+
+
+@pytest.fixture
+def kanji_reader(monkeypatch):
+    """Lecteur des kanji du test (indépendant de pykakasi et de $AUTOLYRICS_KANJI_DICT)."""
+    def use(entries):
+        monkeypatch.setitem(romaji._config, "kanji_reader", romaji.DictionaryReader(entries))
+    use({})
+    return use
+
+
+@pytest.mark.parametrize("title, forms", [
+    ("Gurenge (TV Size)", ["Gurenge"]),
+    ("Blue Bird - TV Size", ["Blue Bird"]),
+    ("Ｓｏｎｇ feat. X", ["Song"]),
+    ("紅蓮華 (Gurenge)", ["紅蓮華", "Gurenge"]),
+    ("(K)NoW_NAME", ["(K)NoW_NAME"]),
+    ("【Re:Zero】", ["【Re:Zero】"]),
+])
+def test_title_forms(title, forms):
+    assert query.title_forms(title) == forms
+
+
+@pytest.mark.parametrize("artist, forms", [
+    ("LiSA, Uru", ["LiSA"]),
+    ("A feat. B", ["A"]),
+    ("LiSA (織部里沙)", ["LiSA", "織部里沙"]),
+])
+def test_artist_forms(artist, forms):
+    assert query.artist_forms(artist) == forms
+
+
+def test_query_variants_order_and_limit():
+    assert query.query_variants("Gurenge", "LiSA") == [QueryVariant("Gurenge", "LiSA")]
+    assert query.query_variants("紅蓮華 (Gurenge)", "LiSA (織部里沙)") == [
+        QueryVariant("紅蓮華", "LiSA"),
+        QueryVariant("Gurenge", "LiSA"),
+        QueryVariant("紅蓮華", "織部里沙"),
+    ]
+    assert len(query.query_variants("a (b) (c) (d)", "x")) == 3
+    assert len(query.query_variants("a (b) (c) (d)", "x", limit=2)) == 2
+
+
+def test_url_words_drop_site_words_and_identifiers():
+    assert query.url_words("https://genius.com/Genius-romanizations-lisa-gurenge-romanized-lyrics") == ["lisa", "gurenge"]
+    assert query.url_words("https://j-lyric.net/artist/a05c4f2/l04b8d3.html") == []
+
+
+def test_score_url(kanji_reader):
+    assert query.score_url("https://genius.com/Lisa-gurenge-lyrics", "Gurenge (TV Size)", "LiSA") == 1.0
+    assert query.score_url("https://genius.com/Lisa-homura-lyrics", "Gurenge", "LiSA") < 0.5
+    # Identifiants opaques : pas de jugement possible.
+    assert query.score_url("https://mojim.com/twy105842x2x1.htm", "Gurenge", "LiSA") is None
+    # Kana convertis, espaces ignorés : "kiminokoe" correspond à "kimi-no-koe".
+    assert query.score_url("https://genius.com/Aimer-kimi-no-koe-lyrics", "きみのこえ", "Aimer") == 1.0
+    # Kanji sans lecture connue face à une URL en romaji : pas de jugement, sauf alias.
+    assert query.score_url("https://genius.com/Lisa-gurenge-lyrics", "紅蓮華", "LiSA") is None
+    assert query.score_url("https://genius.com/Lisa-gurenge-lyrics", "紅蓮華 (Gurenge)", "LiSA") == 1.0
+    kanji_reader({"紅蓮華": "ぐれんげ"})
+    assert query.score_url("https://genius.com/Lisa-gurenge-lyrics", "紅蓮華", "LiSA") == 1.0
+
+
+def test_rank_urls_orders_filters_and_keeps_unscored():
+    urls = [
+        "https://genius.com/Lisa-homura-lyrics",
+        "https://mojim.com/twy105842x2x1.htm",
+        "https://genius.com/Lisa-guren-lyrics",
+        "https://genius.com/Lisa-gurenge-lyrics",
+    ]
+    assert query.rank_urls(urls, "Gurenge", "LiSA") == [
+        "https://genius.com/Lisa-gurenge-lyrics",
+        "https://genius.com/Lisa-guren-lyrics",
+        "https://mojim.com/twy105842x2x1.htm",
+    ]
+    assert query.rank_scored([(0.2, "a"), (None, "b")], min_score=0.1) == ["a", "b"]
+
+
+def test_lyrics_agree(kanji_reader):
+    full = "kimi no koe ga kikoeru yo\nsora no mukou made\n" * 4
+    assert query.lyrics_agree(full, "kimi no koe ga kikoeru yo\n" * 2)  # version TV Size
+    assert query.lyrics_agree(full, "kiminokoegakikoeruyo soranomukoumade") is True  # découpage différent
+    assert query.lyrics_agree(full, "sakura chiru hanabira no naka de\n" * 4) is False
+    assert query.lyrics_agree(full, "") is None
+    # Kana comparés après conversion ; kanji illisibles : pas comparables.
+    assert query.lyrics_agree(full, "きみのこえがきこえるよ\nそらのむこうまで\n") is True
+    assert query.lyrics_agree(full, "君の声が聞こえるよ\n") is None
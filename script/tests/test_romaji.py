@@ -0,0 +1,57 @@
+import pytest
+
+from lyrics_fetcher import romaji
+
+
+@pytest.fixture
+def kanji_reader(monkeypatch):
+    """Lecteur des kanji du test (indépendant de pykakasi et de $AUTOLYRICS_KANJI_DICT)."""
+    def use(entries):
+        monkeypatch.setitem(romaji._config, "kanji_reader", romaji.DictionaryReader(entries))
+    use({})
+    return use
+
+
+@pytest.mark.parametrize("kana, expected", [
+    ("きゃりー", "kyarii"),
+    ("まっちゃ", "matcha"),
+    ("きっと", "kitto"),
+    ("コーヒー", "koohii"),
+    ("しんぶん", "shinbun"),
+    ("ファイト", "faito"),
+    ("abc", "abc"),
+])
+def test_kana_to_romaji(kana, expected):
+    assert romaji.kana_to_romaji(kana) == expected
+
+
+def test_script_detection():
+    assert romaji.script_counts("あア漢한a") == {"hiragana": 1, "katakana": 1, "kanji": 1, "hangul": 1, "latin": 1}
+    assert romaji.detect_script("きみのこえ") == "japanese"
+    assert romaji.detect_script("愛") == "japanese"
+    assert romaji.detect_script("사랑해") == "korean"
+    assert romaji.detect_script("kimi no koe") == "latin"
+
+
+def test_is_romaji_tolerates_a_japanese_title():
+    lyrics = "紅蓮華\n" + "tsuyoku nareru riyuu wo shitta boku wo tsurete susume\n" * 3
+    assert romaji.is_romaji(lyrics)
+    assert not romaji.is_romaji("君の声が聞こえる")
+    assert not romaji.is_romaji("사랑해")
+
+
+def test_to_romaji_with_reader(kanji_reader):
+    assert romaji.to_romaji("きみのこえ") == "kiminokoe"
+    kanji_reader({"君": "きみ", "声": "こえ"})
+    assert romaji.to_romaji("君の声\n\nきこえる") == "kimi no koe\n\nkikoeru"
+
+
+def test_to_romaji_unreadable_kanji(kanji_reader):
+    assert romaji.to_romaji("君の声") is None
+    kanji_reader({"君": "きみ"})
+    assert romaji.to_romaji("君の歌") is None
+
+
+@pytest.mark.parametrize("text", ["사랑해", "我爱你"])
+def test_to_romaji_rejects_non_japanese(kanji_reader, text):
+    assert romaji.to_romaji(text) is None
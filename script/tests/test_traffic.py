@@ -0,0 +1,119 @@
+import json
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from lyrics_fetcher import traffic
+
+
+class FakeClock:
+    """Remplace le module time de traffic.py : sleep() avance l'horloge au lieu d'attendre."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(traffic, "time", fake)
+    monkeypatch.setattr(traffic, "_config", dict(traffic._config))
+    traffic.reset()
+    return fake
+
+
+def test_token_bucket_allows_a_burst_then_spaces_requests(clock):
+    traffic.configure(host_rates={"example.org": (10.0, 3)})
+    for _ in range(3):
+        traffic.acquire("example.org")
+    assert clock.sleeps == []
+    traffic.acquire("example.org")
+    assert sum(clock.sleeps) == pytest.approx(0.1)
+
+
+def test_retry_after_accepts_seconds_and_http_dates(clock):
+    in_30s = datetime.fromtimestamp(clock.now + 30, timezone.utc)
+    assert traffic._retry_after("120") == 120.0
+    assert traffic._retry_after(format_datetime(in_30s, usegmt=True)) == pytest.approx(30.0)
+    assert traffic._retry_after("bientôt") is None
+    assert traffic._retry_after(None) is None
+
+
+def test_failure_pauses_host_for_at_least_retry_after(clock):
+    delay = traffic.record_failure("example.org", "120")
+    assert delay >= 120.0
+    assert traffic.snapshot()[traffic.HOSTS]["example.org"]["paused_for_s"] >= 120.0
+    traffic.acquire("example.org")
+    assert sum(clock.sleeps) == pytest.approx(delay)
+
+
+def test_success_does_not_lift_the_pause(clock):
+    delay = traffic.record_failure("example.org", "30")
+    # Réponse d'une requête partie avant le 429 : le compteur repart à zéro, pas la pause.
+    traffic.record_success("example.org")
+    assert traffic.snapshot()[traffic.HOSTS]["example.org"]["failures"] == 0
+    traffic.acquire("example.org")
+    assert sum(clock.sleeps) == pytest.approx(delay)
+
+
+def test_breaker_opens_at_threshold_then_lets_one_probe_through(clock):
+    traffic.configure(failure_threshold=2, cooldown=10.0)
+    traffic.provider_failed("genius")
+    traffic.check_provider("genius")
+    traffic.provider_failed("genius")
+    with pytest.raises(traffic.Unavailable, match="disjoncteur ouvert"):
+        traffic.check_provider("genius")
+
+    clock.now += 10.0
+    traffic.check_provider("genius")
+    with pytest.raises(traffic.Unavailable, match="en cours de test"):
+        traffic.check_provider("genius")
+    traffic.provider_succeeded("genius")
+    traffic.check_provider("genius")
+    assert traffic.snapshot()[traffic.PROVIDERS]["genius"]["breaker"] == traffic.CLOSED
+
+
+def test_failed_probe_reopens_breaker_for_twice_as_long(clock):
+    traffic.configure(failure_threshold=1, cooldown=10.0)
+    traffic.provider_failed("mojim")
+    clock.now += 10.0
+    traffic.check_provider("mojim")
+    traffic.provider_failed("mojim")
+    assert traffic.snapshot()[traffic.PROVIDERS]["mojim"]["open_for_s"] == 20.0
+
+
+def test_healthy_host_does_not_touch_the_state_file(clock):
+    path = traffic.state_path()
+    before = os.stat(path).st_mtime_ns, open(path).read()
+    for _ in range(10):
+        traffic.acquire("example.org")
+        traffic.record_success("example.org")
+    traffic.provider_succeeded("genius")
+    traffic.check_provider("genius")
+    assert (os.stat(path).st_mtime_ns, open(path).read()) == before
+
+
+def test_breaker_opened_by_another_process_is_seen_after_sync_interval(clock):
+    traffic.acquire("example.org")
+    other = {traffic.HOSTS: {"example.org": {"failures": 5, "trips": 1, "open_until": clock.now + 60}},
+             traffic.PROVIDERS: {}}
+    with open(traffic.state_path(), "w", encoding="utf-8") as f:
+        json.dump(other, f)
+    traffic.acquire("example.org")  # copie en mémoire encore valide
+
+    clock.now += traffic._config["sync_interval"]
+    with pytest.raises(traffic.Unavailable, match="disjoncteur ouvert"):
+        traffic.acquire("example.org")